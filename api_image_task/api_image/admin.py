@@ -1,10 +1,14 @@
 from django.contrib import admin
+from .authentication import revoke_api_key
 from .models import (
+    ApiKey,
     ThumbnailDimensions,
     AccountTier,
     ClientAccount,
     UploadedImage,
     ExpiringLinks,
+    ImageDerivative,
+    ThumbnailJob,
 )
 from .utils import calculate_seconds_left
 
@@ -21,6 +25,8 @@ class AccountTierAdmin(admin.ModelAdmin):
         "orginal_image_acces",
         "time_limited_link_acces",
         "display_image_sizes",
+        "thumbnail_formats",
+        "keep_source_format",
     ]
 
     def display_image_sizes(self, obj):
@@ -32,9 +38,48 @@ class ImagexAccountAdmin(admin.ModelAdmin):
     list_display = ["user", "account_type"]
 
 
+@admin.register(ApiKey)
+class ApiKeyAdmin(admin.ModelAdmin):
+    list_display = ["prefix", "client", "name", "revoked", "add_time"]
+    list_filter = ["revoked"]
+    readonly_fields = ["prefix", "hashed_key", "revoked"]
+    actions = ["revoke"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Revoke selected API keys")
+    def revoke(self, request, queryset):
+        for api_key in queryset:
+            revoke_api_key(api_key)
+
+
+class ImageDerivativeInline(admin.TabularInline):
+    model = ImageDerivative
+    extra = 0
+    fields = ["size", "format", "image", "width", "height", "byte_size"]
+    readonly_fields = fields
+
+
 @admin.register(UploadedImage)
 class UploadedImageAdmin(admin.ModelAdmin):
-    list_display = ["add_time", "title", "author", "upload_image"]
+    list_display = [
+        "add_time",
+        "title",
+        "author",
+        "upload_image",
+        "format",
+        "width",
+        "height",
+        "byte_size",
+    ]
+    list_filter = ["format"]
+    inlines = [ImageDerivativeInline]
+
+
+@admin.register(ImageDerivative)
+class ImageDerivativeAdmin(admin.ModelAdmin):
+    list_display = ["add_time", "original", "size", "format", "byte_size", "image"]
 
 
 @admin.register(ExpiringLinks)
@@ -45,3 +90,9 @@ class ExpiringLinksAdmin(admin.ModelAdmin):
         return calculate_seconds_left(
             add_time=obj.add_time, time_to_expire=obj.time_to_expire
         )
+
+
+@admin.register(ThumbnailJob)
+class ThumbnailJobAdmin(admin.ModelAdmin):
+    list_display = ["add_time", "status", "attempts", "claimed_at", "derivative"]
+    list_filter = ["status"]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiImageConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api_image"
+
+    def ready(self):
+        from . import deduplication, expiring_links, tiers  # noqa: F401
@@ -0,0 +1,90 @@
+import hashlib
+import hmac
+import secrets
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import ApiKey
+
+
+def get_api_key_cache():
+    if settings.API_KEY_CACHE is None:
+        return None
+    return caches[settings.API_KEY_CACHE]
+
+
+def api_key_cache_key(prefix):
+    return f"api-key:{prefix}"
+
+
+def hash_api_key(secret):
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def issue_api_key(client, name=""):
+    prefix = secrets.token_hex(4)
+    secret = secrets.token_urlsafe(32)
+    api_key = ApiKey.objects.create(
+        client=client, name=name, prefix=prefix, hashed_key=hash_api_key(secret)
+    )
+    return api_key, f"{prefix}.{secret}"
+
+
+def revoke_api_key(api_key):
+    api_key.revoked = True
+    api_key.save(update_fields=["revoked"])
+    cache = get_api_key_cache()
+    if cache is not None:
+        cache.delete(api_key_cache_key(api_key.prefix))
+
+
+class ApiKeyAuthentication(BaseAuthentication):
+    keyword = "Api-Key"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Invalid API key header.")
+
+        try:
+            prefix, _, secret = auth[1].decode().partition(".")
+        except UnicodeError:
+            raise AuthenticationFailed("Invalid API key.")
+        if not prefix or not secret:
+            raise AuthenticationFailed("Invalid API key.")
+
+        hashed_key, user = self.lookup(prefix)
+        if not hmac.compare_digest(hashed_key, hash_api_key(secret)):
+            raise AuthenticationFailed("Invalid API key.")
+        if not user.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+        return (user, prefix)
+
+    def lookup(self, prefix):
+        cache = get_api_key_cache()
+        if cache is not None:
+            cached = cache.get(api_key_cache_key(prefix))
+            if cached is not None:
+                return cached
+
+        api_key = (
+            ApiKey.objects.select_related("client__user")
+            .filter(prefix=prefix, revoked=False)
+            .first()
+        )
+        if api_key is None:
+            raise AuthenticationFailed("Invalid API key.")
+
+        verified = (api_key.hashed_key, api_key.client.user)
+        if cache is not None:
+            cache.set(
+                api_key_cache_key(prefix), verified, timeout=settings.API_KEY_CACHE_TTL
+            )
+        return verified
+
+    def authenticate_header(self, request):
+        return self.keyword
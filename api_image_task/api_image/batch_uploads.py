@@ -0,0 +1,80 @@
+import hashlib
+import os
+import zipfile
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+from io import BytesIO
+
+from .serializers import UploadedImageSerializer
+
+
+class BatchTooLarge(Exception):
+    pass
+
+
+def extract_member(zip_file, member):
+    name = os.path.basename(member.filename)
+    if member.file_size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        upload = TemporaryUploadedFile(name, None, member.file_size, None)
+    else:
+        upload = InMemoryUploadedFile(
+            BytesIO(), None, name, None, member.file_size, None
+        )
+    content_hash = hashlib.sha256()
+    with zip_file.open(member) as source:
+        for chunk in iter(lambda: source.read(64 * 1024), b""):
+            content_hash.update(chunk)
+            upload.file.write(chunk)
+    upload.file.seek(0)
+    upload.content_hash = content_hash.hexdigest()
+    return upload
+
+
+def archive_uploads(archive):
+    with zipfile.ZipFile(archive) as zip_file:
+        members = [
+            member
+            for member in zip_file.infolist()
+            if not member.is_dir()
+            and not os.path.basename(member.filename).startswith(".")
+            and not member.filename.startswith("__MACOSX/")
+        ]
+        if len(members) > settings.IMAGE_BATCH_MAX_FILES:
+            raise BatchTooLarge
+        for member in members:
+            if member.file_size > settings.IMAGE_UPLOAD_MAX_BYTES:
+                yield os.path.basename(member.filename), None
+            else:
+                yield os.path.basename(member.filename), extract_member(
+                    zip_file, member
+                )
+
+
+def batch_uploads(request):
+    uploads = [
+        (upload.name, upload) for upload in request.FILES.getlist("upload_images")
+    ]
+    archive = request.FILES.get("archive")
+    if archive is not None:
+        uploads += archive_uploads(archive)
+    if len(uploads) > settings.IMAGE_BATCH_MAX_FILES:
+        raise BatchTooLarge
+    return uploads
+
+
+def validate_batch(uploads, titles):
+    for index, (filename, upload) in enumerate(uploads):
+        if upload is None:
+            yield index, filename, None, {"upload_image": ["Image file is too large"]}
+            continue
+
+        title = titles[index] if index < len(titles) else None
+        if not title:
+            title = os.path.splitext(filename)[0][:128]
+        serializer = UploadedImageSerializer(
+            data={"title": title, "upload_image": upload}
+        )
+        if serializer.is_valid():
+            yield index, filename, serializer.validated_data, None
+        else:
+            yield index, filename, None, serializer.errors
@@ -0,0 +1,128 @@
+import hashlib
+from collections import defaultdict, namedtuple
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ImageDerivative, ThumbnailJob, UploadedImage
+
+StoredCopies = namedtuple("StoredCopies", ["originals", "derivatives"])
+
+
+class StoredCopyReleased(Exception):
+    pass
+
+
+def hash_upload(upload):
+    content_hash = getattr(upload, "content_hash", None)
+    if content_hash is None:
+        digest = hashlib.sha256()
+        for chunk in upload.chunks():
+            digest.update(chunk)
+        content_hash = upload.content_hash = digest.hexdigest()
+    return content_hash
+
+
+def rendered_derivatives():
+    return ImageDerivative.objects.filter(
+        Q(thumbnail_job__isnull=True) | Q(thumbnail_job__status=ThumbnailJob.DONE)
+    )
+
+
+def no_stored_copies():
+    return StoredCopies({}, defaultdict(dict))
+
+
+def find_stored_copies(content_hashes, author_id):
+    originals = dict(
+        UploadedImage.objects.filter(
+            author_id=author_id, content_hash__in=content_hashes
+        ).values_list("content_hash", "upload_image")
+    )
+    derivatives = defaultdict(dict)
+    rendered = (
+        rendered_derivatives()
+        .filter(original__author_id=author_id, original__content_hash__in=originals)
+        .values_list(
+            "original__content_hash",
+            "size_id",
+            "format",
+            "image",
+            "byte_size",
+            "width",
+            "height",
+        )
+    )
+    for content_hash, size_id, format_name, image, byte_size, width, height in rendered:
+        derivatives[content_hash][(size_id, format_name)] = {
+            "image": image,
+            "byte_size": byte_size,
+            "width": width,
+            "height": height,
+        }
+    return StoredCopies(originals, derivatives)
+
+
+def reused_thumbnails(stored_thumbnails, image_sizes, formats):
+    return [
+        stored_thumbnails[(size.id, format_name)]["image"]
+        for size in image_sizes
+        for format_name in formats
+        if (size.id, format_name) in stored_thumbnails
+    ]
+
+
+def lock_stored_copies(original_names, derivative_names, author_id):
+    # Runs inside the transaction that inserts the new references: the locked
+    # rows keep a concurrent delete from releasing the files until it commits.
+    original_names = set(original_names)
+    derivative_names = set(derivative_names)
+    locked_originals = set(
+        UploadedImage.objects.select_for_update()
+        .filter(author_id=author_id, upload_image__in=original_names)
+        .values_list("upload_image", flat=True)
+    )
+    locked_derivatives = set(
+        ImageDerivative.objects.select_for_update(of=("self",))
+        .filter(original__author_id=author_id, image__in=derivative_names)
+        .values_list("image", flat=True)
+    )
+    if locked_originals != original_names or locked_derivatives != derivative_names:
+        raise StoredCopyReleased
+
+
+def store_file(model, field_name, name, content):
+    field = model._meta.get_field(field_name)
+    if not isinstance(content, File):
+        content = File(content)
+    return field.storage.save(
+        field.generate_filename(None, name), content, max_length=field.max_length
+    )
+
+
+def discard_files(files):
+    for model, field_name, name in files:
+        model._meta.get_field(field_name).storage.delete(name)
+
+
+def release_file(model, field_name, name):
+    if not name:
+        return
+    with transaction.atomic():
+        references = model.objects.select_for_update().filter(**{field_name: name})
+        if not list(references.values_list("pk")[:1]):
+            model._meta.get_field(field_name).storage.delete(name)
+
+
+@receiver(post_delete, sender=UploadedImage)
+def release_original_file(sender, instance, **kwargs):
+    name = instance.upload_image.name
+    transaction.on_commit(lambda: release_file(UploadedImage, "upload_image", name))
+
+
+@receiver(post_delete, sender=ImageDerivative)
+def release_derivative_file(sender, instance, **kwargs):
+    name = instance.image.name
+    transaction.on_commit(lambda: release_file(ImageDerivative, "image", name))
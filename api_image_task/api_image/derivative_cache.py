@@ -0,0 +1,112 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+
+_derivative_cache = None
+
+
+class DerivativeCache:
+    def __init__(self, directory, max_bytes, rescan_seconds=60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self._lock = threading.Lock()
+        self._estimated_bytes = None
+        self._scanned_at = 0
+
+    def make_key(self, original_name, width, height, format_name, encoding=""):
+        raw_key = f"{original_name}:{width}:{height}:{format_name}:{encoding}"
+        digest = hashlib.sha1(raw_key.encode()).hexdigest()
+        return f"{digest}.{format_name.lower()}"
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, content):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix="."
+        )
+        written = 0
+        with os.fdopen(descriptor, "wb") as temporary_file:
+            for chunk in iter(lambda: content.read(64 * 1024), b""):
+                temporary_file.write(chunk)
+                written += len(chunk)
+        os.replace(temporary_path, path)
+
+        # The running estimate only sees this process's writes, so the
+        # directory is rescanned periodically to pick up other workers.
+        with self._lock:
+            if (
+                self._estimated_bytes is None
+                or time.monotonic() - self._scanned_at > self.rescan_seconds
+            ):
+                self._evict(keep=path)
+            else:
+                self._estimated_bytes += written
+                if self._estimated_bytes > self.max_bytes:
+                    self._evict(keep=path)
+        return path
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def _evict(self, keep):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        self._estimated_bytes = total
+        self._scanned_at = time.monotonic()
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._estimated_bytes = total
+
+
+def get_derivative_cache():
+    global _derivative_cache
+
+    if _derivative_cache is None or (
+        _derivative_cache.directory != settings.THUMBNAIL_CACHE_DIR
+        or _derivative_cache.max_bytes != settings.THUMBNAIL_CACHE_MAX_BYTES
+    ):
+        _derivative_cache = DerivativeCache(
+            settings.THUMBNAIL_CACHE_DIR,
+            settings.THUMBNAIL_CACHE_MAX_BYTES,
+            settings.THUMBNAIL_CACHE_RESCAN_SECONDS,
+        )
+    return _derivative_cache
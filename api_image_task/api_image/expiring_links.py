@@ -0,0 +1,101 @@
+import os
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ExpiringLinks
+from .storage import current_path
+
+ResolvedLink = namedtuple("ResolvedLink", ["path", "expires_at", "is_active"])
+
+EXPIRING_LINK_SIGNING_SALT = "api_image.expiring-link"
+
+
+def get_link_cache():
+    if settings.EXPIRING_LINK_CACHE is None:
+        return None
+    return caches[settings.EXPIRING_LINK_CACHE]
+
+
+def link_cache_key(token):
+    return f"expiring-link:{token}"
+
+
+def links_with_expiry():
+    is_active = ExpressionWrapper(Q(expires_at__gt=Now()), output_field=BooleanField())
+    return ExpiringLinks.objects.select_related("image_id", "derivative").annotate(
+        is_active=is_active
+    )
+
+
+def resolve_expiring_link(token):
+    cache = get_link_cache()
+    if cache is not None:
+        cached = cache.get(link_cache_key(token))
+        if cached is not None:
+            path, expires_at = cached
+            if os.path.exists(path):
+                return ResolvedLink(path, expires_at, expires_at > time.time())
+            cache.delete(link_cache_key(token))
+
+    link = links_with_expiry().filter(expiring_link=token).first()
+    if link is None:
+        return None
+
+    if link.derivative_id is not None:
+        path = link.derivative.image.path
+    else:
+        path = link.image_id.upload_image.path
+    expires_at = link.expires_at.timestamp()
+
+    time_left = int(expires_at - time.time())
+    if cache is not None and link.is_active and time_left > 0:
+        cache.set(link_cache_key(token), (path, expires_at), timeout=time_left)
+    return ResolvedLink(path, expires_at, link.is_active)
+
+
+def forget_links(**filters):
+    cache = get_link_cache()
+    if cache is None:
+        return
+    tokens = ExpiringLinks.objects.filter(**filters).values_list(
+        "expiring_link", flat=True
+    )
+    cache.delete_many([link_cache_key(token) for token in tokens])
+
+
+@receiver(post_delete, sender=ExpiringLinks)
+def forget_expiring_link(sender, instance, **kwargs):
+    cache = get_link_cache()
+    if cache is not None and instance.expiring_link:
+        cache.delete(link_cache_key(instance.expiring_link))
+
+
+def sign_expiring_link(image_id, file_name, time_to_expire, derivative_id=None):
+    signer = signing.Signer(salt=EXPIRING_LINK_SIGNING_SALT)
+    payload = {
+        "i": image_id,
+        "d": derivative_id,
+        "f": file_name,
+        "e": int(time.time()) + time_to_expire,
+    }
+    return signer.sign_object(payload)
+
+
+def resolve_signed_link(token):
+    signer = signing.Signer(salt=EXPIRING_LINK_SIGNING_SALT)
+    try:
+        payload = signer.unsign_object(token)
+    except signing.BadSignature:
+        return None
+
+    expires_at = payload["e"]
+    path = current_path(default_storage, payload["f"])
+    return ResolvedLink(path, expires_at, expires_at > time.time())
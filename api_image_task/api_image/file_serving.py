@@ -0,0 +1,120 @@
+import mimetypes
+import os
+import re
+from stat import S_ISREG
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class RangeFile:
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, file_size):
+    match = RANGE_PATTERN.match(header)
+    if match is None or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if not start:
+        if int(end) == 0:
+            raise RangeNotSatisfiable
+        return max(file_size - int(end), 0), file_size - 1
+
+    start = int(start)
+    end = min(int(end), file_size - 1) if end else file_size - 1
+    if start >= file_size:
+        raise RangeNotSatisfiable
+    if start > end:
+        return None
+    return start, end
+
+
+def redirect_location(path):
+    for directory, location in settings.FILE_SERVE_ACCEL_LOCATIONS.items():
+        relative_path = os.path.relpath(path, directory)
+        if not relative_path.startswith(os.pardir):
+            return (
+                location.rstrip("/") + "/" + quote(relative_path.replace(os.sep, "/"))
+            )
+    return None
+
+
+def stream_file(request, path, stat, etag):
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and request.META.get("HTTP_IF_RANGE", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+    file = open(path, "rb")
+    if byte_range is None:
+        return FileResponse(file)
+
+    start, end = byte_range
+    file.seek(start)
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    response = FileResponse(
+        RangeFile(file, end - start + 1), status=206, content_type=content_type
+    )
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return response
+
+
+def serve_file(request, path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404
+    if not S_ISREG(stat.st_mode):
+        raise Http404
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        backend = settings.FILE_SERVE_BACKEND
+        location = redirect_location(path)
+        if backend == "x-accel-redirect" and location is not None:
+            response = HttpResponse(content_type=mimetypes.guess_type(path)[0])
+            response["X-Accel-Redirect"] = location
+        elif backend == "x-sendfile":
+            response = HttpResponse(content_type=mimetypes.guess_type(path)[0])
+            response["X-Sendfile"] = path
+        else:
+            response = stream_file(request, path, stat, etag)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,83 @@
+import os
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ExpiringLinks, ImageDerivative, UploadedImage
+
+OrphanFile = namedtuple("OrphanFile", ["path", "size"])
+
+
+def purge_expired_links(batch_size, dry_run=False):
+    expired_links = ExpiringLinks.objects.filter(expires_at__lte=timezone.now())
+    if dry_run:
+        return expired_links.count()
+
+    deleted = 0
+    while True:
+        batch_ids = list(expired_links.values_list("id", flat=True)[:batch_size])
+        if not batch_ids:
+            return deleted
+        deleted += ExpiringLinks.objects.filter(id__in=batch_ids).delete()[0]
+
+
+def referenced_names(names):
+    referenced = set()
+    for queryset in [
+        UploadedImage.objects.filter(upload_image__in=names).values_list(
+            "upload_image", flat=True
+        ),
+        ImageDerivative.objects.filter(image__in=names).values_list("image", flat=True),
+    ]:
+        referenced.update(queryset)
+    return referenced
+
+
+def unreferenced(candidates):
+    referenced = referenced_names(list(candidates))
+    return [orphan for name, orphan in candidates.items() if name not in referenced]
+
+
+def scan_files(root):
+    directories = [root]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def find_orphan_files(root, min_age):
+    if not os.path.isdir(root):
+        return
+
+    cutoff = time.time() - min_age
+    candidates = {}
+    for entry in scan_files(root):
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime >= cutoff:
+            continue
+        name = os.path.relpath(entry.path, root).replace(os.sep, "/")
+        candidates[name] = OrphanFile(entry.path, stat.st_size)
+        if len(candidates) >= settings.GC_FILE_BATCH_SIZE:
+            yield from unreferenced(candidates)
+            candidates = {}
+    if candidates:
+        yield from unreferenced(candidates)
+
+
+def delete_orphan_files(min_age, dry_run=False):
+    files = 0
+    reclaimed_bytes = 0
+    for orphan in find_orphan_files(settings.MEDIA_ROOT, min_age):
+        if not dry_run:
+            try:
+                os.remove(orphan.path)
+            except FileNotFoundError:
+                continue
+        files += 1
+        reclaimed_bytes += orphan.size
+    return files, reclaimed_bytes
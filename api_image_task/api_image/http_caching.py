@@ -0,0 +1,70 @@
+import hashlib
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .file_serving import serve_file
+from .models import ImageDerivative, ThumbnailJob, UploadedImage
+from .storage import ShardedFileSystemStorage, current_path
+
+
+def weak_etag(*parts):
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def images_etag(images, *parts):
+    image_state = images.aggregate(
+        count=Count("id"),
+        latest=Max("add_time"),
+        measured=Count("id", filter=Q(byte_size__isnull=False)),
+        flat=Count("id", filter=~Q(upload_image__contains="/")),
+    )
+    derivative_state = ImageDerivative.objects.filter(original__in=images).aggregate(
+        count=Count("id"),
+        latest=Max("add_time"),
+        flat=Count("id", filter=~Q(image__contains="/")),
+        **{
+            status: Count("id", filter=Q(thumbnail_job__status=status))
+            for status in (
+                ThumbnailJob.PROCESSING,
+                ThumbnailJob.DONE,
+                ThumbnailJob.FAILED,
+            )
+        },
+    )
+    return weak_etag(*parts, image_state, derivative_state)
+
+
+def page_etag_response(request, response):
+    # Hashes the rendered page, so the cost stays with the page queries
+    # instead of an aggregate over the whole collection.
+    if request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return response
+    response.render()
+    etag = weak_etag(response.content)
+    response["ETag"] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def image_detail_etag(request, pk, *args, **kwargs):
+    images = UploadedImage.objects.filter(id=pk)
+    original_acces = images.values_list(
+        "author__account_type__orginal_image_acces", flat=True
+    ).first()
+    if original_acces is None:
+        return None
+    return images_etag(images, original_acces)
+
+
+def cache_immutable(response):
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE, immutable=True
+    )
+    return response
+
+
+def serve_media(request, path, document_root):
+    # Flat URLs issued before shard_media keep working.
+    storage = ShardedFileSystemStorage(location=document_root)
+    return cache_immutable(serve_file(request, current_path(storage, path)))
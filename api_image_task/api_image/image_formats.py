@@ -0,0 +1,61 @@
+import os
+from PIL import Image as pilimage
+
+OUTPUT_FORMATS = ["JPEG", "PNG", "WEBP", "AVIF"]
+MEDIA_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "AVIF": "image/avif",
+}
+UNIVERSAL_FORMATS = ["JPEG", "PNG"]
+
+
+def parse_formats(value):
+    return [name.strip().upper() for name in value.split(",") if name.strip()]
+
+
+def can_encode(format_name):
+    pilimage.init()
+    return format_name in pilimage.SAVE
+
+
+def derivative_formats(tier, source_format):
+    formats = [source_format] if tier.keep_source_format else []
+    for format_name in tier.thumbnail_formats:
+        if format_name not in formats and can_encode(format_name):
+            formats.append(format_name)
+    return formats or [source_format]
+
+
+def source_format(image):
+    return os.path.splitext(image.upload_image.name)[1][1:].upper()
+
+
+def accepted_media_types(accept):
+    media_types = set()
+    for media_range in accept.split(","):
+        media_type, *parameters = media_range.split(";")
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            media_types.add(media_type.strip().lower())
+    return media_types
+
+
+def negotiate_format(accept, formats):
+    accepted = accepted_media_types(accept)
+    modern_formats = [name for name in formats if name not in UNIVERSAL_FORMATS]
+    for format_name in modern_formats:
+        if MEDIA_TYPES[format_name] in accepted:
+            return format_name
+    for format_name in formats:
+        if format_name in UNIVERSAL_FORMATS:
+            return format_name
+    return formats[0]
@@ -0,0 +1,63 @@
+import hashlib
+from django.db.models import Q
+
+from .models import UploadedImage
+from .utils import IMAGE_DECODE_ERRORS, parse_image_header
+
+METADATA_FIELDS = ["width", "height", "format", "byte_size", "content_hash"]
+
+
+def image_metadata(parsed_image, byte_size):
+    width, height = parsed_image.size
+    return {
+        "width": width,
+        "height": height,
+        "format": parsed_image.format,
+        "byte_size": byte_size,
+    }
+
+
+def read_image_metadata(field_file, content_hash=""):
+    with field_file.open("rb") as source:
+        metadata = image_metadata(parse_image_header(source), field_file.size)
+        if not content_hash:
+            source.seek(0)
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: source.read(64 * 1024), b""):
+                digest.update(chunk)
+            content_hash = digest.hexdigest()
+    metadata["content_hash"] = content_hash
+    return metadata
+
+
+def backfill_image_metadata(batch_size):
+    incomplete = (
+        UploadedImage.objects.filter(
+            Q(byte_size__isnull=True) | Q(format="") | Q(content_hash="")
+        )
+        .order_by("pk")
+        .only("pk", "upload_image", "content_hash")
+    )
+    updated = 0
+    skipped = 0
+    last_pk = None
+    while True:
+        batch = incomplete if last_pk is None else incomplete.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return updated, skipped
+        last_pk = batch[-1].pk
+
+        measured = []
+        for image in batch:
+            try:
+                metadata = read_image_metadata(image.upload_image, image.content_hash)
+            except IMAGE_DECODE_ERRORS:
+                skipped += 1
+                continue
+            for field_name, value in metadata.items():
+                setattr(image, field_name, value)
+            measured.append(image)
+
+        UploadedImage.objects.bulk_update(measured, METADATA_FIELDS)
+        updated += len(measured)
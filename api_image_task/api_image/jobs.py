@@ -0,0 +1,175 @@
+import time
+from datetime import timedelta
+from PIL import Image as pilimage
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ImageDerivative, ThumbnailJob, UploadedImage
+from .placeholders import placeholder_from_file
+from .utils import (
+    calculate_expected_size,
+    create_random_name,
+    render_thumbnail_formats,
+)
+
+
+def enqueue_thumbnails(original, image_sizes, format_name):
+    file_links = []
+    with transaction.atomic():
+        for size in image_sizes:
+            placeholder = ImageDerivative.objects.create(
+                original=original,
+                size=size,
+                format=format_name,
+                image=default_storage.generate_filename(
+                    create_random_name(
+                        size=size, title=original.title, format_name=format_name
+                    )
+                ),
+            )
+            ThumbnailJob.objects.create(derivative=placeholder)
+            file_links.append(
+                {
+                    "id": placeholder.id,
+                    "format": format_name,
+                    "url": placeholder.image.url,
+                    "status": ThumbnailJob.PENDING,
+                }
+            )
+    return file_links
+
+
+def claim_next_job():
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=settings.THUMBNAIL_JOB_LEASE_SECONDS)
+    claimable_jobs = ThumbnailJob.objects.filter(
+        Q(status=ThumbnailJob.PENDING)
+        | Q(status=ThumbnailJob.PROCESSING, claimed_at__lt=lease_expired)
+    )
+    for job in claimable_jobs.order_by("add_time", "id")[:10]:
+        unchanged = ThumbnailJob.objects.filter(
+            pk=job.pk, status=job.status, claimed_at=job.claimed_at
+        )
+        if job.attempts >= settings.THUMBNAIL_JOB_MAX_ATTEMPTS:
+            unchanged.update(
+                status=ThumbnailJob.FAILED,
+                error="Worker did not finish the job before its lease expired.",
+            )
+            continue
+        claimed = unchanged.update(
+            status=ThumbnailJob.PROCESSING, attempts=job.attempts + 1, claimed_at=now
+        )
+        if claimed:
+            job.status = ThumbnailJob.PROCESSING
+            job.attempts += 1
+            job.claimed_at = now
+            return job
+    return None
+
+
+def claim_sibling_jobs(job, original_id):
+    pending = ThumbnailJob.objects.filter(
+        status=ThumbnailJob.PENDING, derivative__original_id=original_id
+    ).exclude(pk=job.pk)
+    pending_ids = list(pending.values_list("pk", flat=True))
+    if not pending_ids:
+        return []
+    ThumbnailJob.objects.filter(pk__in=pending_ids, status=ThumbnailJob.PENDING).update(
+        status=ThumbnailJob.PROCESSING,
+        attempts=F("attempts") + 1,
+        claimed_at=job.claimed_at,
+    )
+    return list(
+        ThumbnailJob.objects.filter(
+            pk__in=pending_ids,
+            status=ThumbnailJob.PROCESSING,
+            claimed_at=job.claimed_at,
+        )
+    )
+
+
+def process_jobs(job):
+    try:
+        original_id = ImageDerivative.objects.values_list("original_id", flat=True).get(
+            pk=job.derivative_id
+        )
+    except ImageDerivative.DoesNotExist:
+        return [job]  # image deleted after the claim, its job went with it
+
+    # Every pending job of the original is rendered from a single decode.
+    jobs = [job] + claim_sibling_jobs(job, original_id)
+    derivatives = list(
+        ImageDerivative.objects.select_related("original", "size").filter(
+            pk__in=[claimed.derivative_id for claimed in jobs]
+        )
+    )
+    if not derivatives:
+        return jobs
+
+    try:
+        original = derivatives[0].original
+        sizes = list(
+            {derivative.size_id: derivative.size for derivative in derivatives}.values()
+        )
+        size_index = {size.id: index for index, size in enumerate(sizes)}
+        format_names = list(
+            dict.fromkeys(derivative.format for derivative in derivatives)
+        )
+        with original.upload_image.open("rb") as source_file:
+            pillow_image = pilimage.open(source_file)
+            original_size = pillow_image.size
+            rendered = render_thumbnail_formats(pillow_image, sizes, format_names)
+
+        for derivative in derivatives:
+            content = rendered[derivative.format][size_index[derivative.size_id]]
+            derivative.width, derivative.height = calculate_expected_size(
+                original_size,
+                derivative.size.height,
+                derivative.size.width,
+                derivative.size.fit,
+            )
+            derivative.byte_size = content.getbuffer().nbytes
+            derivative.image.name = default_storage.save(
+                derivative.image.name, File(content)
+            )
+            derivative.save(update_fields=["image", "byte_size", "width", "height"])
+
+        for claimed in jobs:
+            claimed.status = ThumbnailJob.DONE
+            claimed.error = ""
+        if not original.placeholder:
+            UploadedImage.objects.filter(pk=original.pk, placeholder="").update(
+                placeholder=placeholder_from_file(
+                    default_storage, derivatives[0].image.name
+                )
+            )
+    except Exception as error:
+        for claimed in jobs:
+            claimed.error = str(error)
+            if claimed.attempts < settings.THUMBNAIL_JOB_MAX_ATTEMPTS:
+                claimed.status = ThumbnailJob.PENDING
+            else:
+                claimed.status = ThumbnailJob.FAILED
+
+    for claimed in jobs:
+        ThumbnailJob.objects.filter(
+            pk=claimed.pk, claimed_at=claimed.claimed_at
+        ).update(status=claimed.status, error=claimed.error)
+    return jobs
+
+
+def run_worker(burst=False, poll_interval=1.0, stop_event=None):
+    processed = 0
+    while stop_event is None or not stop_event.is_set():
+        job = claim_next_job()
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        processed += len(process_jobs(job))
+    return processed
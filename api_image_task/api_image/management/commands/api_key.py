@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...authentication import issue_api_key, revoke_api_key
+from ...models import ApiKey, ClientAccount
+
+
+class Command(BaseCommand):
+    help = "Issue, revoke and list API keys of client accounts."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="action", required=True)
+
+        issue = subparsers.add_parser("issue", help="Issue a new API key.")
+        issue.add_argument("username")
+        issue.add_argument("--name", default="", help="Label shown in key listings.")
+
+        revoke = subparsers.add_parser("revoke", help="Revoke an API key.")
+        revoke.add_argument("prefix")
+
+        list_keys = subparsers.add_parser("list", help="List API keys of a user.")
+        list_keys.add_argument("username")
+
+    def get_client(self, username):
+        try:
+            return ClientAccount.objects.get(user__username=username)
+        except ClientAccount.DoesNotExist:
+            raise CommandError(f"No client account for user {username!r}.")
+
+    def handle(self, *args, **options):
+        action = options["action"]
+
+        if action == "issue":
+            client = self.get_client(options["username"])
+            api_key, key = issue_api_key(client, name=options["name"])
+            self.stdout.write(f"Issued API key {api_key.prefix}. Store it now:")
+            self.stdout.write(key)
+
+        elif action == "revoke":
+            try:
+                api_key = ApiKey.objects.get(prefix=options["prefix"])
+            except ApiKey.DoesNotExist:
+                raise CommandError(f"No API key with prefix {options['prefix']!r}.")
+            revoke_api_key(api_key)
+            self.stdout.write(f"Revoked API key {api_key.prefix}.")
+
+        else:
+            client = self.get_client(options["username"])
+            for api_key in client.api_keys.order_by("add_time"):
+                state = "revoked" if api_key.revoked else "active"
+                self.stdout.write(
+                    f"{api_key.prefix}\t{state}\t{api_key.add_time:%Y-%m-%d}\t"
+                    f"{api_key.name}"
+                )
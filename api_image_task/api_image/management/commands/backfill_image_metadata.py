@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ...image_metadata import backfill_image_metadata
+
+
+class Command(BaseCommand):
+    help = "Store dimensions, format, byte size and content hash of older images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of images read and updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        updated, skipped = backfill_image_metadata(max(options["batch_size"], 1))
+        self.stdout.write(
+            f"Updated {updated} image(s), skipped {skipped} missing or unreadable "
+            f"file(s)."
+        )
@@ -0,0 +1,53 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...garbage_collection import delete_orphan_files, purge_expired_links
+
+
+class Command(BaseCommand):
+    help = "Delete expired time-expiring links and media files no image refers to."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.GC_LINK_BATCH_SIZE,
+            help="Number of expired links deleted per query.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=settings.GC_ORPHAN_MIN_AGE,
+            help="Seconds an unreferenced file must be old before it is deleted.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep running and collect every INTERVAL seconds.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.collect(
+                max(options["batch_size"], 1), options["min_age"], options["dry_run"]
+            )
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
+
+    def collect(self, batch_size, min_age, dry_run):
+        links = purge_expired_links(batch_size, dry_run=dry_run)
+        files, reclaimed_bytes = delete_orphan_files(min_age, dry_run=dry_run)
+
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(
+            f"{verb} {links} expired link(s) and {files} orphaned file(s), "
+            f"{reclaimed_bytes} bytes."
+        )
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Generate pending thumbnails from the database job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.THUMBNAIL_WORKERS,
+            help="Number of worker threads processing jobs.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for new jobs.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.THUMBNAIL_POLL_INTERVAL,
+            help="Seconds to wait between polls of an empty queue.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+        burst = options["burst"]
+        poll_interval = options["poll_interval"]
+
+        if workers == 1:
+            processed = run_worker(burst=burst, poll_interval=poll_interval)
+        else:
+            stop_event = threading.Event()
+
+            def worker():
+                try:
+                    return run_worker(burst, poll_interval, stop_event)
+                except BaseException:
+                    stop_event.set()  # let the other threads finish their job and exit
+                    raise
+                finally:
+                    connections.close_all()
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(worker) for _ in range(workers)]
+                try:
+                    processed = sum(future.result() for future in futures)
+                except BaseException:
+                    stop_event.set()
+                    raise
+
+        self.stdout.write(f"Processed {processed} thumbnail job(s).")
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...expiring_links import forget_links
+from ...models import ImageDerivative, UploadedImage
+from ...storage import ShardedFileSystemStorage, relocate_files
+
+
+class Command(BaseCommand):
+    help = "Move images stored flat in MEDIA_ROOT into hashed prefix directories."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows relocated and updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        storage = UploadedImage._meta.get_field("upload_image").storage
+        if not isinstance(storage, ShardedFileSystemStorage):
+            raise CommandError("The default storage is not ShardedFileSystemStorage.")
+        if settings.MEDIA_SHARD_DEPTH < 1:
+            raise CommandError("MEDIA_SHARD_DEPTH must be at least 1.")
+
+        batch_size = max(options["batch_size"], 1)
+        for model, field_name, link_field in [
+            (UploadedImage, "upload_image", "image_id"),
+            (ImageDerivative, "image", "derivative"),
+        ]:
+            relocated, skipped = relocate_files(
+                model,
+                field_name,
+                batch_size,
+                on_relocated=lambda pks: forget_links(**{f"{link_field}__in": pks}),
+            )
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: relocated {relocated} file(s), "
+                f"skipped {skipped} missing or conflicting file(s)."
+            )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0002_thumbnailjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="is_original",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.5 on 2026-10-18 07:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0003_uploadedimage_is_original"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="thumbnailjob",
+            name="image",
+            field=models.OneToOneField(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="thumbnail_job",
+                to="api_image.uploadedimage",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="thumbnailjob",
+            name="size",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="api_image.thumbnaildimensions",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="thumbnailjob",
+            name="source",
+            field=models.CharField(max_length=256, null=True),
+        ),
+        migrations.CreateModel(
+            name="ImageDerivative",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("add_time", models.DateTimeField(auto_now_add=True)),
+                ("format", models.CharField(max_length=16)),
+                ("image", models.ImageField(upload_to="")),
+                ("byte_size", models.PositiveIntegerField(blank=True, null=True)),
+                ("width", models.PositiveIntegerField(blank=True, null=True)),
+                ("height", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "original",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="derivatives",
+                        to="api_image.uploadedimage",
+                    ),
+                ),
+                (
+                    "size",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api_image.thumbnaildimensions",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="expiringlinks",
+            name="derivative",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="expiring_links",
+                to="api_image.imagederivative",
+            ),
+        ),
+        migrations.AddField(
+            model_name="thumbnailjob",
+            name="derivative",
+            field=models.OneToOneField(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="thumbnail_job",
+                to="api_image.imagederivative",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="imagederivative",
+            constraint=models.UniqueConstraint(
+                fields=("original", "size", "format"), name="unique_image_derivative"
+            ),
+        ),
+    ]
@@ -0,0 +1,157 @@
+import os
+from datetime import timedelta
+from django.db import migrations
+
+GROUP_WINDOW = timedelta(seconds=60)
+BATCH_SIZE = 500
+
+
+def size_token(size):
+    token = ""
+    if size.height:
+        token += str(size.height)
+    if size.width:
+        token += "x" + str(size.width)
+    return token
+
+
+def match_size(name, sizes):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    matches = [size for size in sizes if stem.endswith(size_token(size))]
+    return max(matches, key=lambda size: len(size_token(size)), default=None)
+
+
+def file_format(name):
+    return os.path.splitext(name)[1][1:].upper()
+
+
+def file_size(storage, name):
+    try:
+        return storage.size(name)
+    except OSError:
+        return None
+
+
+def convert_to_derivative(apps, row, original, size):
+    ImageDerivative = apps.get_model("api_image", "ImageDerivative")
+    ExpiringLinks = apps.get_model("api_image", "ExpiringLinks")
+
+    format_name = file_format(row.upload_image.name)
+    exists = ImageDerivative.objects.filter(
+        original=original, size=size, format=format_name
+    ).exists()
+    if exists:
+        return None
+
+    derivative = ImageDerivative.objects.create(
+        original=original,
+        size=size,
+        format=format_name,
+        image=row.upload_image.name,
+        byte_size=file_size(row.upload_image.storage, row.upload_image.name),
+    )
+    ExpiringLinks.objects.filter(image_id=row).update(
+        image_id=original, derivative=derivative
+    )
+    return derivative
+
+
+def group_rows(rows):
+    group = []
+    for row in rows:
+        if group and (
+            row.author_id != group[0].author_id
+            or row.title != group[0].title
+            or row.add_time - group[0].add_time > GROUP_WINDOW
+        ):
+            yield group
+            group = []
+        group.append(row)
+    if group:
+        yield group
+
+
+def group_derivatives(apps, schema_editor):
+    UploadedImage = apps.get_model("api_image", "UploadedImage")
+    ThumbnailDimensions = apps.get_model("api_image", "ThumbnailDimensions")
+    ThumbnailJob = apps.get_model("api_image", "ThumbnailJob")
+
+    for job in ThumbnailJob.objects.select_related("image"):
+        placeholder = job.image
+        original = UploadedImage.objects.filter(upload_image=job.source).first()
+        if original is None:
+            original = UploadedImage.objects.create(
+                title=placeholder.title,
+                author_id=placeholder.author_id,
+                upload_image=job.source,
+            )
+        original.is_original = True
+        original.save(update_fields=["is_original"])
+
+        derivative = convert_to_derivative(apps, placeholder, original, job.size)
+        if derivative is None:
+            job.delete()
+        else:
+            job.image = None
+            job.derivative = derivative
+            job.save(update_fields=["image", "derivative"])
+        placeholder.delete()
+
+    sizes = [size for size in ThumbnailDimensions.objects.all() if size_token(size)]
+    rows = UploadedImage.objects.order_by("author_id", "title", "id")
+    converted_ids = []
+    for group in group_rows(rows.iterator()):
+        original = next((row for row in group if row.is_original), None)
+        if original is None and match_size(group[0].upload_image.name, sizes):
+            continue
+        if original is None:
+            original = group[0]
+            original.is_original = True
+            original.save(update_fields=["is_original"])
+
+        for row in group:
+            if row.pk == original.pk:
+                continue
+            size = match_size(row.upload_image.name, sizes)
+            if size is None:
+                continue
+            if convert_to_derivative(apps, row, original, size) is not None:
+                converted_ids.append(row.pk)
+
+    for start in range(0, len(converted_ids), BATCH_SIZE):
+        batch = converted_ids[start : start + BATCH_SIZE]
+        UploadedImage.objects.filter(pk__in=batch).delete()
+
+
+def ungroup_derivatives(apps, schema_editor):
+    UploadedImage = apps.get_model("api_image", "UploadedImage")
+    ImageDerivative = apps.get_model("api_image", "ImageDerivative")
+    ExpiringLinks = apps.get_model("api_image", "ExpiringLinks")
+    ThumbnailJob = apps.get_model("api_image", "ThumbnailJob")
+
+    for derivative in ImageDerivative.objects.select_related("original"):
+        row = UploadedImage.objects.create(
+            title=derivative.original.title,
+            author_id=derivative.original.author_id,
+            upload_image=derivative.image.name,
+        )
+        ExpiringLinks.objects.filter(derivative=derivative).update(
+            image_id=row, derivative=None
+        )
+        ThumbnailJob.objects.filter(derivative=derivative).update(
+            image=row,
+            size_id=derivative.size_id,
+            source=derivative.original.upload_image.name,
+            derivative=None,
+        )
+        derivative.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0004_imagederivative"),
+    ]
+
+    operations = [
+        migrations.RunPython(group_derivatives, ungroup_derivatives),
+    ]
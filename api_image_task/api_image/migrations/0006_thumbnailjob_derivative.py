@@ -0,0 +1,34 @@
+# Generated by Django 4.2.5 on 2026-10-18 07:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0005_group_derivatives"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="thumbnailjob",
+            name="image",
+        ),
+        migrations.RemoveField(
+            model_name="thumbnailjob",
+            name="size",
+        ),
+        migrations.RemoveField(
+            model_name="thumbnailjob",
+            name="source",
+        ),
+        migrations.AlterField(
+            model_name="thumbnailjob",
+            name="derivative",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="thumbnail_job",
+                to="api_image.imagederivative",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.5 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0006_thumbnailjob_derivative"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="uploadedimage",
+            index=models.Index(
+                fields=["author", "add_time", "id"], name="image_author_time_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2026-10-18 07:24
+
+from datetime import timedelta
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def fill_expires_at(apps, schema_editor):
+    ExpiringLinks = apps.get_model("api_image", "ExpiringLinks")
+
+    links = []
+    for link in ExpiringLinks.objects.only("add_time", "time_to_expire").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        link.expires_at = link.add_time + timedelta(seconds=link.time_to_expire)
+        links.append(link)
+        if len(links) == BATCH_SIZE:
+            ExpiringLinks.objects.bulk_update(links, ["expires_at"])
+            links = []
+    ExpiringLinks.objects.bulk_update(links, ["expires_at"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0007_uploadedimage_author_time_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="expiringlinks",
+            name="expires_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="expiringlinks",
+            name="expiring_link",
+            field=models.CharField(blank=True, max_length=256, null=True, unique=True),
+        ),
+        migrations.RunPython(fill_expires_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.5 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0009_apikey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name="imagederivative",
+            name="image",
+            field=models.ImageField(db_index=True, upload_to=""),
+        ),
+        migrations.AlterField(
+            model_name="uploadedimage",
+            name="upload_image",
+            field=models.ImageField(db_index=True, upload_to=""),
+        ),
+    ]
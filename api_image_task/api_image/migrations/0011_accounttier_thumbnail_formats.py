@@ -0,0 +1,26 @@
+# Generated by Django 4.2.5 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0010_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accounttier",
+            name="keep_source_format",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="accounttier",
+            name="thumbnail_formats",
+            field=models.CharField(
+                blank=True,
+                help_text="Extra thumbnail formats, comma separated: JPEG, PNG, WEBP, AVIF.",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.5 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0011_accounttier_thumbnail_formats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="optimize",
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="png_colors",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                help_text="Quantize PNG thumbnails to this many colors.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="png_compress_level",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="progressive",
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="quality",
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="strip_metadata",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="subsampling",
+            field=models.CharField(
+                blank=True,
+                choices=[("4:4:4", "4:4:4"), ("4:2:2", "4:2:2"), ("4:2:0", "4:2:0")],
+                max_length=8,
+            ),
+        ),
+    ]
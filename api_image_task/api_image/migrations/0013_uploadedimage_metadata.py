@@ -0,0 +1,32 @@
+# Generated by Django 4.2.5 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0012_thumbnaildimensions_encoder_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="byte_size",
+            field=models.PositiveBigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="format",
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 08:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0013_uploadedimage_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedimage",
+            name="placeholder",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.5 on 2026-10-18 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0014_uploadedimage_placeholder"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="crop",
+            field=models.CharField(
+                choices=[("center", "Center"), ("entropy", "Most detailed region")],
+                default="center",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="fit",
+            field=models.CharField(
+                choices=[
+                    ("stretch", "Stretch to the exact size"),
+                    ("contain", "Fit inside, keep aspect ratio"),
+                    ("cover", "Fill and crop, keep aspect ratio"),
+                    ("pad", "Fit inside and pad to the exact size"),
+                ],
+                default="stretch",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="thumbnaildimensions",
+            name="pad_color",
+            field=models.CharField(default="white", max_length=32),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api_image", "0015_thumbnaildimensions_fit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="thumbnailjob",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
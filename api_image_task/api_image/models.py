@@ -1,13 +1,50 @@
+from datetime import timedelta
+from PIL import ImageColor
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.utils import timezone
 
+from .image_formats import OUTPUT_FORMATS, parse_formats
 from .utils import calculate_seconds_left
 
 
 class ThumbnailDimensions(models.Model):
+    STRETCH = "stretch"
+    CONTAIN = "contain"
+    COVER = "cover"
+    PAD = "pad"
+    FIT_CHOICES = [
+        (STRETCH, "Stretch to the exact size"),
+        (CONTAIN, "Fit inside, keep aspect ratio"),
+        (COVER, "Fill and crop, keep aspect ratio"),
+        (PAD, "Fit inside and pad to the exact size"),
+    ]
+    CENTER = "center"
+    ENTROPY = "entropy"
+    CROP_CHOICES = [(CENTER, "Center"), (ENTROPY, "Most detailed region")]
+    SUBSAMPLING_CHOICES = [
+        ("4:4:4", "4:4:4"),
+        ("4:2:2", "4:2:2"),
+        ("4:2:0", "4:2:0"),
+    ]
+
     height = models.IntegerField(null=True, blank=True)
     width = models.IntegerField(null=True, blank=True)
+    fit = models.CharField(max_length=16, choices=FIT_CHOICES, default=STRETCH)
+    crop = models.CharField(max_length=16, choices=CROP_CHOICES, default=CENTER)
+    pad_color = models.CharField(max_length=32, default="white")
+    quality = models.PositiveSmallIntegerField(null=True, blank=True)
+    progressive = models.BooleanField(null=True, blank=True)
+    optimize = models.BooleanField(null=True, blank=True)
+    subsampling = models.CharField(
+        max_length=8, choices=SUBSAMPLING_CHOICES, blank=True
+    )
+    strip_metadata = models.BooleanField(default=True)
+    png_compress_level = models.PositiveSmallIntegerField(null=True, blank=True)
+    png_colors = models.PositiveSmallIntegerField(
+        null=True, blank=True, help_text="Quantize PNG thumbnails to this many colors."
+    )
 
     def clean(self):
         if self.height is None and self.width is None:
@@ -19,11 +56,27 @@ class ThumbnailDimensions(models.Model):
         if self.width is not None and self.width < 1:
             raise ValidationError("Width must be greater than or equal to 1.")
 
+        if self.quality is not None and not 1 <= self.quality <= 100:
+            raise ValidationError("Quality must be between 1 and 100.")
+
+        if self.png_compress_level is not None and self.png_compress_level > 9:
+            raise ValidationError("PNG compress level must be between 0 and 9.")
+
+        if self.png_colors is not None and not 2 <= self.png_colors <= 256:
+            raise ValidationError("PNG colors must be between 2 and 256.")
+
+        try:
+            ImageColor.getrgb(self.pad_color)
+        except ValueError:
+            raise ValidationError("Pad color must be a color name or hex code.")
+
     def __str__(self):
         if self.height is None:
             return f"{self.width}w x anyh"
         elif self.width is None:
             return f"anyw x {self.height}h"
+        elif self.fit != self.STRETCH:
+            return f"{self.height}h x {self.width}w {self.fit}"
         else:
             return f"{self.height}h x {self.width}w"
 
@@ -33,8 +86,24 @@ class AccountTier(models.Model):
     orginal_image_acces = models.BooleanField(default=False)
     time_limited_link_acces = models.BooleanField(default=False)
     image_sizes = models.ManyToManyField(ThumbnailDimensions)
+    thumbnail_formats = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Extra thumbnail formats, comma separated: JPEG, PNG, WEBP, AVIF.",
+    )
+    keep_source_format = models.BooleanField(default=True)
 
     def clean(self):
+        unknown_formats = [
+            format_name
+            for format_name in parse_formats(self.thumbnail_formats)
+            if format_name not in OUTPUT_FORMATS
+        ]
+        if unknown_formats:
+            raise ValidationError(
+                f"Unsupported thumbnail formats: {', '.join(unknown_formats)}."
+            )
+
         if not self.image_sizes.exists():
             raise ValidationError("At least one image size must be selected.")
 
@@ -52,26 +121,93 @@ class ClientAccount(models.Model):
         return f"Owner: {self.user} Account type: {self.account_type}"
 
 
+class ApiKey(models.Model):
+    add_time = models.DateTimeField(auto_now_add=True)
+    client = models.ForeignKey(
+        ClientAccount, on_delete=models.CASCADE, related_name="api_keys"
+    )
+    name = models.CharField(max_length=64, blank=True)
+    prefix = models.CharField(max_length=16, unique=True)
+    hashed_key = models.CharField(max_length=64)
+    revoked = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"API key {self.prefix} of {self.client.user}"
+
+
 class UploadedImage(models.Model):
     add_time = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=128)
     author = models.ForeignKey(
         ClientAccount, on_delete=models.CASCADE, related_name="client_account"
     )
-    upload_image = models.ImageField()
+    upload_image = models.ImageField(db_index=True)
+    is_original = models.BooleanField(default=False)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    width = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    height = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    format = models.CharField(max_length=16, blank=True, db_index=True)
+    byte_size = models.PositiveBigIntegerField(null=True, blank=True, db_index=True)
+    placeholder = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["author", "add_time", "id"], name="image_author_time_idx"
+            )
+        ]
 
     def __str__(self):
         return f"Image title: {self.title} by {self.author.user}"
 
 
+class ImageDerivative(models.Model):
+    add_time = models.DateTimeField(auto_now_add=True)
+    original = models.ForeignKey(
+        UploadedImage, on_delete=models.CASCADE, related_name="derivatives"
+    )
+    size = models.ForeignKey(ThumbnailDimensions, on_delete=models.CASCADE)
+    format = models.CharField(max_length=16)
+    image = models.ImageField(db_index=True)
+    byte_size = models.PositiveIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["original", "size", "format"], name="unique_image_derivative"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.size} {self.format} of image {self.original_id}"
+
+
 class ExpiringLinks(models.Model):
     add_time = models.DateTimeField(auto_now_add=True)
     image_id = models.ForeignKey(
         UploadedImage, on_delete=models.CASCADE, related_name="original"
     )
+    derivative = models.ForeignKey(
+        ImageDerivative,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="expiring_links",
+    )
     time_to_expire = models.IntegerField()
 
-    expiring_link = models.CharField(max_length=256, null=True, blank=True)
+    expiring_link = models.CharField(max_length=256, null=True, blank=True, unique=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def set_expires_at(self):
+        add_time = self.add_time or timezone.now()
+        self.expires_at = add_time + timedelta(seconds=self.time_to_expire)
+
+    def save(self, *args, **kwargs):
+        self.set_expires_at()
+        super().save(*args, **kwargs)
 
     def seconds_left(self):
         return calculate_seconds_left(
@@ -80,3 +216,30 @@ class ExpiringLinks(models.Model):
 
     def __str__(self):
         return f"Link expire in: {self.time_to_expire} sec, owner: {self.owner}."
+
+
+class ThumbnailJob(models.Model):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    add_time = models.DateTimeField(auto_now_add=True)
+    derivative = models.OneToOneField(
+        ImageDerivative, on_delete=models.CASCADE, related_name="thumbnail_job"
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True
+    )
+    attempts = models.IntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Thumbnail {self.derivative}: {self.status}"
@@ -0,0 +1,47 @@
+import base64
+from io import BytesIO
+from PIL import Image as pilimage
+from django.conf import settings
+
+from .image_formats import MEDIA_TYPES, can_encode
+from .models import ImageDerivative
+from .utils import IMAGE_DECODE_ERRORS, apply_jpeg_draft, convert_for_format
+
+
+def placeholder_size(original_size):
+    width, height = original_size
+    scale = settings.PLACEHOLDER_SIZE / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def make_placeholder(pillow_image):
+    target_size = placeholder_size(pillow_image.size)
+    apply_jpeg_draft(pillow_image, [target_size])
+    small_image = pillow_image.resize(target_size, pilimage.BILINEAR, reducing_gap=2.0)
+
+    format_name = "WEBP" if can_encode("WEBP") else "JPEG"
+    buffer = BytesIO()
+    convert_for_format(small_image, format_name).save(
+        buffer, format=format_name, quality=settings.PLACEHOLDER_QUALITY
+    )
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return f"data:{MEDIA_TYPES[format_name]};base64,{encoded}"
+
+
+def placeholder_from_file(storage, name):
+    try:
+        with storage.open(name, "rb") as source:
+            return make_placeholder(pilimage.open(source))
+    except IMAGE_DECODE_ERRORS:
+        return ""
+
+
+def placeholder_from_thumbnails(stored_thumbnails):
+    if not stored_thumbnails:
+        return ""
+    smallest = min(
+        stored_thumbnails.values(),
+        key=lambda fields: (fields["width"] or 0) * (fields["height"] or 0),
+    )
+    storage = ImageDerivative._meta.get_field("image").storage
+    return placeholder_from_file(storage, smallest["image"])
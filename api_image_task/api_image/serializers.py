@@ -1,39 +1,173 @@
-from PIL import Image as pilimage
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
-from .models import UploadedImage, ExpiringLinks
+from .models import UploadedImage, ExpiringLinks, ImageDerivative, ThumbnailJob
+from .image_formats import derivative_formats, source_format
+from .tiers import get_tier
+from .utils import IMAGE_DECODE_ERRORS, parse_image_header, sign_thumbnail
+
+
+class ParsedImageField(serializers.ImageField):
+    def to_internal_value(self, data):
+        file_object = serializers.FileField.to_internal_value(self, data)
+        try:
+            file_object.parsed_image = parse_image_header(file_object)
+        except IMAGE_DECODE_ERRORS:
+            raise serializers.ValidationError(self.error_messages["invalid_image"])
+
+        return file_object
 
 
 class UploadedImageSerializer(serializers.ModelSerializer):
+    upload_image = ParsedImageField()
+
     class Meta:
         model = UploadedImage
         fields = ["title", "upload_image"]
 
     def validate_upload_image(self, value):
-        try:
-            image = pilimage.open(value)
-            format = image.format.lower()
-            if format not in ["png", "jpeg"]:
-                raise serializers.ValidationError("Unsupported image format")
-        except pilimage.UnidentifiedImageError:
-            raise serializers.ValidationError()
+        format = value.parsed_image.format.lower()
+        if format not in ["png", "jpeg"]:
+            raise serializers.ValidationError("Unsupported image format")
+
+        if value.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError("Image file is too large")
+
+        width, height = value.parsed_image.size
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            raise serializers.ValidationError("Image has too many pixels")
 
         return value
 
+    def validate(self, attrs):
+        attrs["parsed_image"] = attrs["upload_image"].parsed_image
+        return attrs
+
+
+class ImageDerivativeSerializer(serializers.ModelSerializer):
+    size = serializers.StringRelatedField()
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageDerivative
+        fields = [
+            "id",
+            "size",
+            "format",
+            "width",
+            "height",
+            "byte_size",
+            "image",
+            "status",
+        ]
+
+    def get_status(self, obj):
+        try:
+            return obj.thumbnail_job.status
+        except ThumbnailJob.DoesNotExist:
+            return ThumbnailJob.DONE
+
 
 class RetriveListImageSerializer(serializers.ModelSerializer):
+    derivatives = ImageDerivativeSerializer(many=True, read_only=True)
+
     class Meta:
         model = UploadedImage
-        fields = ["id", "title", "upload_image"]
+        fields = [
+            "id",
+            "title",
+            "upload_image",
+            "width",
+            "height",
+            "format",
+            "byte_size",
+            "placeholder",
+            "derivatives",
+        ]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        account_type = instance.author.account_type
+        if instance.is_original and not account_type.orginal_image_acces:
+            data["upload_image"] = None
+        if settings.THUMBNAIL_LAZY:
+            # Lazy uploads store no derivatives, only the thumbnail route renders them.
+            tier = get_tier(account_type.id)
+            formats = derivative_formats(tier, source_format(instance))
+            data["thumbnails"] = [
+                {
+                    "size": str(size),
+                    "url": reverse(
+                        "thumbnail", args=[sign_thumbnail(instance.id, size, formats)]
+                    ),
+                }
+                for size in tier.image_sizes
+            ]
+        return data
+
+
+def validate_time_to_expire(value):
+    if not 300 <= value <= 30000:
+        raise serializers.ValidationError(
+            "Time to expire must be between 300 and 30000 seconds."
+        )
+    return value
+
+
+LINK_MODES = ["revocable", "signed"]
 
 
 class AddRetriveExpiringLinksSerializer(serializers.ModelSerializer):
+    mode = serializers.ChoiceField(choices=LINK_MODES, default="revocable")
+
     class Meta:
         model = ExpiringLinks
-        fields = ["image_id", "time_to_expire"]
+        fields = ["image_id", "time_to_expire", "derivative", "mode"]
+        extra_kwargs = {"derivative": {"required": False}}
+
+    def validate_image_id(self, value):
+        if value.author_id != self.context["client_id"]:
+            raise serializers.ValidationError("Image does not exist.")
+        return value
 
     def validate_time_to_expire(self, value):
-        if not 300 <= value <= 30000:
+        return validate_time_to_expire(value)
+
+    def validate(self, attrs):
+        derivative = attrs.get("derivative")
+        if derivative is not None and derivative.original_id != attrs["image_id"].id:
+            raise serializers.ValidationError(
+                {"derivative": "Derivative does not belong to this image."}
+            )
+        return attrs
+
+
+class BulkExpiringLinkSerializer(serializers.Serializer):
+    image_id = serializers.IntegerField()
+    time_to_expire = serializers.IntegerField()
+
+    def validate_time_to_expire(self, value):
+        return validate_time_to_expire(value)
+
+
+class BulkExpiringLinksSerializer(serializers.Serializer):
+    links = BulkExpiringLinkSerializer(
+        many=True, allow_empty=False, max_length=settings.EXPIRING_LINK_BULK_MAX
+    )
+    mode = serializers.ChoiceField(choices=LINK_MODES, default="revocable")
+
+    def validate_links(self, value):
+        image_ids = {link["image_id"] for link in value}
+        file_names = dict(
+            UploadedImage.objects.filter(
+                id__in=image_ids, author_id=self.context["client_id"]
+            ).values_list("id", "upload_image")
+        )
+        missing_ids = sorted(image_ids - file_names.keys())
+        if missing_ids:
             raise serializers.ValidationError(
-                "Time to expire must be between 300 and 30000 seconds."
+                f"Images do not exist: {', '.join(map(str, missing_ids))}."
             )
+        for link in value:
+            link["file_name"] = file_names[link["image_id"]]
         return value
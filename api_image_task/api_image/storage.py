@@ -0,0 +1,88 @@
+import hashlib
+import os
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+class ShardedFileSystemStorage(FileSystemStorage):
+    def shard_name(self, name):
+        depth = settings.MEDIA_SHARD_DEPTH
+        width = settings.MEDIA_SHARD_WIDTH
+        digest = hashlib.sha1(name.encode()).hexdigest()
+        prefixes = [
+            digest[level * width : (level + 1) * width] for level in range(depth)
+        ]
+        return "/".join(prefixes + [name])
+
+    def generate_filename(self, filename):
+        filename = super().generate_filename(filename)
+        if os.path.dirname(filename):
+            return filename
+        return self.shard_name(filename)
+
+
+def current_path(storage, name):
+    path = storage.path(name)
+    if (
+        isinstance(storage, ShardedFileSystemStorage)
+        and not os.path.dirname(name)
+        and not os.path.exists(path)
+    ):
+        # A flat name recorded before shard_media moved the file
+        return storage.path(storage.shard_name(name))
+    return path
+
+
+def link_into_place(old_path, new_path):
+    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+    try:
+        os.link(old_path, new_path)
+    except FileExistsError:
+        return os.path.samefile(old_path, new_path)
+    except FileNotFoundError:
+        return os.path.isfile(new_path)
+    return True
+
+
+def relocate_files(model, field_name, batch_size, on_relocated=None):
+    storage = model._meta.get_field(field_name).storage
+    flat_files = (
+        model.objects.exclude(**{f"{field_name}__contains": "/"})
+        .exclude(**{field_name: ""})
+        .order_by("pk")
+        .only("pk", field_name)
+    )
+    relocated = 0
+    skipped = 0
+    last_pk = None
+    while True:
+        batch = flat_files if last_pk is None else flat_files.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return relocated, skipped
+        last_pk = batch[-1].pk
+
+        moved = []
+        old_paths = []
+        for instance in batch:
+            field_file = getattr(instance, field_name)
+            new_name = storage.shard_name(field_file.name)
+            if new_name == field_file.name:
+                continue
+            old_path = storage.path(field_file.name)
+            if not link_into_place(old_path, storage.path(new_name)):
+                skipped += 1
+                continue
+            field_file.name = new_name
+            moved.append(instance)
+            old_paths.append(old_path)
+
+        model.objects.bulk_update(moved, [field_name])
+        if on_relocated is not None and moved:
+            on_relocated([instance.pk for instance in moved])
+        for old_path in old_paths:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+        relocated += len(moved)
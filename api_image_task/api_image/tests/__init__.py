@@ -0,0 +1,12 @@
+import shutil
+import tempfile
+from django.test import override_settings
+
+
+def use_temporary_media_root(test_case):
+    media_root = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, media_root)
+    media_settings = override_settings(MEDIA_ROOT=media_root)
+    media_settings.enable()
+    test_case.addCleanup(media_settings.disable)
+    return media_root
@@ -0,0 +1,130 @@
+import io
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..authentication import ApiKeyAuthentication, issue_api_key, revoke_api_key
+from ..models import AccountTier, ApiKey, ClientAccount
+
+
+class ApiKeyAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="password")
+        self.client_account = ClientAccount.objects.create(
+            user=self.user,
+            account_type=AccountTier.objects.create(name="Basic"),
+        )
+        self.api_key, self.key = issue_api_key(self.client_account, name="ci")
+        self.api_client = APIClient()
+        self.url = reverse("user-images-list")
+
+    def get(self, authorization):
+        return self.api_client.get(self.url, HTTP_AUTHORIZATION=authorization)
+
+    def test_key_stored_hashed(self):
+        prefix, secret = self.key.split(".")
+
+        self.assertEqual(self.api_key.prefix, prefix)
+        self.assertNotIn(secret, self.api_key.hashed_key)
+
+    def test_valid_key_authenticates(self):
+        response = self.get(f"Api-Key {self.key}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_wrong_secret_rejected(self):
+        response = self.get(f"Api-Key {self.api_key.prefix}.wrong")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], "Api-Key")
+
+    def test_malformed_keys_rejected(self):
+        for authorization in [
+            "Api-Key",
+            "Api-Key nodot",
+            "Api-Key a.b c",
+            "Api-Key .x",
+        ]:
+            with self.subTest(authorization=authorization):
+                response = self.get(authorization)
+
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_verified_key_cached(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Api-Key {self.key}")
+        authentication = ApiKeyAuthentication()
+        authentication.authenticate(request)
+
+        with self.assertNumQueries(0):
+            user, prefix = authentication.authenticate(request)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(prefix, self.api_key.prefix)
+
+    @override_settings(API_KEY_CACHE=None)
+    def test_key_verified_without_cache(self):
+        for _ in range(2):
+            response = self.get(f"Api-Key {self.key}")
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revoked_key_rejected(self):
+        self.get(f"Api-Key {self.key}")
+
+        revoke_api_key(self.api_key)
+        response = self.get(f"Api-Key {self.key}")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.get(f"Api-Key {self.key}")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_basic_authentication_still_supported(self):
+        self.api_client.login(username="testuser", password="password")
+
+        response = self.api_client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ApiKeyCommandTests(TestCase):
+    def setUp(self):
+        self.client_account = ClientAccount.objects.create(
+            user=User.objects.create_user(username="testuser"),
+            account_type=AccountTier.objects.create(name="Basic"),
+        )
+
+    def call(self, *args):
+        output = io.StringIO()
+        call_command("api_key", *args, stdout=output)
+        return output.getvalue()
+
+    def test_issue_and_revoke(self):
+        output = self.call("issue", "testuser", "--name", "ci")
+        api_key = ApiKey.objects.get()
+
+        self.assertIn(f"{api_key.prefix}.", output.splitlines()[-1])
+        self.assertIn("active", self.call("list", "testuser"))
+
+        self.call("revoke", api_key.prefix)
+        api_key.refresh_from_db()
+
+        self.assertTrue(api_key.revoked)
+        self.assertIn("revoked", self.call("list", "testuser"))
+
+    def test_unknown_user_and_prefix(self):
+        with self.assertRaises(CommandError):
+            self.call("issue", "nobody")
+        with self.assertRaises(CommandError):
+            self.call("revoke", "unknown")
@@ -0,0 +1,145 @@
+import hashlib
+import os
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from . import use_temporary_media_root
+from ..deduplication import (
+    StoredCopyReleased,
+    find_stored_copies,
+    hash_upload,
+    lock_stored_copies,
+)
+from ..models import (
+    AccountTier,
+    ClientAccount,
+    ImageDerivative,
+    ThumbnailDimensions,
+    ThumbnailJob,
+    UploadedImage,
+)
+
+
+class DeduplicationTests(TestCase):
+    def setUp(self):
+        use_temporary_media_root(self)
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        self.client_account = ClientAccount.objects.create(
+            user=user, account_type=AccountTier.objects.create(name="Test Tier")
+        )
+        self.size = ThumbnailDimensions.objects.create(height=50)
+        self.original_name = default_storage.save(
+            default_storage.generate_filename("original.png"), ContentFile(b"original")
+        )
+        self.thumbnail_name = default_storage.save(
+            default_storage.generate_filename("thumbnail.png"), ContentFile(b"thumb")
+        )
+
+    def create_copy(self, title="Test Image"):
+        image = UploadedImage.objects.create(
+            title=title,
+            author=self.client_account,
+            upload_image=self.original_name,
+            content_hash="a" * 64,
+        )
+        derivative = ImageDerivative.objects.create(
+            original=image,
+            size=self.size,
+            format="PNG",
+            image=self.thumbnail_name,
+            byte_size=5,
+            width=50,
+            height=50,
+        )
+        return image, derivative
+
+    def test_hash_upload(self):
+        upload = SimpleUploadedFile("image.png", b"content")
+
+        self.assertEqual(hash_upload(upload), hashlib.sha256(b"content").hexdigest())
+
+        upload.content_hash = "streamed"
+        self.assertEqual(hash_upload(upload), "streamed")
+
+    def test_find_stored_copies(self):
+        self.create_copy()
+        pending_size = ThumbnailDimensions.objects.create(height=20)
+        pending = ImageDerivative.objects.create(
+            original=UploadedImage.objects.get(),
+            size=pending_size,
+            format="PNG",
+            image="pending.png",
+        )
+        ThumbnailJob.objects.create(derivative=pending)
+
+        with self.assertNumQueries(2):
+            stored = find_stored_copies(["a" * 64, "b" * 64], self.client_account.id)
+
+        self.assertEqual(stored.originals, {"a" * 64: self.original_name})
+        self.assertEqual(
+            stored.derivatives["a" * 64],
+            {
+                (self.size.id, "PNG"): {
+                    "image": self.thumbnail_name,
+                    "byte_size": 5,
+                    "width": 50,
+                    "height": 50,
+                }
+            },
+        )
+        self.assertEqual(stored.derivatives["b" * 64], {})
+
+    def test_find_stored_copies_ignores_other_accounts(self):
+        self.create_copy()
+        other_account = ClientAccount.objects.create(
+            user=User.objects.create_user(username="otheruser", password="pw"),
+            account_type=self.client_account.account_type,
+        )
+
+        stored = find_stored_copies(["a" * 64], other_account.id)
+
+        self.assertEqual(stored.originals, {})
+        self.assertEqual(stored.derivatives["a" * 64], {})
+
+    def test_lock_stored_copies(self):
+        image, _ = self.create_copy()
+
+        lock_stored_copies(
+            [self.original_name], [self.thumbnail_name], self.client_account.id
+        )
+
+        image.delete()
+        with self.assertRaises(StoredCopyReleased):
+            lock_stored_copies(
+                [self.original_name], [self.thumbnail_name], self.client_account.id
+            )
+
+    def test_shared_files_deleted_with_last_reference(self):
+        first, _ = self.create_copy()
+        second, _ = self.create_copy(title="Same Image")
+        original_path = default_storage.path(self.original_name)
+        thumbnail_path = default_storage.path(self.thumbnail_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+
+        self.assertTrue(os.path.exists(original_path))
+        self.assertTrue(os.path.exists(thumbnail_path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+
+        self.assertFalse(os.path.exists(original_path))
+        self.assertFalse(os.path.exists(thumbnail_path))
+
+    def test_files_kept_until_commit(self):
+        image, _ = self.create_copy()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            image.delete()
+
+        self.assertTrue(os.path.exists(default_storage.path(self.original_name)))
+        self.assertEqual(len(callbacks), 2)
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+from django.test import TestCase, override_settings
+
+from ..derivative_cache import DerivativeCache, get_derivative_cache
+
+
+class DerivativeCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = DerivativeCache(self.directory, max_bytes=250)
+
+    def put(self, name, size=100):
+        key = self.cache.make_key(name, None, 200, "JPEG")
+        return key, self.cache.put(key, BytesIO(b"x" * size))
+
+    def test_make_key_depends_on_all_parts(self):
+        keys = {
+            self.cache.make_key("a.jpeg", None, 200, "JPEG"),
+            self.cache.make_key("b.jpeg", None, 200, "JPEG"),
+            self.cache.make_key("a.jpeg", 200, None, "JPEG"),
+            self.cache.make_key("a.jpeg", None, 200, "PNG"),
+            self.cache.make_key("a.jpeg", None, 200, "JPEG", "quality=50"),
+        }
+
+        self.assertEqual(len(keys), 5)
+
+    def test_get_missing_returns_none(self):
+        key = self.cache.make_key("a.jpeg", None, 200, "JPEG")
+
+        self.assertIsNone(self.cache.get(key))
+
+    def test_put_then_get(self):
+        key, path = self.put("a.jpeg")
+
+        self.assertEqual(self.cache.get(key), path)
+        with open(path, "rb") as cached_file:
+            self.assertEqual(cached_file.read(), b"x" * 100)
+
+    def test_evicts_least_recently_used(self):
+        first_key, first_path = self.put("a.jpeg")
+        second_key, second_path = self.put("b.jpeg")
+        os.utime(first_path, (1, 1))
+        os.utime(second_path, (2, 2))
+        self.cache.get(first_key)
+
+        third_key, _ = self.put("c.jpeg")
+
+        self.assertIsNotNone(self.cache.get(first_key))
+        self.assertIsNone(self.cache.get(second_key))
+        self.assertIsNotNone(self.cache.get(third_key))
+
+    def test_evicts_entries_written_by_other_workers(self):
+        other_worker = DerivativeCache(self.directory, max_bytes=250)
+        first_key = other_worker.make_key("a.jpeg", None, 200, "JPEG")
+        first_path = other_worker.put(first_key, BytesIO(b"x" * 100))
+        second_key = other_worker.make_key("b.jpeg", None, 200, "JPEG")
+        other_worker.put(second_key, BytesIO(b"x" * 100))
+        os.utime(first_path, (1, 1))
+
+        third_key, _ = self.put("c.jpeg")
+
+        self.assertIsNone(self.cache.get(first_key))
+        self.assertIsNotNone(self.cache.get(second_key))
+        self.assertIsNotNone(self.cache.get(third_key))
+
+    def test_scans_only_when_over_budget(self):
+        self.put("a.jpeg")
+
+        with mock.patch.object(
+            self.cache, "_entries", wraps=self.cache._entries
+        ) as entries:
+            self.put("b.jpeg")
+            self.assertEqual(entries.call_count, 0)
+            self.put("c.jpeg")
+            self.assertEqual(entries.call_count, 1)
+
+    def test_rescans_after_interval(self):
+        self.put("a.jpeg")
+        other_worker = DerivativeCache(self.directory, max_bytes=250)
+        first_key = other_worker.make_key("b.jpeg", None, 200, "JPEG")
+        first_path = other_worker.put(first_key, BytesIO(b"x" * 100))
+        os.utime(first_path, (1, 1))
+        self.cache._scanned_at -= self.cache.rescan_seconds + 1
+
+        self.put("c.jpeg")
+
+        self.assertIsNone(self.cache.get(first_key))
+
+    def test_never_evicts_entry_just_written(self):
+        key, _ = self.put("a.jpeg", size=400)
+
+        self.assertIsNotNone(self.cache.get(key))
+
+    def test_get_derivative_cache_follows_settings(self):
+        with override_settings(
+            THUMBNAIL_CACHE_DIR=self.directory, THUMBNAIL_CACHE_MAX_BYTES=10
+        ):
+            cache = get_derivative_cache()
+
+        self.assertEqual(cache.directory, self.directory)
+        self.assertEqual(cache.max_bytes, 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..file_serving import serve_file
+from ..http_caching import serve_media
+from ..storage import ShardedFileSystemStorage
+
+
+class ServeFileTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "image.jpeg")
+        with open(self.path, "wb") as file:
+            file.write(bytes(range(100)))
+        self.factory = RequestFactory()
+
+    def serve(self, **headers):
+        response = serve_file(self.factory.get("/", **headers), self.path)
+        self.addCleanup(response.close)
+        return response
+
+    def test_full_file(self):
+        response = self.serve()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(100)))
+
+    def test_if_none_match_not_modified(self):
+        etag = self.serve()["ETag"]
+
+        response = self.serve(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_not_modified(self):
+        last_modified = self.serve()["Last-Modified"]
+
+        response = self.serve(HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_range(self):
+        response = self.serve(HTTP_RANGE="bytes=10-19")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(10, 20)))
+
+    def test_open_and_suffix_ranges(self):
+        open_range = self.serve(HTTP_RANGE="bytes=90-")
+        suffix_range = self.serve(HTTP_RANGE="bytes=-5")
+
+        self.assertEqual(open_range["Content-Range"], "bytes 90-99/100")
+        self.assertEqual(suffix_range["Content-Range"], "bytes 95-99/100")
+        self.assertEqual(
+            b"".join(suffix_range.streaming_content), bytes(range(95, 100))
+        )
+
+    def test_range_not_satisfiable(self):
+        response = self.serve(HTTP_RANGE="bytes=100-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_range_ignored_when_if_range_stale(self):
+        response = self.serve(HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "100")
+
+    def test_missing_file(self):
+        os.remove(self.path)
+
+        with self.assertRaises(Http404):
+            self.serve()
+
+    def test_x_accel_redirect(self):
+        locations = {self.directory: "/protected/media/"}
+        with override_settings(
+            FILE_SERVE_BACKEND="x-accel-redirect", FILE_SERVE_ACCEL_LOCATIONS=locations
+        ):
+            response = self.serve()
+
+        self.assertEqual(response["X-Accel-Redirect"], "/protected/media/image.jpeg")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response.content, b"")
+
+    def test_x_accel_redirect_outside_locations_streams(self):
+        with override_settings(
+            FILE_SERVE_BACKEND="x-accel-redirect", FILE_SERVE_ACCEL_LOCATIONS={}
+        ):
+            response = self.serve()
+
+        self.assertNotIn("X-Accel-Redirect", response)
+        self.assertEqual(response["Content-Length"], "100")
+
+    @override_settings(FILE_SERVE_BACKEND="x-sendfile")
+    def test_x_sendfile(self):
+        response = self.serve()
+
+        self.assertEqual(response["X-Sendfile"], self.path)
+        self.assertEqual(response.content, b"")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class ServeMediaTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, "image.jpeg"), "wb") as file:
+            file.write(b"image")
+        self.request = RequestFactory().get("/")
+
+    def test_media_cached_as_immutable(self):
+        response = serve_media(self.request, "image.jpeg", self.directory)
+        response.close()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+
+    def test_flat_media_name_served_from_shard(self):
+        storage = ShardedFileSystemStorage(location=self.directory)
+        sharded_path = storage.path(storage.shard_name("moved.jpeg"))
+        os.makedirs(os.path.dirname(sharded_path))
+        with open(sharded_path, "wb") as file:
+            file.write(b"moved")
+
+        response = serve_media(self.request, "moved.jpeg", self.directory)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"moved")
+
+    def test_media_path_outside_root_rejected(self):
+        with self.assertRaises(SuspiciousFileOperation):
+            serve_media(self.request, "../image.jpeg", self.directory)
+
+    def test_media_directory_not_served(self):
+        with self.assertRaises(Http404):
+            serve_media(self.request, "", self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
@@ -0,0 +1,132 @@
+import io
+import os
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import use_temporary_media_root
+from ..garbage_collection import delete_orphan_files, purge_expired_links
+from ..models import (
+    AccountTier,
+    ClientAccount,
+    ExpiringLinks,
+    ImageDerivative,
+    ThumbnailDimensions,
+    UploadedImage,
+)
+
+
+class GarbageCollectionTests(TestCase):
+    def setUp(self):
+        self.media_root = use_temporary_media_root(self)
+
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        account_tier = AccountTier.objects.create(name="Test Tier")
+        client_account = ClientAccount.objects.create(
+            user=user, account_type=account_tier
+        )
+        self.image = UploadedImage.objects.create(
+            title="Test Image",
+            author=client_account,
+            upload_image=SimpleUploadedFile("original.jpg", b"original"),
+        )
+        self.derivative = ImageDerivative.objects.create(
+            original=self.image,
+            size=ThumbnailDimensions.objects.create(height=50),
+            format="JPEG",
+            image=SimpleUploadedFile("thumbnail.jpg", b"thumbnail"),
+        )
+
+    def create_link(self, token, seconds_ago, time_to_expire=300):
+        return ExpiringLinks.objects.create(
+            add_time=timezone.now() - timezone.timedelta(seconds=seconds_ago),
+            image_id=self.image,
+            time_to_expire=time_to_expire,
+            expiring_link=token,
+        )
+
+    def create_orphan(self, name, content=b"orphan", age=7200):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as orphan:
+            orphan.write(content)
+        modified = timezone.now().timestamp() - age
+        os.utime(path, (modified, modified))
+        return path
+
+    def test_purge_expired_links_in_batches(self):
+        for index in range(5):
+            self.create_link(f"expired-{index}", seconds_ago=600)
+        self.create_link("active", seconds_ago=0)
+
+        with self.assertNumQueries(3 * 3 + 1):
+            deleted = purge_expired_links(batch_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(
+            list(ExpiringLinks.objects.values_list("expiring_link", flat=True)),
+            ["active"],
+        )
+
+    def test_purge_expired_links_dry_run(self):
+        self.create_link("expired", seconds_ago=600)
+
+        self.assertEqual(purge_expired_links(batch_size=10, dry_run=True), 1)
+        self.assertEqual(ExpiringLinks.objects.count(), 1)
+
+    def test_delete_orphan_files(self):
+        orphan = self.create_orphan("deleted_image.jpg", b"12345")
+        nested_orphan = self.create_orphan("ab/cd/deleted_thumbnail.jpg", b"123")
+        recent = self.create_orphan("uploading.jpg", age=0)
+
+        files, reclaimed_bytes = delete_orphan_files(min_age=3600)
+
+        self.assertEqual((files, reclaimed_bytes), (2, 8))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(nested_orphan))
+        self.assertTrue(os.path.exists(recent))
+        self.assertTrue(os.path.exists(self.image.upload_image.path))
+        self.assertTrue(os.path.exists(self.derivative.image.path))
+
+    @override_settings(GC_FILE_BATCH_SIZE=2)
+    def test_delete_orphan_files_checks_names_in_batches(self):
+        for path in [self.image.upload_image.path, self.derivative.image.path]:
+            os.utime(path, (0, 0))
+        for index in range(3):
+            self.create_orphan(f"orphans/{index}.jpg", b"1")
+        self.create_orphan("uploading.jpg", age=0)
+
+        with self.assertNumQueries(6):
+            files, reclaimed_bytes = delete_orphan_files(min_age=3600)
+
+        self.assertEqual((files, reclaimed_bytes), (3, 3))
+        self.assertTrue(os.path.exists(self.image.upload_image.path))
+        self.assertTrue(os.path.exists(self.derivative.image.path))
+
+    def test_delete_orphan_files_after_image_delete(self):
+        path = self.image.upload_image.path
+        os.utime(path, (0, 0))
+        self.image.delete()
+
+        files, _ = delete_orphan_files(min_age=3600, dry_run=True)
+        self.assertEqual(files, 1)
+        self.assertTrue(os.path.exists(path))
+
+        files, reclaimed_bytes = delete_orphan_files(min_age=3600)
+        self.assertEqual((files, reclaimed_bytes), (1, len(b"original")))
+        self.assertFalse(os.path.exists(path))
+
+    def test_collect_garbage_command(self):
+        self.create_link("expired", seconds_ago=600)
+        self.create_orphan("deleted_image.jpg", b"12345")
+        output = io.StringIO()
+
+        call_command("collect_garbage", stdout=output)
+
+        self.assertIn(
+            "Deleted 1 expired link(s) and 1 orphaned file(s), 5 bytes.",
+            output.getvalue(),
+        )
+        self.assertFalse(ExpiringLinks.objects.exists())
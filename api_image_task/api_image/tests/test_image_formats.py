@@ -0,0 +1,67 @@
+from unittest import mock
+from django.test import TestCase
+
+from ..image_formats import (
+    accepted_media_types,
+    derivative_formats,
+    negotiate_format,
+    parse_formats,
+)
+from ..tiers import TierCapabilities
+
+
+def make_tier(thumbnail_formats, keep_source_format=True):
+    return TierCapabilities(
+        id=1,
+        name="Test Tier",
+        orginal_image_acces=False,
+        time_limited_link_acces=False,
+        image_sizes=(),
+        thumbnail_formats=tuple(thumbnail_formats),
+        keep_source_format=keep_source_format,
+    )
+
+
+class ImageFormatsTests(TestCase):
+    def test_parse_formats(self):
+        self.assertEqual(parse_formats(" webp, AVIF ,,"), ["WEBP", "AVIF"])
+        self.assertEqual(parse_formats(""), [])
+
+    def test_derivative_formats(self):
+        self.assertEqual(derivative_formats(make_tier([]), "PNG"), ["PNG"])
+        self.assertEqual(
+            derivative_formats(make_tier(["WEBP", "PNG"]), "PNG"), ["PNG", "WEBP"]
+        )
+        self.assertEqual(
+            derivative_formats(make_tier(["WEBP"], keep_source_format=False), "PNG"),
+            ["WEBP"],
+        )
+        self.assertEqual(
+            derivative_formats(make_tier([], keep_source_format=False), "PNG"),
+            ["PNG"],
+        )
+
+    def test_derivative_formats_skips_formats_pillow_cannot_encode(self):
+        with mock.patch(
+            "api_image.image_formats.can_encode",
+            side_effect=lambda format_name: format_name != "AVIF",
+        ):
+            formats = derivative_formats(make_tier(["AVIF", "WEBP"]), "JPEG")
+
+        self.assertEqual(formats, ["JPEG", "WEBP"])
+
+    def test_accepted_media_types(self):
+        accepted = accepted_media_types(
+            "image/avif;q=0, image/WEBP;q=0.8, image/*;q=0.5, */*;q=bad"
+        )
+
+        self.assertEqual(accepted, {"image/webp", "image/*"})
+
+    def test_negotiate_format(self):
+        formats = ["PNG", "WEBP", "AVIF"]
+
+        self.assertEqual(negotiate_format("image/avif,image/webp,*/*", formats), "WEBP")
+        self.assertEqual(negotiate_format("image/avif,*/*", formats), "AVIF")
+        self.assertEqual(negotiate_format("*/*", formats), "PNG")
+        self.assertEqual(negotiate_format("", formats), "PNG")
+        self.assertEqual(negotiate_format("", ["WEBP"]), "WEBP")
@@ -0,0 +1,77 @@
+import hashlib
+import io
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+
+from . import use_temporary_media_root
+from ..models import AccountTier, ClientAccount, UploadedImage
+
+
+class BackfillImageMetadataTests(TestCase):
+    def setUp(self):
+        use_temporary_media_root(self)
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        self.client_account = ClientAccount.objects.create(
+            user=user, account_type=AccountTier.objects.create(name="Test Tier")
+        )
+
+    def create_image(self, content, title="Old Image", **fields):
+        name = default_storage.save(
+            default_storage.generate_filename(f"{title}.png"), ContentFile(content)
+        )
+        return UploadedImage.objects.create(
+            title=title, author=self.client_account, upload_image=name, **fields
+        )
+
+    def create_png(self, size):
+        image_io = io.BytesIO()
+        Image.new("RGB", size, "red").save(image_io, format="PNG")
+        return image_io.getvalue()
+
+    def backfill(self):
+        output = io.StringIO()
+        call_command("backfill_image_metadata", batch_size=1, stdout=output)
+        return output.getvalue()
+
+    def test_backfill_image_metadata(self):
+        content = self.create_png((30, 20))
+        image = self.create_image(content)
+        hashed = self.create_image(
+            self.create_png((10, 10)), title="Hashed", content_hash="a" * 64
+        )
+
+        output = self.backfill()
+
+        image.refresh_from_db()
+        self.assertEqual((image.width, image.height, image.format), (30, 20, "PNG"))
+        self.assertEqual(image.byte_size, len(content))
+        self.assertEqual(image.content_hash, hashlib.sha256(content).hexdigest())
+        hashed.refresh_from_db()
+        self.assertEqual((hashed.width, hashed.content_hash), (10, "a" * 64))
+        self.assertIn("Updated 2 image(s), skipped 0", output)
+
+    def test_backfill_skips_missing_and_unreadable_files(self):
+        broken = self.create_image(b"not an image", title="Broken")
+        missing = self.create_image(self.create_png((10, 10)), title="Missing")
+        default_storage.delete(missing.upload_image.name)
+        complete = self.create_image(
+            self.create_png((10, 10)),
+            title="Complete",
+            width=1,
+            height=1,
+            format="PNG",
+            byte_size=1,
+            content_hash="b" * 64,
+        )
+
+        output = self.backfill()
+
+        self.assertIn("Updated 0 image(s), skipped 2", output)
+        broken.refresh_from_db()
+        self.assertIsNone(broken.byte_size)
+        complete.refresh_from_db()
+        self.assertEqual(complete.width, 1)
@@ -0,0 +1,226 @@
+import io
+from datetime import timedelta
+from unittest import mock
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from . import use_temporary_media_root
+from ..jobs import claim_next_job, enqueue_thumbnails, process_jobs, run_worker
+from ..utils import render_thumbnail_formats
+from ..models import (
+    AccountTier,
+    ClientAccount,
+    ImageDerivative,
+    ThumbnailDimensions,
+    ThumbnailJob,
+    UploadedImage,
+)
+
+
+class ThumbnailJobTests(TestCase):
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.thumbnail_dimensions = ThumbnailDimensions.objects.create(height=50)
+        self.account_tier = AccountTier.objects.create(
+            name="Test Tier", orginal_image_acces=False
+        )
+        self.account_tier.image_sizes.add(self.thumbnail_dimensions)
+        self.client_account = ClientAccount.objects.create(
+            user=self.user, account_type=self.account_tier
+        )
+        self.original = UploadedImage.objects.create(
+            title="test_image",
+            author=self.client_account,
+            upload_image=self.create_test_image(),
+            is_original=True,
+        )
+
+    def create_test_image(self):
+        image = Image.new("RGB", (200, 100))
+        image_io = io.BytesIO()
+        image.save(image_io, format="JPEG")
+        return SimpleUploadedFile("test_image.jpg", image_io.getvalue())
+
+    def enqueue(self):
+        return enqueue_thumbnails(
+            original=self.original,
+            image_sizes=[self.thumbnail_dimensions],
+            format_name="JPEG",
+        )
+
+    def test_enqueue_creates_placeholder_and_job(self):
+        file_links = self.enqueue()
+
+        self.assertEqual(len(file_links), 1)
+        self.assertEqual(file_links[0]["status"], ThumbnailJob.PENDING)
+        placeholder = ImageDerivative.objects.get(id=file_links[0]["id"])
+        self.assertEqual(placeholder.original, self.original)
+        self.assertEqual(placeholder.size, self.thumbnail_dimensions)
+        self.assertEqual(placeholder.thumbnail_job.status, ThumbnailJob.PENDING)
+        self.assertFalse(default_storage.exists(placeholder.image.name))
+
+    def test_claim_next_job_marks_processing(self):
+        self.enqueue()
+
+        job = claim_next_job()
+
+        self.assertEqual(job.status, ThumbnailJob.PROCESSING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(claim_next_job())
+
+    def test_process_job_writes_thumbnail(self):
+        file_links = self.enqueue()
+
+        (job,) = process_jobs(claim_next_job())
+
+        self.assertEqual(job.status, ThumbnailJob.DONE)
+        derivative = ImageDerivative.objects.get(id=file_links[0]["id"])
+        with default_storage.open(derivative.image.name) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (100, 50))
+        self.assertEqual((derivative.width, derivative.height), (100, 50))
+        self.assertEqual(derivative.byte_size, derivative.image.size)
+        self.original.refresh_from_db()
+        self.assertTrue(self.original.placeholder.startswith("data:image/"))
+
+    def test_process_job_retries_then_fails(self):
+        self.enqueue()
+        default_storage.delete(self.original.upload_image.name)
+
+        for _ in range(settings.THUMBNAIL_JOB_MAX_ATTEMPTS):
+            (job,) = process_jobs(claim_next_job())
+
+        self.assertEqual(job.status, ThumbnailJob.FAILED)
+        self.assertNotEqual(job.error, "")
+        self.assertIsNone(claim_next_job())
+
+    def test_process_job_of_deleted_image(self):
+        self.enqueue()
+        job = claim_next_job()
+        self.original.delete()
+
+        self.assertEqual(process_jobs(job)[0].status, ThumbnailJob.PROCESSING)
+        self.assertFalse(ThumbnailJob.objects.exists())
+
+    def expire_lease(self, job):
+        ThumbnailJob.objects.filter(pk=job.pk).update(
+            claimed_at=timezone.now()
+            - timedelta(seconds=settings.THUMBNAIL_JOB_LEASE_SECONDS + 1)
+        )
+
+    def test_claim_next_job_reclaims_crashed_job(self):
+        self.enqueue()
+        crashed = claim_next_job()
+        self.assertIsNone(claim_next_job())
+
+        self.expire_lease(crashed)
+        job = claim_next_job()
+
+        self.assertEqual(job.pk, crashed.pk)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(process_jobs(job)[0].status, ThumbnailJob.DONE)
+
+    def test_crashed_job_fails_after_max_attempts(self):
+        self.enqueue()
+
+        for _ in range(settings.THUMBNAIL_JOB_MAX_ATTEMPTS):
+            crashed = claim_next_job()
+            self.expire_lease(crashed)
+
+        self.assertIsNone(claim_next_job())
+        crashed.refresh_from_db()
+        self.assertEqual(crashed.status, ThumbnailJob.FAILED)
+        self.assertNotEqual(crashed.error, "")
+
+    def test_stale_worker_does_not_overwrite_reclaimed_job(self):
+        self.enqueue()
+        stale = claim_next_job()
+        self.expire_lease(stale)
+        claim_next_job()
+
+        process_jobs(stale)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, ThumbnailJob.PROCESSING)
+
+    def test_run_worker_burst_drains_queue(self):
+        enqueue_thumbnails(
+            original=self.original,
+            image_sizes=[
+                self.thumbnail_dimensions,
+                ThumbnailDimensions.objects.create(width=40),
+            ],
+            format_name="JPEG",
+        )
+
+        processed = run_worker(burst=True)
+
+        self.assertEqual(processed, 2)
+        self.assertFalse(
+            ThumbnailJob.objects.exclude(status=ThumbnailJob.DONE).exists()
+        )
+
+    def test_process_jobs_renders_original_once(self):
+        enqueue_thumbnails(
+            original=self.original,
+            image_sizes=[
+                self.thumbnail_dimensions,
+                ThumbnailDimensions.objects.create(width=40),
+            ],
+            format_name="JPEG",
+        )
+        enqueue_thumbnails(
+            original=self.original,
+            image_sizes=[self.thumbnail_dimensions],
+            format_name="PNG",
+        )
+
+        with mock.patch(
+            "api_image.jobs.render_thumbnail_formats",
+            wraps=render_thumbnail_formats,
+        ) as render:
+            jobs = process_jobs(claim_next_job())
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(len(jobs), 3)
+        self.assertFalse(
+            ThumbnailJob.objects.exclude(status=ThumbnailJob.DONE).exists()
+        )
+        sizes = {
+            (derivative.format, derivative.width, derivative.height)
+            for derivative in ImageDerivative.objects.all()
+        }
+        self.assertEqual(sizes, {("JPEG", 100, 50), ("JPEG", 40, 20), ("PNG", 100, 50)})
+
+    def test_process_thumbnails_command(self):
+        self.enqueue()
+        output = io.StringIO()
+
+        call_command("process_thumbnails", "--burst", "--workers", "1", stdout=output)
+
+        self.assertIn("Processed 1 thumbnail job(s).", output.getvalue())
+
+    def test_process_thumbnails_command_stops_workers_on_error(self):
+        calls = []
+
+        def run_worker(burst, poll_interval, stop_event):
+            calls.append(stop_event)
+            if len(calls) == 1:
+                raise RuntimeError("worker crashed")
+            self.assertTrue(stop_event.wait(timeout=5))
+            return 0
+
+        with mock.patch(
+            "api_image.management.commands.process_thumbnails.run_worker",
+            side_effect=run_worker,
+        ):
+            with self.assertRaises(RuntimeError):
+                call_command("process_thumbnails", "--workers", "2")
@@ -0,0 +1,152 @@
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class GroupDerivativesMigrationTests(TransactionTestCase):
+    migrate_from = [("api_image", "0004_imagederivative")]
+    migrate_to = [("api_image", "0006_thumbnailjob_derivative")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        self.create_legacy_rows(old_apps)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        self.apps = executor.loader.project_state(self.migrate_to).apps
+
+    def create_legacy_rows(self, apps):
+        User = apps.get_model("auth", "User")
+        ThumbnailDimensions = apps.get_model("api_image", "ThumbnailDimensions")
+        AccountTier = apps.get_model("api_image", "AccountTier")
+        ClientAccount = apps.get_model("api_image", "ClientAccount")
+        UploadedImage = apps.get_model("api_image", "UploadedImage")
+        ExpiringLinks = apps.get_model("api_image", "ExpiringLinks")
+        ThumbnailJob = apps.get_model("api_image", "ThumbnailJob")
+
+        small = ThumbnailDimensions.objects.create(height=200)
+        large = ThumbnailDimensions.objects.create(height=400)
+        tier = AccountTier.objects.create(name="Premium", orginal_image_acces=True)
+        tier.image_sizes.add(small, large)
+        author = ClientAccount.objects.create(
+            user=User.objects.create(username="testuser"), account_type=tier
+        )
+
+        def create_row(name, title="Trip"):
+            return UploadedImage.objects.create(
+                title=title, author=author, upload_image=name
+            )
+
+        self.original_id = create_row("aaaaaaaaaa-Trip.jpeg").id
+        create_row("bbbbbbbbbb-Trip200.jpeg")
+        thumbnail = create_row("cccccccccc-Trip400.jpeg")
+        ExpiringLinks.objects.create(
+            image_id=thumbnail, time_to_expire=300, expiring_link="link"
+        )
+        self.lone_thumbnail_id = create_row("dddddddddd-Other200.jpeg", "Other").id
+
+        placeholder = create_row("eeeeeeeeee-Queued200.png", "Queued")
+        ThumbnailJob.objects.create(
+            image=placeholder, size=small, source="ffffffffff-Queued.png"
+        )
+
+    def test_thumbnails_grouped_under_original(self):
+        UploadedImage = self.apps.get_model("api_image", "UploadedImage")
+        ImageDerivative = self.apps.get_model("api_image", "ImageDerivative")
+
+        original = UploadedImage.objects.get(id=self.original_id)
+        derivatives = ImageDerivative.objects.filter(original=original)
+
+        self.assertTrue(original.is_original)
+        self.assertEqual(
+            sorted(derivatives.values_list("size__height", "format")),
+            [(200, "JPEG"), (400, "JPEG")],
+        )
+        self.assertFalse(
+            UploadedImage.objects.filter(upload_image__contains="-Trip2").exists()
+        )
+
+    def test_expiring_link_repointed_to_derivative(self):
+        ExpiringLinks = self.apps.get_model("api_image", "ExpiringLinks")
+
+        link = ExpiringLinks.objects.get(expiring_link="link")
+
+        self.assertEqual(link.image_id_id, self.original_id)
+        self.assertEqual(link.derivative.image.name, "cccccccccc-Trip400.jpeg")
+
+    def test_group_without_original_left_untouched(self):
+        UploadedImage = self.apps.get_model("api_image", "UploadedImage")
+
+        lone_thumbnail = UploadedImage.objects.get(id=self.lone_thumbnail_id)
+
+        self.assertFalse(lone_thumbnail.is_original)
+
+    def test_pending_job_moved_to_derivative_of_source(self):
+        ThumbnailJob = self.apps.get_model("api_image", "ThumbnailJob")
+
+        job = ThumbnailJob.objects.select_related("derivative__original").get()
+
+        self.assertEqual(job.derivative.image.name, "eeeeeeeeee-Queued200.png")
+        self.assertEqual(
+            job.derivative.original.upload_image.name, "ffffffffff-Queued.png"
+        )
+        self.assertTrue(job.derivative.original.is_original)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class FillExpiresAtMigrationTests(TransactionTestCase):
+    migrate_from = [("api_image", "0007_uploadedimage_author_time_idx")]
+    migrate_to = [("api_image", "0008_expiringlinks_expires_at")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        self.create_links(old_apps)
+
+        migration = import_module("api_image.migrations.0008_expiringlinks_expires_at")
+        executor = MigrationExecutor(connection)
+        with mock.patch.object(migration, "BATCH_SIZE", 2):
+            executor.migrate(self.migrate_to)
+        self.apps = executor.loader.project_state(self.migrate_to).apps
+
+    def create_links(self, apps):
+        User = apps.get_model("auth", "User")
+        AccountTier = apps.get_model("api_image", "AccountTier")
+        ClientAccount = apps.get_model("api_image", "ClientAccount")
+        UploadedImage = apps.get_model("api_image", "UploadedImage")
+        ExpiringLinks = apps.get_model("api_image", "ExpiringLinks")
+
+        author = ClientAccount.objects.create(
+            user=User.objects.create(username="testuser"),
+            account_type=AccountTier.objects.create(name="Basic"),
+        )
+        image = UploadedImage.objects.create(
+            title="Trip", author=author, upload_image="aaaaaaaaaa-Trip.jpeg"
+        )
+        for time_to_expire in (300, 600, 900):
+            ExpiringLinks.objects.create(
+                image_id=image,
+                time_to_expire=time_to_expire,
+                expiring_link=f"link-{time_to_expire}",
+            )
+
+    def test_expires_at_filled_in_batches(self):
+        ExpiringLinks = self.apps.get_model("api_image", "ExpiringLinks")
+
+        for link in ExpiringLinks.objects.all():
+            self.assertEqual(
+                link.expires_at, link.add_time + timedelta(seconds=link.time_to_expire)
+            )
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
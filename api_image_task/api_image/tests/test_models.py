@@ -1,6 +1,6 @@
-import os
 from django.test import TestCase
 from django.contrib.auth.models import User
+from . import use_temporary_media_root
 from ..models import (
     ThumbnailDimensions,
     AccountTier,
@@ -52,12 +52,25 @@ class ThumbnailDimensionsTestCase(TestCase):
         thumbnail = ThumbnailDimensions(height=300, width=400)
         self.assertEqual(str(thumbnail), "300h x 400w")
 
+    def test_valid_str_representation_fit(self):
+        thumbnail = ThumbnailDimensions(height=300, width=400, fit="cover")
+        self.assertEqual(str(thumbnail), "300h x 400w cover")
+
     def test_valid_thumbnail_dimensions(self):
         thumbnail = ThumbnailDimensions(height=100, width=200)
         thumbnail.full_clean()
         self.assertEqual(thumbnail.height, 100)
         self.assertEqual(thumbnail.width, 200)
 
+    def test_invalid_encoder_options(self):
+        for options in [{"quality": 0}, {"png_compress_level": 10}, {"png_colors": 1}]:
+            with self.subTest(**options), self.assertRaises(ValidationError):
+                ThumbnailDimensions(height=100, **options).full_clean()
+
+    def test_invalid_pad_color(self):
+        with self.assertRaises(ValidationError):
+            ThumbnailDimensions(height=100, pad_color="not-a-color").full_clean()
+
 
 class AccountTierTestCase(TestCase):
     def setUp(self):
@@ -94,9 +107,21 @@ class AccountTierTestCase(TestCase):
             account_tier.save()
             account_tier.full_clean()
 
+    def test_unknown_thumbnail_format(self):
+        account_tier = AccountTier.objects.create(
+            name="Modern", thumbnail_formats="WEBP, GIF"
+        )
+        account_tier.image_sizes.add(self.thumbnail_dim1)
+
+        with self.assertRaisesMessage(
+            ValidationError, "Unsupported thumbnail formats: GIF."
+        ):
+            account_tier.full_clean()
+
 
 class ClientAccountTestCase(TestCase):
     def setUp(self):
+        use_temporary_media_root(self)
         self.user = User.objects.create_user(username="testuser", password="testpass")
         self.thumbnail_dim = ThumbnailDimensions.objects.create(height=100, width=None)
 
@@ -124,14 +149,10 @@ class ClientAccountTestCase(TestCase):
 
         self.assertEqual(str(client_account), expected_str)
 
-    def tearDown(self):
-        for uploaded_image in UploadedImage.objects.all():
-            if os.path.isfile(uploaded_image.upload_image.path):
-                os.remove(uploaded_image.upload_image.path)
-
 
 class UploadedImageTestCase(TestCase):
     def setUp(self):
+        use_temporary_media_root(self)
         self.user = User.objects.create_user(username="testuser", password="testpass")
 
         self.thumbnail_dim = ThumbnailDimensions.objects.create(height=100, width=None)
@@ -179,14 +200,10 @@ class UploadedImageTestCase(TestCase):
 
         self.assertEqual(str(uploaded_image), expected_str)
 
-    def tearDown(self):
-        for uploaded_image in UploadedImage.objects.all():
-            if os.path.isfile(uploaded_image.upload_image.path):
-                os.remove(uploaded_image.upload_image.path)
-
 
 class ExpiringLinksTestCase(TestCase):
     def setUp(self):
+        use_temporary_media_root(self)
         self.client_account = ClientAccount.objects.create(
             user=User.objects.create(username="testuser"),
             account_type=AccountTier.objects.create(
@@ -225,7 +242,15 @@ class ExpiringLinksTestCase(TestCase):
         self.assertEqual(retrieved_expiring_link.time_to_expire, 3600)
         self.assertEqual(retrieved_expiring_link.expiring_link, "randomlink123")
 
-    def tearDown(self):
-        for uploaded_image in UploadedImage.objects.all():
-            if os.path.isfile(uploaded_image.upload_image.path):
-                os.remove(uploaded_image.upload_image.path)
+    def test_expires_at_set_on_save(self):
+        expiring_link = ExpiringLinks.objects.create(
+            image_id=self.uploaded_image,
+            time_to_expire=3600,
+            expiring_link="randomlink123",
+        )
+
+        self.assertAlmostEqual(
+            (expiring_link.expires_at - expiring_link.add_time).total_seconds(),
+            3600,
+            delta=1,
+        )
@@ -0,0 +1,68 @@
+import base64
+import io
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from . import use_temporary_media_root
+from ..placeholders import make_placeholder, placeholder_from_thumbnails
+
+
+def decode_placeholder(placeholder):
+    header, encoded = placeholder.split(",", 1)
+    return header, Image.open(io.BytesIO(base64.b64decode(encoded)))
+
+
+class PlaceholderTests(TestCase):
+    def setUp(self):
+        use_temporary_media_root(self)
+
+    def save_image(self, size, color):
+        image_io = io.BytesIO()
+        Image.new("RGB", size, color).save(image_io, format="PNG")
+        return default_storage.save(
+            default_storage.generate_filename("thumbnail.png"),
+            ContentFile(image_io.getvalue()),
+        )
+
+    def test_make_placeholder(self):
+        placeholder = make_placeholder(Image.new("RGBA", (400, 300), "red"))
+        header, image = decode_placeholder(placeholder)
+
+        self.assertEqual(header, "data:image/webp;base64")
+        self.assertEqual(image.size, (16, 12))
+        self.assertLess(len(placeholder), 300)
+
+    @override_settings(PLACEHOLDER_SIZE=8)
+    def test_make_placeholder_keeps_aspect_ratio(self):
+        _, image = decode_placeholder(make_placeholder(Image.new("L", (20, 400))))
+
+        self.assertEqual(image.size, (1, 8))
+
+    def test_placeholder_from_smallest_thumbnail(self):
+        stored_thumbnails = {
+            (1, "PNG"): {
+                "image": self.save_image((40, 40), "blue"),
+                "width": 40,
+                "height": 40,
+            },
+            (2, "PNG"): {
+                "image": self.save_image((20, 20), "red"),
+                "width": 20,
+                "height": 20,
+            },
+        }
+
+        _, image = decode_placeholder(placeholder_from_thumbnails(stored_thumbnails))
+
+        red, green, blue = image.convert("RGB").getpixel((8, 8))
+        self.assertGreater(red, blue)
+
+    def test_placeholder_from_missing_thumbnail(self):
+        stored_thumbnails = {
+            (1, "PNG"): {"image": "missing.png", "width": 20, "height": 20}
+        }
+
+        self.assertEqual(placeholder_from_thumbnails(stored_thumbnails), "")
+        self.assertEqual(placeholder_from_thumbnails({}), "")
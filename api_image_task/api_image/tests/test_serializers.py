@@ -1,5 +1,7 @@
 import os
 import tempfile
+from io import BytesIO
+from unittest import mock
 from PIL import Image as pilimage
 
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -38,6 +40,29 @@ class UploadedImageSerializerTests(TestCase):
         serializer = UploadedImageSerializer(data=data)
         self.assertTrue(serializer.is_valid())
 
+    def test_validate_upload_image_parses_header_only(self):
+        exif = pilimage.Exif()
+        exif[0x0112] = 6
+        image_io = BytesIO()
+        pilimage.new("RGB", (120, 80)).save(image_io, format="JPEG", exif=exif)
+        data = {
+            "title": "Test Image",
+            "upload_image": SimpleUploadedFile("exif_image.jpeg", image_io.getvalue()),
+        }
+
+        serializer = UploadedImageSerializer(data=data)
+        with mock.patch(
+            "PIL.Image._getdecoder", wraps=pilimage._getdecoder
+        ) as getdecoder:
+            self.assertTrue(serializer.is_valid())
+
+        getdecoder.assert_not_called()
+        parsed_image = serializer.validated_data["parsed_image"]
+        self.assertEqual(parsed_image.format, "JPEG")
+        self.assertEqual(parsed_image.size, (120, 80))
+        self.assertEqual(parsed_image.mode, "RGB")
+        self.assertEqual(parsed_image.orientation, 6)
+
     def test_validate_upload_image_invalid_format(self):
         invalid_image_path = tempfile.NamedTemporaryFile(
             suffix=".gif", delete=False
@@ -109,6 +134,11 @@ class RetriveListImageSerializerTests(TestCase):
             title="Test Image",
             author=self.client_account,
             upload_image="test_image.jpg",
+            width=640,
+            height=480,
+            format="JPEG",
+            byte_size=1234,
+            placeholder="data:image/webp;base64,AAAA",
         )
 
     def test_serialize_image(self):
@@ -117,6 +147,12 @@ class RetriveListImageSerializerTests(TestCase):
             "id": self.image.id,
             "title": "Test Image",
             "upload_image": self.image.upload_image.url,
+            "width": 640,
+            "height": 480,
+            "format": "JPEG",
+            "byte_size": 1234,
+            "placeholder": "data:image/webp;base64,AAAA",
+            "derivatives": [],
         }
         self.assertEqual(serializer.data, expected_data)
 
@@ -152,25 +188,44 @@ class AddRetriveExpiringLinksSerializerTests(TestCase):
             upload_image="test_image.jpg",
         )
 
+    def make_serializer(self, data):
+        return AddRetriveExpiringLinksSerializer(
+            data=data, context={"client_id": self.client_account.id}
+        )
+
     def test_invalid_time_to_expire_lower_limit(self):
         data = {"image_id": self.uploaded_image.id, "time_to_expire": 299}
-        serializer = AddRetriveExpiringLinksSerializer(data=data)
+        serializer = self.make_serializer(data)
 
         with self.assertRaises(ValidationError):
             serializer.is_valid(raise_exception=True)
 
     def test_invalid_time_to_expire_upper_limit(self):
         data = {"image_id": self.uploaded_image.id, "time_to_expire": 30001}
-        serializer = AddRetriveExpiringLinksSerializer(data=data)
+        serializer = self.make_serializer(data)
 
         with self.assertRaises(ValidationError):
             serializer.is_valid(raise_exception=True)
 
     def test_valid_time_to_expire(self):
         data = {"image_id": self.uploaded_image.id, "time_to_expire": 1000}
-        serializer = AddRetriveExpiringLinksSerializer(data=data)
+        serializer = self.make_serializer(data)
         self.assertTrue(serializer.is_valid())
 
+    def test_image_of_another_account(self):
+        other_account = ClientAccount.objects.create(
+            user=User.objects.create_user("otheruser"),
+            account_type=self.account_tier,
+        )
+        other_image = UploadedImage.objects.create(
+            title="Other Image", author=other_account, upload_image="other.jpg"
+        )
+        data = {"image_id": other_image.id, "time_to_expire": 1000}
+        serializer = self.make_serializer(data)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("image_id", serializer.errors)
+
     def tearDown(self):
         for uploaded_image in UploadedImage.objects.all():
             if os.path.isfile(uploaded_image.upload_image.path):
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import os
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from . import use_temporary_media_root
+from ..expiring_links import (
+    link_cache_key,
+    resolve_expiring_link,
+    resolve_signed_link,
+    sign_expiring_link,
+)
+from ..http_caching import images_etag
+from ..models import (
+    AccountTier,
+    ClientAccount,
+    ExpiringLinks,
+    ImageDerivative,
+    ThumbnailDimensions,
+    UploadedImage,
+)
+from ..storage import ShardedFileSystemStorage, relocate_files
+
+
+class ShardedFileSystemStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = use_temporary_media_root(self)
+        self.storage = ShardedFileSystemStorage()
+
+    def test_generate_filename_adds_hashed_prefix(self):
+        digest = hashlib.sha1(b"abc-image.jpeg").hexdigest()
+
+        name = self.storage.generate_filename("abc-image.jpeg")
+
+        self.assertEqual(name, f"{digest[:2]}/{digest[2:4]}/abc-image.jpeg")
+
+    def test_generate_filename_keeps_directories(self):
+        self.assertEqual(
+            self.storage.generate_filename("ab/cd/image.jpeg"), "ab/cd/image.jpeg"
+        )
+
+    @override_settings(MEDIA_SHARD_DEPTH=0)
+    def test_generate_filename_flat_layout(self):
+        self.assertEqual(self.storage.generate_filename("image.jpeg"), "image.jpeg")
+
+    def test_save_creates_shard_directories(self):
+        name = self.storage.save(
+            self.storage.generate_filename("image.jpeg"), ContentFile(b"image")
+        )
+
+        self.assertEqual(name.count("/"), 2)
+        self.assertTrue(os.path.isfile(os.path.join(self.media_root, name)))
+
+    def test_default_storage_is_sharded(self):
+        self.assertIsInstance(default_storage._wrapped, ShardedFileSystemStorage)
+
+
+class RelocateFilesTests(TestCase):
+    def setUp(self):
+        self.media_root = use_temporary_media_root(self)
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        self.client_account = ClientAccount.objects.create(
+            user=user, account_type=AccountTier.objects.create(name="Test Tier")
+        )
+        self.size = ThumbnailDimensions.objects.create(height=50)
+
+    def create_flat_image(self, name, content=b"image", write=True):
+        if write:
+            with open(os.path.join(self.media_root, name), "wb") as file:
+                file.write(content)
+        return UploadedImage.objects.create(
+            title="Test Image", author=self.client_account, upload_image=name
+        )
+
+    def test_relocate_files(self):
+        images = [self.create_flat_image(f"image-{index}.jpeg") for index in range(5)]
+        shared = self.create_flat_image("image-0.jpeg", write=False)
+        missing = self.create_flat_image("missing.jpeg", write=False)
+        sharded = UploadedImage.objects.create(
+            title="Test Image",
+            author=self.client_account,
+            upload_image=SimpleUploadedFile("sharded.jpeg", b"image"),
+        )
+        sharded_name = sharded.upload_image.name
+
+        relocated, skipped = relocate_files(UploadedImage, "upload_image", batch_size=2)
+
+        self.assertEqual((relocated, skipped), (6, 1))
+        for image in images + [shared]:
+            image.refresh_from_db()
+            self.assertEqual(
+                image.upload_image.name,
+                default_storage.generate_filename(
+                    os.path.basename(image.upload_image.name)
+                ),
+            )
+            with image.upload_image.open("rb") as file:
+                self.assertEqual(file.read(), b"image")
+        self.assertFalse(
+            [entry for entry in os.listdir(self.media_root) if entry.endswith(".jpeg")]
+        )
+        missing.refresh_from_db()
+        self.assertEqual(missing.upload_image.name, "missing.jpeg")
+        sharded.refresh_from_db()
+        self.assertEqual(sharded.upload_image.name, sharded_name)
+
+    def test_shard_media_command(self):
+        image = self.create_flat_image("image.jpeg")
+        with open(os.path.join(self.media_root, "thumbnail.jpeg"), "wb") as file:
+            file.write(b"thumbnail")
+        derivative = ImageDerivative.objects.create(
+            original=image, size=self.size, format="JPEG", image="thumbnail.jpeg"
+        )
+        output = io.StringIO()
+
+        call_command("shard_media", stdout=output)
+
+        self.assertIn("uploaded images: relocated 1 file(s)", output.getvalue())
+        self.assertIn("image derivatives: relocated 1 file(s)", output.getvalue())
+        derivative.refresh_from_db()
+        self.assertTrue(os.path.isfile(derivative.image.path))
+        self.assertIn("/", derivative.image.name)
+
+    def test_signed_link_survives_relocation(self):
+        image = self.create_flat_image("image.jpeg")
+        token = sign_expiring_link(image.id, "image.jpeg", 300)
+
+        call_command("shard_media", stdout=io.StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(resolve_signed_link(token).path, image.upload_image.path)
+        self.assertTrue(os.path.isfile(resolve_signed_link(token).path))
+
+    def test_shard_media_forgets_cached_links(self):
+        cache.clear()
+        image = self.create_flat_image("image.jpeg")
+        ExpiringLinks.objects.create(
+            image_id=image, time_to_expire=300, expiring_link="token"
+        )
+        old_path = resolve_expiring_link("token").path
+
+        call_command("shard_media", stdout=io.StringIO())
+
+        self.assertIsNone(cache.get(link_cache_key("token")))
+        image.refresh_from_db()
+        self.assertNotEqual(image.upload_image.path, old_path)
+        self.assertEqual(resolve_expiring_link("token").path, image.upload_image.path)
+
+    def test_stale_cached_link_falls_back_to_database(self):
+        cache.clear()
+        image = self.create_flat_image("image.jpeg")
+        ExpiringLinks.objects.create(
+            image_id=image, time_to_expire=300, expiring_link="token"
+        )
+        resolve_expiring_link("token")
+
+        relocate_files(UploadedImage, "upload_image", batch_size=10)
+
+        image.refresh_from_db()
+        self.assertEqual(resolve_expiring_link("token").path, image.upload_image.path)
+
+    def test_relocation_changes_images_etag(self):
+        self.create_flat_image("image.jpeg")
+        images = UploadedImage.objects.all()
+        etag = images_etag(images)
+
+        call_command("shard_media", stdout=io.StringIO())
+
+        self.assertNotEqual(images_etag(images), etag)
+
+    @override_settings(MEDIA_SHARD_DEPTH=0)
+    def test_shard_media_command_flat_layout(self):
+        with self.assertRaises(CommandError):
+            call_command("shard_media", stdout=io.StringIO())
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..models import AccountTier, ClientAccount, ThumbnailDimensions
+from ..tiers import get_client_tier
+
+
+class ClientTierTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.small = ThumbnailDimensions.objects.create(height=200)
+        self.tier = AccountTier.objects.create(
+            name="Basic", orginal_image_acces=False, time_limited_link_acces=True
+        )
+        self.tier.image_sizes.add(self.small)
+        self.user = User.objects.create_user(username="testuser")
+        self.client_account = ClientAccount.objects.create(
+            user=self.user, account_type=self.tier
+        )
+
+    def test_snapshot(self):
+        client_tier = get_client_tier(self.user)
+
+        self.assertEqual(client_tier.client_id, self.client_account.id)
+        self.assertEqual(client_tier.tier.name, "Basic")
+        self.assertFalse(client_tier.tier.orginal_image_acces)
+        self.assertTrue(client_tier.tier.time_limited_link_acces)
+        self.assertEqual(client_tier.tier.image_sizes, (self.small,))
+
+    def test_cold_lookup_prefetches_sizes(self):
+        with self.assertNumQueries(3):
+            get_client_tier(self.user)
+
+    def test_warm_lookup_costs_no_queries(self):
+        get_client_tier(self.user)
+
+        with self.assertNumQueries(0):
+            get_client_tier(self.user)
+
+    @override_settings(TIER_CACHE=None)
+    def test_lookup_without_cache(self):
+        get_client_tier(self.user)
+
+        with self.assertNumQueries(3):
+            get_client_tier(self.user)
+
+    def test_tier_change_invalidates(self):
+        get_client_tier(self.user)
+
+        self.tier.orginal_image_acces = True
+        self.tier.save()
+
+        self.assertTrue(get_client_tier(self.user).tier.orginal_image_acces)
+
+    def test_size_change_invalidates(self):
+        get_client_tier(self.user)
+
+        large = ThumbnailDimensions.objects.create(height=400)
+        self.tier.image_sizes.add(large)
+        self.assertEqual(len(get_client_tier(self.user).tier.image_sizes), 2)
+
+        self.small.height = 100
+        self.small.save()
+        heights = {size.height for size in get_client_tier(self.user).tier.image_sizes}
+        self.assertEqual(heights, {100, 400})
+
+    def test_client_account_change_invalidates(self):
+        get_client_tier(self.user)
+
+        premium = AccountTier.objects.create(name="Premium")
+        self.client_account.account_type = premium
+        self.client_account.save()
+
+        self.assertEqual(get_client_tier(self.user).tier.name, "Premium")
+
+    def test_missing_client_account(self):
+        user = User.objects.create_user(username="admin")
+
+        with self.assertRaises(ClientAccount.DoesNotExist):
+            get_client_tier(user)
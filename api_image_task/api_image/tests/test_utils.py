@@ -1,14 +1,36 @@
 import os
 import tempfile
+import threading
 from datetime import timedelta
 from io import BytesIO
-from PIL import Image as pilimage
+from unittest import mock, skipUnless
+from PIL import Image as pilimage, ImageChops, ImageDraw, ImageStat
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from ..models import ThumbnailDimensions
-from ..utils import calculate_seconds_left, change_image_size, create_random_name
+from ..utils import (
+    apply_jpeg_draft,
+    calculate_expected_size,
+    calculate_seconds_left,
+    cascade_resize,
+    change_image_size,
+    create_random_name,
+    encode_image,
+    encoder_options,
+    fit_image,
+    get_resize_pool,
+    numpy,
+    plan_cascade,
+    render_thumbnail,
+    render_thumbnail_formats,
+    render_thumbnails,
+    resize_image,
+    shutdown_resize_pool,
+    split_calls,
+    window_entropies,
+)
 
 
 class ChangeImageSizeTest(TestCase):
@@ -65,6 +87,376 @@ class ChangeImageSizeTest(TestCase):
                 os.remove(os.path.join(tempfile.gettempdir(), filename))
 
 
+class RenderThumbnailsTest(TestCase):
+    def setUp(self):
+        self.pillow_image = pilimage.linear_gradient("L").convert("RGB")
+        self.sizes = [
+            ThumbnailDimensions(height=200),
+            ThumbnailDimensions(height=64),
+            ThumbnailDimensions(width=32, height=48),
+        ]
+
+    def assert_matches_sequential(self):
+        expected = [
+            render_thumbnail(self.pillow_image, size, "PNG").getvalue()
+            for size in self.sizes
+        ]
+
+        thumbnails = render_thumbnails(self.pillow_image, self.sizes, "PNG")
+
+        self.assertEqual([thumbnail.getvalue() for thumbnail in thumbnails], expected)
+        self.assertEqual(pilimage.open(thumbnails[2]).size, (32, 48))
+
+    @override_settings(
+        THUMBNAIL_RESIZE_EXECUTOR="thread",
+        THUMBNAIL_RESIZE_WORKERS=2,
+        THUMBNAIL_CASCADE=False,
+    )
+    def test_render_thumbnails_thread_pool(self):
+        self.assert_matches_sequential()
+
+    @override_settings(
+        THUMBNAIL_RESIZE_EXECUTOR="process",
+        THUMBNAIL_RESIZE_WORKERS=2,
+        THUMBNAIL_CASCADE=False,
+    )
+    def test_render_thumbnails_process_pool(self):
+        self.assert_matches_sequential()
+
+    @override_settings(
+        THUMBNAIL_RESIZE_EXECUTOR="process",
+        THUMBNAIL_RESIZE_WORKERS=2,
+        THUMBNAIL_CASCADE=False,
+    )
+    def test_process_pool_submits_one_task_per_worker(self):
+        pool = get_resize_pool()
+        with mock.patch.object(pool, "submit", wraps=pool.submit) as submit:
+            self.assert_matches_sequential()
+
+        self.assertEqual(submit.call_count, 2)
+
+    def test_split_calls(self):
+        self.assertEqual(split_calls([1, 2, 3, 4, 5], 2), [[1, 2, 3], [4, 5]])
+        self.assertEqual(split_calls([1, 2], 4), [[1], [2]])
+
+    @override_settings(THUMBNAIL_RESIZE_EXECUTOR="thread", THUMBNAIL_RESIZE_WORKERS=2)
+    def test_get_resize_pool_creates_one_pool_under_concurrency(self):
+        barrier = threading.Barrier(8)
+        pools = []
+
+        def get_pool():
+            barrier.wait()
+            pools.append(get_resize_pool())
+
+        threads = [threading.Thread(target=get_pool) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(pool) for pool in pools}), 1)
+
+    @override_settings(THUMBNAIL_RESIZE_WORKERS=1, THUMBNAIL_CASCADE=False)
+    def test_render_thumbnails_single_worker(self):
+        self.assert_matches_sequential()
+
+    def test_render_thumbnails_no_sizes(self):
+        self.assertEqual(render_thumbnails(self.pillow_image, [], "PNG"), [])
+
+    def test_render_thumbnail_formats(self):
+        thumbnails = render_thumbnail_formats(
+            self.pillow_image, self.sizes, ["PNG", "WEBP"]
+        )
+
+        self.assertEqual(
+            [thumbnail.getvalue() for thumbnail in thumbnails["PNG"]],
+            [
+                thumbnail.getvalue()
+                for thumbnail in render_thumbnails(self.pillow_image, self.sizes, "PNG")
+            ],
+        )
+        for size, content in zip(self.sizes, thumbnails["WEBP"]):
+            thumbnail = pilimage.open(content)
+            self.assertEqual(thumbnail.format, "WEBP")
+            self.assertEqual(
+                thumbnail.size,
+                calculate_expected_size(
+                    self.pillow_image.size, size.height, size.width
+                ),
+            )
+
+    def tearDown(self):
+        shutdown_resize_pool()
+
+
+class CascadeResizeTest(TestCase):
+    def setUp(self):
+        self.pillow_image = pilimage.effect_mandelbrot(
+            (1600, 1200), (-2, -1.5, 1, 1.5), 100
+        ).convert("RGB")
+        self.target_sizes = [
+            calculate_expected_size(self.pillow_image.size, height=height)
+            for height in (100, 400, 200)
+        ]
+
+    def test_plan_cascade_uses_smallest_larger_intermediate(self):
+        plan = plan_cascade(self.target_sizes, min_scale=1.5)
+
+        self.assertEqual(plan, [(1, None), (2, 1), (0, 2)])
+
+    def test_plan_cascade_respects_min_scale(self):
+        plan = plan_cascade([(400, 300), (300, 225)], min_scale=1.5)
+
+        self.assertEqual(plan, [(0, None), (1, None)])
+
+    def test_cascade_resize_matches_direct_resize(self):
+        resized_images = cascade_resize(
+            self.pillow_image, self.target_sizes, min_scale=1.5
+        )
+
+        for expected_size, resized_image in zip(self.target_sizes, resized_images):
+            direct_image = resize_image(self.pillow_image, expected_size)
+            difference = ImageChops.difference(resized_image, direct_image)
+
+            self.assertEqual(resized_image.size, expected_size)
+            self.assertLess(max(ImageStat.Stat(difference).mean), 1.0)
+
+    @override_settings(THUMBNAIL_RESIZE_WORKERS=1)
+    def test_render_thumbnails_cascade_sizes(self):
+        sizes = [ThumbnailDimensions(height=200), ThumbnailDimensions(height=400)]
+
+        thumbnails = render_thumbnails(self.pillow_image, sizes, "PNG")
+
+        self.assertEqual(pilimage.open(thumbnails[0]).size, (266, 200))
+        self.assertEqual(pilimage.open(thumbnails[1]).size, (533, 400))
+
+
+class FitImageTest(TestCase):
+    def setUp(self):
+        self.pillow_image = pilimage.new("RGB", (400, 200), "gray")
+        draw = ImageDraw.Draw(self.pillow_image)
+        for x in range(300, 400, 4):
+            draw.line((x, 0, x, 200), fill="black", width=2)
+
+    def test_calculate_expected_size_contain(self):
+        self.assertEqual(
+            calculate_expected_size((400, 200), 100, 100, fit="contain"), (100, 50)
+        )
+        self.assertEqual(
+            calculate_expected_size((400, 200), 100, 100, fit="cover"), (100, 100)
+        )
+
+    def test_cover_center_crop(self):
+        size = ThumbnailDimensions(height=100, width=100, fit="cover")
+
+        resized = fit_image(self.pillow_image, (100, 100), size)
+
+        self.assertEqual(resized.size, (100, 100))
+        self.assertEqual(resized.getpixel((50, 50)), (128, 128, 128))
+
+    def test_cover_entropy_crop_picks_detailed_region(self):
+        size = ThumbnailDimensions(height=100, width=100, fit="cover", crop="entropy")
+
+        resized = fit_image(self.pillow_image, (100, 100), size)
+
+        self.assertEqual(resized.size, (100, 100))
+        self.assertGreater(resized.convert("L").entropy(), 0.5)
+
+    def test_pad_fills_with_color(self):
+        size = ThumbnailDimensions(
+            height=100, width=100, fit="pad", pad_color="#ff0000"
+        )
+
+        resized = fit_image(self.pillow_image, (100, 100), size)
+
+        self.assertEqual(resized.size, (100, 100))
+        self.assertEqual(resized.getpixel((0, 0)), (255, 0, 0))
+        self.assertEqual(resized.getpixel((10, 50)), (128, 128, 128))
+
+    @skipUnless(numpy, "numpy is not installed")
+    def test_window_entropies_fallback_matches_numpy(self):
+        sample = self.pillow_image.resize((128, 64)).convert("L")
+
+        vectorised = window_entropies(sample, 64, horizontal=True)
+        with mock.patch("api_image.utils.numpy", None):
+            fallback = window_entropies(sample, 64, horizontal=True)
+
+        self.assertEqual(len(vectorised), len(fallback))
+        for expected, actual in zip(fallback, vectorised):
+            self.assertAlmostEqual(expected, actual, places=6)
+
+    @override_settings(THUMBNAIL_RESIZE_WORKERS=1)
+    def test_render_thumbnails_mixes_fit_modes(self):
+        sizes = [
+            ThumbnailDimensions(height=100),
+            ThumbnailDimensions(height=50, width=50, fit="cover"),
+            ThumbnailDimensions(height=50, width=50, fit="pad"),
+            ThumbnailDimensions(height=50, width=50, fit="contain"),
+        ]
+
+        thumbnails = render_thumbnails(self.pillow_image, sizes, "PNG")
+
+        self.assertEqual(
+            [pilimage.open(thumbnail).size for thumbnail in thumbnails],
+            [(200, 100), (50, 50), (50, 50), (50, 25)],
+        )
+
+
+class JpegDraftTest(TestCase):
+    def open_image(self, format_name="JPEG", width=1600, height=1200):
+        image = pilimage.effect_mandelbrot(
+            (width, height), (-2, -1.5, 1, 1.5), 100
+        ).convert("RGB")
+        image_io = BytesIO()
+        image.save(image_io, format=format_name)
+        image_io.seek(0)
+        return pilimage.open(image_io)
+
+    def test_draft_scales_jpeg_decode(self):
+        pillow_image = self.open_image()
+
+        apply_jpeg_draft(pillow_image, [(266, 200)])
+
+        self.assertEqual(pillow_image.size, (400, 300))
+
+    def test_draft_skipped_when_target_above_half(self):
+        pillow_image = self.open_image()
+
+        apply_jpeg_draft(pillow_image, [(266, 200), (900, 675)])
+
+        self.assertEqual(pillow_image.size, (1600, 1200))
+
+    def test_draft_skipped_for_png(self):
+        pillow_image = self.open_image(format_name="PNG")
+
+        apply_jpeg_draft(pillow_image, [(266, 200)])
+
+        self.assertEqual(pillow_image.size, (1600, 1200))
+
+    @override_settings(THUMBNAIL_JPEG_DRAFT=False)
+    def test_draft_disabled_by_setting(self):
+        pillow_image = self.open_image()
+
+        apply_jpeg_draft(pillow_image, [(266, 200)])
+
+        self.assertEqual(pillow_image.size, (1600, 1200))
+
+    @override_settings(THUMBNAIL_RESIZE_WORKERS=1)
+    def test_render_thumbnails_with_draft_keeps_size_and_quality(self):
+        sizes = [ThumbnailDimensions(height=200), ThumbnailDimensions(height=400)]
+        pillow_image = self.open_image()
+        reference_image = self.open_image()
+        reference_image.load()
+
+        thumbnails = render_thumbnails(pillow_image, sizes, "JPEG")
+
+        self.assertEqual(pillow_image.size, (800, 600))
+        for size, content in zip(sizes, thumbnails):
+            thumbnail = pilimage.open(content).convert("RGB")
+            expected = change_image_size(reference_image, height=size.height)
+            difference = ImageChops.difference(thumbnail, expected)
+
+            self.assertEqual(thumbnail.size, expected.size)
+            self.assertLess(max(ImageStat.Stat(difference).mean), 3.0)
+
+
+class EncodeImageTest(TestCase):
+    def test_encode_image_returns_rewound_buffer(self):
+        buffer = encode_image(pilimage.new("RGB", (20, 10)), "PNG")
+
+        self.assertEqual(buffer.tell(), 0)
+        self.assertEqual(pilimage.open(buffer).size, (20, 10))
+
+    def create_photo(self):
+        photo = pilimage.effect_mandelbrot((200, 150), (-2, -1.5, 1, 1.5), 100)
+        return photo.convert("RGB")
+
+    def test_encoder_options(self):
+        size = ThumbnailDimensions(
+            height=50,
+            quality=60,
+            progressive=False,
+            optimize=True,
+            subsampling="4:4:4",
+            png_compress_level=9,
+        )
+
+        self.assertEqual(
+            encoder_options(size, "JPEG"),
+            {
+                "quality": 60,
+                "progressive": False,
+                "optimize": True,
+                "subsampling": "4:4:4",
+            },
+        )
+        self.assertEqual(
+            encoder_options(size, "PNG"), {"optimize": True, "compress_level": 9}
+        )
+        self.assertEqual(encoder_options(size, "WEBP"), {"quality": 60, "method": 6})
+        self.assertEqual(
+            encoder_options(ThumbnailDimensions(height=50), "JPEG"),
+            {"progressive": True},
+        )
+
+    def test_encode_image_applies_quality(self):
+        photo = self.create_photo()
+
+        low = encode_image(photo, "JPEG", ThumbnailDimensions(height=50, quality=20))
+        high = encode_image(photo, "JPEG", ThumbnailDimensions(height=50, quality=95))
+
+        self.assertLess(low.getbuffer().nbytes, high.getbuffer().nbytes)
+
+    def test_encode_png_quantizes_colors(self):
+        size = ThumbnailDimensions(height=50, png_colors=16)
+
+        thumbnail = pilimage.open(encode_image(self.create_photo(), "PNG", size))
+
+        self.assertEqual(thumbnail.mode, "P")
+        self.assertLessEqual(len(thumbnail.getcolors()), 16)
+
+    def test_encode_image_strips_metadata(self):
+        photo = self.create_photo()
+        exif = pilimage.Exif()
+        exif[0x010F] = "Camera"
+        photo.info["exif"] = exif.tobytes()
+        photo.info["icc_profile"] = b"profile"
+        keep = ThumbnailDimensions(height=50, strip_metadata=False)
+
+        for format_name in ["JPEG", "PNG", "WEBP"]:
+            with self.subTest(format_name=format_name):
+                stripped = pilimage.open(encode_image(photo, format_name))
+                kept = pilimage.open(encode_image(photo, format_name, keep))
+                stripped.load()
+                kept.load()
+
+                self.assertNotIn("exif", stripped.info)
+                self.assertNotIn("icc_profile", stripped.info)
+                self.assertEqual(kept.getexif()[0x010F], "Camera")
+                self.assertEqual(kept.info["icc_profile"], b"profile")
+
+    def test_encode_jpeg_is_progressive(self):
+        buffer = encode_image(pilimage.new("RGB", (20, 10)), "JPEG")
+
+        self.assertTrue(pilimage.open(buffer).info.get("progressive"))
+
+    def test_encode_jpeg_flattens_transparency_on_white(self):
+        buffer = encode_image(pilimage.new("RGBA", (20, 10), (0, 0, 0, 0)), "JPEG")
+        thumbnail = pilimage.open(buffer)
+
+        self.assertEqual(thumbnail.mode, "RGB")
+        self.assertGreater(min(thumbnail.getpixel((10, 5))), 250)
+
+    def test_encode_webp_keeps_palette_transparency(self):
+        palette_image = pilimage.new("P", (20, 10))
+        palette_image.info["transparency"] = 0
+
+        thumbnail = pilimage.open(encode_image(palette_image, "WEBP"))
+
+        self.assertEqual(thumbnail.format, "WEBP")
+        self.assertEqual(thumbnail.mode, "RGBA")
+
+
 class CrateRandomNameTest(TestCase):
     def assert_size_in_name(self, size_str, random_name):
         parts = random_name.split("-")
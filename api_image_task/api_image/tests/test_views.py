@@ -1,26 +1,43 @@
+import hashlib
 import io
 import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
 from PIL import Image
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from . import use_temporary_media_root
 from ..models import (
     ClientAccount,
     AccountTier,
     ThumbnailDimensions,
     UploadedImage,
     ExpiringLinks,
+    ImageDerivative,
+    ThumbnailJob,
 )
+from ..expiring_links import sign_expiring_link
 from ..serializers import RetriveListImageSerializer
+from ..tiers import get_client_tier
+from ..utils import (
+    render_thumbnail,
+    render_thumbnail_batch,
+    render_thumbnail_formats,
+)
 
 
 class AddImageViewTests(APITestCase):
     def setUp(self):
+        self.media_root = use_temporary_media_root(self)
         self.user = User.objects.create_user(
             username="testuser", password="testpassword"
         )
@@ -53,7 +70,18 @@ class AddImageViewTests(APITestCase):
         response = self.client.post(url, data, format="multipart")
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(UploadedImage.objects.count(), 2)
+        self.assertEqual(UploadedImage.objects.count(), 1)
+        original = UploadedImage.objects.get()
+        self.assertEqual(
+            (original.width, original.height, original.format), (100, 100, "JPEG")
+        )
+        self.assertEqual(original.byte_size, original.upload_image.size)
+        self.assertTrue(original.placeholder.startswith("data:image/webp;base64,"))
+        derivative = ImageDerivative.objects.get()
+        self.assertEqual(derivative.original.id, response.json()["urls"][0]["id"])
+        self.assertEqual(derivative.size, self.thumbnail_dimensions)
+        self.assertEqual((derivative.width, derivative.height), (100, 100))
+        self.assertEqual(derivative.byte_size, derivative.image.size)
 
         expected_data = {
             "title": "Test Image",
@@ -64,6 +92,7 @@ class AddImageViewTests(APITestCase):
                 },
                 {
                     "id": response.json()["urls"][1]["id"],
+                    "format": "JPEG",
                     "url": response.json()["urls"][1]["url"],
                 },
             ],
@@ -71,6 +100,75 @@ class AddImageViewTests(APITestCase):
 
         self.assertEqual(response.json(), expected_data)
 
+    def test_add_image_parses_and_decodes_once(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("add-image")
+        data = {
+            "title": "Test Image",
+            "upload_image": self.image,
+        }
+
+        with mock.patch("PIL.Image.open", wraps=Image.open) as image_open:
+            with mock.patch(
+                "PIL.Image._getdecoder", wraps=Image._getdecoder
+            ) as getdecoder:
+                response = self.client.post(url, data, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(image_open.call_count, 1)
+        self.assertEqual(getdecoder.call_count, 1)
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=100)
+    def test_add_image_too_large_rejected_while_streaming(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("add-image")
+        data = {
+            "title": "Test Image",
+            "upload_image": self.image,
+        }
+
+        response = self.client.post(url, data, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadedImage.objects.count(), 0)
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=99 * 100)
+    def test_add_image_too_many_pixels(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("add-image")
+        data = {
+            "title": "Test Image",
+            "upload_image": self.image,
+        }
+
+        with mock.patch("PIL.Image._getdecoder", wraps=Image._getdecoder) as getdecoder:
+            response = self.client.post(url, data, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["upload_image"], ["Image has too many pixels"])
+        getdecoder.assert_not_called()
+        self.assertEqual(UploadedImage.objects.count(), 0)
+
+    @override_settings(THUMBNAIL_ASYNC=True)
+    def test_add_image_async(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("add-image")
+        data = {
+            "title": "Test Image",
+            "upload_image": self.image,
+        }
+
+        response = self.client.post(url, data, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()["status"], ThumbnailJob.PENDING)
+        self.assertEqual(UploadedImage.objects.count(), 1)
+        thumbnail_link = response.json()["urls"][1]
+        self.assertEqual(thumbnail_link["status"], ThumbnailJob.PENDING)
+        job = ThumbnailJob.objects.get(derivative_id=thumbnail_link["id"])
+        self.assertEqual(job.derivative.size, self.thumbnail_dimensions)
+        self.assertEqual(job.derivative.original_id, response.json()["urls"][0]["id"])
+
     def test_add_image_unauthenticated(self):
         url = reverse("add-image")
         data = {
@@ -107,14 +205,593 @@ class AddImageViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(UploadedImage.objects.count(), 0)
 
+    def post_truncated_png(self):
+        self.client.force_authenticate(user=self.user)
+        image_io = io.BytesIO()
+        Image.effect_noise((200, 200), 64).convert("RGB").save(image_io, "PNG")
+        truncated = image_io.getvalue()[: len(image_io.getvalue()) // 2]
+        data = {
+            "title": "Truncated",
+            "upload_image": SimpleUploadedFile("truncated.png", truncated),
+        }
+        return self.client.post(reverse("add-image"), data, format="multipart")
+
+    def assert_nothing_stored(self):
+        self.assertEqual(UploadedImage.objects.count(), 0)
+        self.assertEqual(ImageDerivative.objects.count(), 0)
+        self.assertEqual(
+            [filenames for _, _, filenames in os.walk(self.media_root) if filenames],
+            [],
+        )
+
+    def test_add_image_truncated_file(self):
+        response = self.post_truncated_png()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(), {"upload_image": ["Image could not be decoded"]}
+        )
+        self.assert_nothing_stored()
+
+    @override_settings(THUMBNAIL_LAZY=True)
+    def test_add_image_truncated_file_lazy(self):
+        response = self.post_truncated_png()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assert_nothing_stored()
+
+    def test_add_image_duplicate_reuses_stored_files(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("add-image")
+        content = self.image.read()
+        self.client.post(
+            url,
+            {"title": "First", "upload_image": SimpleUploadedFile("a.jpg", content)},
+            format="multipart",
+        )
+        new_size = ThumbnailDimensions.objects.create(width=40)
+        self.account_tier.image_sizes.add(new_size)
+
+        with mock.patch(
+            "api_image.views.render_thumbnail_formats", wraps=render_thumbnail_formats
+        ) as render:
+            response = self.client.post(
+                url,
+                {
+                    "title": "Second",
+                    "upload_image": SimpleUploadedFile("b.jpg", content),
+                },
+                format="multipart",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(render.call_args.args[1:], ([new_size], ["JPEG"]))
+        first, second = UploadedImage.objects.order_by("id")
+        self.assertEqual(first.content_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual(second.content_hash, first.content_hash)
+        self.assertEqual(second.upload_image.name, first.upload_image.name)
+        self.assertEqual(
+            second.derivatives.get(size=self.thumbnail_dimensions).image.name,
+            first.derivatives.get().image.name,
+        )
+        stored_files = [
+            filename
+            for _, _, filenames in os.walk(settings.MEDIA_ROOT)
+            for filename in filenames
+        ]
+        self.assertEqual(len(stored_files), 3)
+
+    def test_add_image_duplicate_of_another_user_is_stored_separately(self):
+        content = self.image.read()
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            reverse("add-image"),
+            {
+                "title": "SecretMergerPlans",
+                "upload_image": SimpleUploadedFile("a.jpg", content),
+            },
+            format="multipart",
+        )
+        other_user = User.objects.create_user(username="otheruser", password="pw")
+        ClientAccount.objects.create(user=other_user, account_type=self.account_tier)
+        self.client.force_authenticate(user=other_user)
+
+        response = self.client.post(
+            reverse("add-image"),
+            {"title": "Mine", "upload_image": SimpleUploadedFile("b.jpg", content)},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("SecretMergerPlans", response.content.decode())
+        first, second = UploadedImage.objects.order_by("id")
+        self.assertNotEqual(second.upload_image.name, first.upload_image.name)
+
+    @override_settings(THUMBNAIL_ASYNC=True)
+    def test_add_image_async_duplicate(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("add-image")
+        content = self.image.read()
+        with self.settings(THUMBNAIL_ASYNC=False):
+            self.client.post(
+                url,
+                {
+                    "title": "First",
+                    "upload_image": SimpleUploadedFile("a.jpg", content),
+                },
+                format="multipart",
+            )
+
+        response = self.client.post(
+            url,
+            {"title": "Second", "upload_image": SimpleUploadedFile("b.jpg", content)},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()["urls"][1]["status"], ThumbnailJob.DONE)
+        self.assertFalse(ThumbnailJob.objects.exists())
+
+    def test_add_image_extra_formats(self):
+        self.account_tier.thumbnail_formats = "WEBP"
+        self.account_tier.save()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            reverse("add-image"),
+            {"title": "Test Image", "upload_image": self.image},
+            format="multipart",
+        )
+        urls = response.json()["urls"]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([url.get("format") for url in urls[1:3]], ["JPEG", "WEBP"])
+        self.assertIn("/thumbnail/", urls[3]["url"])
+        webp = ImageDerivative.objects.get(format="WEBP")
+        self.assertEqual(Image.open(webp.image.path).format, "WEBP")
+        self.assertEqual((webp.width, webp.height), (100, 100))
+        self.assertEqual(webp.byte_size, webp.image.size)
+
+    def test_add_image_replaces_source_format(self):
+        self.account_tier.thumbnail_formats = "WEBP"
+        self.account_tier.keep_source_format = False
+        self.account_tier.save()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            reverse("add-image"),
+            {"title": "Test Image", "upload_image": self.image},
+            format="multipart",
+        )
+
+        self.assertEqual(len(response.json()["urls"]), 2)
+        self.assertEqual(ImageDerivative.objects.get().format, "WEBP")
+        self.assertTrue(ImageDerivative.objects.get().image.name.endswith(".webp"))
+
+    @override_settings(THUMBNAIL_ASYNC=True)
+    def test_add_image_async_extra_formats(self):
+        self.account_tier.thumbnail_formats = "WEBP"
+        self.account_tier.save()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            reverse("add-image"),
+            {"title": "Test Image", "upload_image": self.image},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(
+            sorted(ThumbnailJob.objects.values_list("derivative__format", flat=True)),
+            ["JPEG", "WEBP"],
+        )
+
+
+class AddImagesViewTests(APITestCase):
+    def setUp(self):
+        self.media_root = use_temporary_media_root(self)
+
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account_tier = AccountTier.objects.create(
+            name="Test Tier", orginal_image_acces=True
+        )
+        self.account_tier.image_sizes.add(
+            ThumbnailDimensions.objects.create(height=50),
+            ThumbnailDimensions.objects.create(height=25),
+        )
+        ClientAccount.objects.create(user=self.user, account_type=self.account_tier)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("add-images")
+
+    def create_image_bytes(self, format="JPEG"):
+        image_io = io.BytesIO()
+        Image.new("RGB", (100, 100), "red").save(image_io, format=format)
+        return image_io.getvalue()
+
+    def create_upload(self, name, content=None):
+        return SimpleUploadedFile(name, content or self.create_image_bytes())
+
+    def create_archive(self, members):
+        archive_io = io.BytesIO()
+        with zipfile.ZipFile(archive_io, "w") as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        return SimpleUploadedFile("photos.zip", archive_io.getvalue())
+
+    def post(self, data):
+        return self.client.post(self.url, data, format="multipart")
+
+    def test_add_images(self):
+        uploads = [self.create_upload("first.jpg"), self.create_upload("second.jpg")]
+
+        response = self.post({"upload_images": uploads, "titles": ["Holiday"]})
+        results = response.json()["results"]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([result["title"] for result in results], ["Holiday", "second"])
+        self.assertEqual(len(results[0]["urls"]), 3)
+        self.assertEqual(UploadedImage.objects.filter(is_original=True).count(), 2)
+        for original in UploadedImage.objects.all():
+            self.assertEqual((original.width, original.format), (100, "JPEG"))
+            self.assertTrue(original.placeholder.startswith("data:image/"))
+            self.assertEqual(original.byte_size, original.upload_image.size)
+        self.assertEqual(ImageDerivative.objects.count(), 4)
+        for derivative in ImageDerivative.objects.all():
+            self.assertEqual(
+                Image.open(derivative.image.path).height, derivative.height
+            )
+
+    def test_add_images_extra_formats(self):
+        self.account_tier.thumbnail_formats = "WEBP"
+        self.account_tier.save()
+        uploads = [
+            self.create_upload("first.png", self.create_image_bytes("PNG")),
+            self.create_upload("second.jpg"),
+        ]
+
+        response = self.post({"upload_images": uploads})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(ImageDerivative.objects.values_list("format", flat=True)),
+            ["JPEG", "JPEG", "PNG", "PNG", "WEBP", "WEBP", "WEBP", "WEBP"],
+        )
+        for derivative in ImageDerivative.objects.all():
+            self.assertEqual(
+                Image.open(derivative.image.path).format, derivative.format
+            )
+
+    def test_add_images_deduplicates(self):
+        uploads = [
+            self.create_upload("first.jpg"),
+            self.create_upload("copy.jpg"),
+            self.create_upload("other.png", self.create_image_bytes("PNG")),
+        ]
+
+        with mock.patch(
+            "api_image.views.render_thumbnail_batch", wraps=render_thumbnail_batch
+        ) as render:
+            response = self.post({"upload_images": uploads})
+            self.post({"upload_images": [self.create_upload("again.jpg")]})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(render.call_args_list[0].args[0]), 2)
+        self.assertEqual(render.call_args_list[1].args[0], [])
+        first, copy, _, again = UploadedImage.objects.order_by("id")
+        self.assertEqual(copy.upload_image.name, first.upload_image.name)
+        self.assertEqual(again.upload_image.name, first.upload_image.name)
+        self.assertEqual(
+            set(again.derivatives.values_list("image", flat=True)),
+            set(first.derivatives.values_list("image", flat=True)),
+        )
+        self.assertEqual(ImageDerivative.objects.count(), 8)
+        stored_files = [
+            filename
+            for _, _, filenames in os.walk(self.media_root)
+            for filename in filenames
+        ]
+        self.assertEqual(len(stored_files), 6)
+
+    def test_add_images_partial_failure(self):
+        image_io = io.BytesIO()
+        Image.effect_noise((200, 200), 64).convert("RGB").save(image_io, "JPEG")
+        truncated = image_io.getvalue()[: len(image_io.getvalue()) // 2]
+        uploads = [
+            self.create_upload("good.jpg"),
+            self.create_upload("text.jpg", b"not an image"),
+            self.create_upload("truncated.jpg", truncated),
+        ]
+
+        response = self.post({"upload_images": uploads})
+        results = response.json()["results"]
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([result["status"] for result in results], [201, 400, 400])
+        self.assertIn("upload_image", results[1]["errors"])
+        self.assertEqual(
+            results[2]["errors"], {"upload_image": ["Image could not be decoded"]}
+        )
+        self.assertEqual(UploadedImage.objects.count(), 1)
+
+    @override_settings(THUMBNAIL_LAZY=True)
+    def test_add_images_truncated_file_lazy(self):
+        image_io = io.BytesIO()
+        Image.effect_noise((200, 200), 64).convert("RGB").save(image_io, "JPEG")
+        truncated = image_io.getvalue()[: len(image_io.getvalue()) // 2]
+        uploads = [
+            self.create_upload("good.jpg"),
+            self.create_upload("truncated.jpg", truncated),
+        ]
+
+        response = self.post({"upload_images": uploads})
+        results = response.json()["results"]
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([result["status"] for result in results], [201, 400])
+        self.assertEqual(
+            results[1]["errors"], {"upload_image": ["Image could not be decoded"]}
+        )
+        self.assertEqual(UploadedImage.objects.count(), 1)
+
+    def test_add_images_all_invalid(self):
+        response = self.post({"upload_images": [self.create_upload("a.jpg", b"x")]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadedImage.objects.count(), 0)
+
+    def test_add_images_from_archive(self):
+        archive = self.create_archive(
+            {
+                "album/one.jpg": self.create_image_bytes(),
+                "album/two.png": self.create_image_bytes("PNG"),
+                "__MACOSX/album/._one.jpg": b"",
+            }
+        )
+
+        response = self.post({"archive": archive})
+        results = response.json()["results"]
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result["filename"] for result in results], ["one.jpg", "two.png"]
+        )
+        self.assertEqual(ImageDerivative.objects.filter(format="PNG").count(), 2)
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=100)
+    def test_add_images_archive_member_too_large(self):
+        archive = self.create_archive({"one.jpg": self.create_image_bytes()})
+
+        response = self.post({"archive": archive})
+
+        self.assertEqual(
+            response.json()["results"][0]["errors"],
+            {"upload_image": ["Image file is too large"]},
+        )
+
+    def test_add_images_invalid_archive(self):
+        response = self.post({"archive": self.create_upload("photos.zip", b"x")})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(IMAGE_BATCH_MAX_FILES=1)
+    def test_add_images_too_many_files(self):
+        uploads = [self.create_upload("first.jpg"), self.create_upload("second.jpg")]
+
+        response = self.post({"upload_images": uploads})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadedImage.objects.count(), 0)
+
+    def test_add_images_empty(self):
+        response = self.post({})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(THUMBNAIL_ASYNC=True)
+    def test_add_images_async(self):
+        uploads = [self.create_upload("first.jpg"), self.create_upload("second.jpg")]
+
+        response = self.post({"upload_images": uploads})
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(ThumbnailJob.objects.count(), 4)
+
+
+class ThumbnailViewTests(APITestCase):
+    def setUp(self):
+        use_temporary_media_root(self)
+        self.cache_dir = tempfile.mkdtemp()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.account_tier = AccountTier.objects.create(
+            name="Test Tier", orginal_image_acces=False
+        )
+        self.thumbnail_dimensions = ThumbnailDimensions.objects.create(height=50)
+        self.account_tier.image_sizes.add(self.thumbnail_dimensions)
+        self.client_account = ClientAccount.objects.create(
+            user=self.user, account_type=self.account_tier
+        )
+
+    def create_test_image(self):
+        image = Image.new("RGB", (200, 100))
+        image_io = io.BytesIO()
+        image.save(image_io, format="JPEG")
+        return SimpleUploadedFile("test_image.jpg", image_io.getvalue())
+
+    def upload(self):
+        self.client.force_authenticate(user=self.user)
+        data = {"title": "Test Image", "upload_image": self.create_test_image()}
+        return self.client.post(reverse("add-image"), data, format="multipart")
+
+    def test_lazy_upload_stores_only_original(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            response = self.upload()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UploadedImage.objects.count(), 1)
+        self.assertEqual(len(response.json()["urls"]), 1)
+        self.assertNotIn("original url", response.json()["urls"][0])
+
+    def test_lazy_upload_stores_placeholder(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            image_id = self.upload().json()["urls"][0]["id"]
+
+        detail = self.client.get(reverse("user-image-detail", kwargs={"pk": image_id}))
+        self.assertTrue(detail.data["placeholder"].startswith("data:image/"))
+
+    def test_lazy_original_hidden_without_original_access(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            response = self.upload()
+
+        image_id = response.json()["urls"][0]["id"]
+        detail = self.client.get(reverse("user-image-detail", kwargs={"pk": image_id}))
+        self.assertIsNone(detail.data["upload_image"])
+
+    def test_lazy_detail_lists_thumbnail_links(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][0]["url"]
+            image_id = UploadedImage.objects.get().id
+            detail = self.client.get(
+                reverse("user-image-detail", kwargs={"pk": image_id})
+            )
+
+        self.assertEqual(
+            detail.data["thumbnails"],
+            [{"size": str(self.thumbnail_dimensions), "url": url}],
+        )
+
+    def test_thumbnail_link_follows_render_settings(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][0]["url"]
+            self.thumbnail_dimensions.quality = 40
+            self.thumbnail_dimensions.save()
+
+            response = self.client.get(url)
+            rendered = self.client.get(response["Location"])
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertNotEqual(response["Location"], url)
+        self.assertNotIn("immutable", response.get("Cache-Control", ""))
+        self.assertEqual(rendered.status_code, status.HTTP_200_OK)
+        self.assertIn("immutable", rendered["Cache-Control"])
+
+    def test_thumbnail_of_undecodable_original(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][0]["url"]
+            with open(UploadedImage.objects.get().upload_image.path, "wb") as original:
+                original.write(b"not an image")
+
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("immutable", response.get("Cache-Control", ""))
+
+    def test_thumbnail_rendered_once_then_served_from_cache(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][0]["url"]
+
+            with mock.patch(
+                "api_image.views.render_thumbnail", wraps=render_thumbnail
+            ) as render:
+                first = self.client.get(url)
+                second = self.client.get(url)
+
+            first_content = b"".join(first.streaming_content)
+            second_content = b"".join(second.streaming_content)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first_content, second_content)
+        self.assertEqual(Image.open(io.BytesIO(first_content)).size, (100, 50))
+        self.assertIn("immutable", first["Cache-Control"])
+
+    def test_thumbnail_rerendered_when_cached_file_evicted(self):
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][0]["url"]
+            self.client.get(url)
+            cached_path = next(
+                os.path.join(root, filename)
+                for root, _, filenames in os.walk(self.cache_dir)
+                for filename in filenames
+            )
+            os.remove(cached_path)
+
+            with mock.patch(
+                "api_image.derivative_cache.DerivativeCache.get",
+                return_value=cached_path,
+            ), mock.patch(
+                "api_image.views.render_thumbnail", wraps=render_thumbnail
+            ) as render:
+                response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(render.call_count, 1)
+        self.assertTrue(os.path.exists(cached_path))
+
+    def test_thumbnail_served_from_memory_when_evicted_after_put(self):
+        missing_path = os.path.join(self.cache_dir, "missing.jpeg")
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][0]["url"]
+
+            with mock.patch(
+                "api_image.derivative_cache.DerivativeCache.put",
+                return_value=missing_path,
+            ):
+                response = self.client.get(url)
+
+            content = b"".join(response.streaming_content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(Image.open(io.BytesIO(content)).size, (100, 50))
+
+    def test_thumbnail_negotiates_format(self):
+        self.account_tier.thumbnail_formats = "WEBP"
+        self.account_tier.save()
+        with self.settings(THUMBNAIL_LAZY=True, THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][0]["url"]
+
+            webp = self.client.get(url, HTTP_ACCEPT="image/webp,*/*")
+            fallback = self.client.get(url, HTTP_ACCEPT="*/*")
+
+            webp_content = b"".join(webp.streaming_content)
+            fallback_content = b"".join(fallback.streaming_content)
+
+        self.assertEqual(Image.open(io.BytesIO(webp_content)).format, "WEBP")
+        self.assertEqual(Image.open(io.BytesIO(fallback_content)).format, "JPEG")
+        self.assertEqual(webp["Vary"], "Accept")
+
+    def test_thumbnail_serves_stored_derivative(self):
+        self.account_tier.thumbnail_formats = "WEBP"
+        self.account_tier.save()
+        with self.settings(THUMBNAIL_CACHE_DIR=self.cache_dir):
+            url = self.upload().json()["urls"][-1]["url"]
+
+            with mock.patch(
+                "api_image.views.render_thumbnail", wraps=render_thumbnail
+            ) as render:
+                response = self.client.get(url, HTTP_ACCEPT="image/webp")
+                content = b"".join(response.streaming_content)
+
+        render.assert_not_called()
+        with ImageDerivative.objects.get(format="WEBP").image.open("rb") as stored:
+            self.assertEqual(content, stored.read())
+
+    def test_thumbnail_invalid_token(self):
+        response = self.client.get(reverse("thumbnail", args=["1.1:forged"]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def tearDown(self):
-        for filename in os.listdir(settings.MEDIA_ROOT):
-            if "Test_Image" in filename:
-                os.remove(os.path.join(settings.MEDIA_ROOT, filename))
+        shutil.rmtree(self.cache_dir)
 
 
 class UserImageViewTests(APITestCase):
     def setUp(self):
+        use_temporary_media_root(self)
         self.user = User.objects.create_user(
             username="testuser", password="testpassword"
         )
@@ -151,6 +828,16 @@ class UserImageViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["id"], self.uploaded_image.id)
         self.assertEqual(response.data["title"], self.uploaded_image.title)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_get_user_image_not_modified(self):
+        url = reverse("user-image-detail", kwargs={"pk": self.uploaded_image.id})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
 
     def test_get_user_image_unauthenticated(self):
         url = reverse("user-image-detail", kwargs={"pk": self.uploaded_image.id})
@@ -171,6 +858,7 @@ class UserImageViewTests(APITestCase):
 
 class UserImagesListViewTests(APITestCase):
     def setUp(self):
+        use_temporary_media_root(self)
         self.user = User.objects.create_user(
             username="testuser", password="testpassword"
         )
@@ -212,16 +900,24 @@ class UserImagesListViewTests(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data[0]["id"], self.uploaded_image1.id)
-        self.assertEqual(response.data[0]["title"], self.uploaded_image1.title)
-        self.assertEqual(response.data[0]["id"], self.uploaded_image1.id)
-        self.assertEqual(response.data[0]["title"], self.uploaded_image1.title)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["results"][0]["id"], self.uploaded_image1.id)
+        self.assertEqual(
+            response.data["results"][0]["title"], self.uploaded_image1.title
+        )
+        self.assertEqual(response.data["results"][0]["id"], self.uploaded_image1.id)
+        self.assertEqual(
+            response.data["results"][0]["title"], self.uploaded_image1.title
+        )
 
-        self.assertEqual(response.data[1]["id"], self.uploaded_image2.id)
-        self.assertEqual(response.data[1]["title"], self.uploaded_image2.title)
-        self.assertEqual(response.data[1]["id"], self.uploaded_image2.id)
-        self.assertEqual(response.data[1]["title"], self.uploaded_image2.title)
+        self.assertEqual(response.data["results"][1]["id"], self.uploaded_image2.id)
+        self.assertEqual(
+            response.data["results"][1]["title"], self.uploaded_image2.title
+        )
+        self.assertEqual(response.data["results"][1]["id"], self.uploaded_image2.id)
+        self.assertEqual(
+            response.data["results"][1]["title"], self.uploaded_image2.title
+        )
 
     def test_get_user_images_unauthenticated(self):
         url = reverse("user-images-list")
@@ -237,16 +933,113 @@ class UserImagesListViewTests(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
+        self.assertIsNone(response.data["next"])
 
-    def tearDown(self):
-        for filename in os.listdir(settings.MEDIA_ROOT):
-            if filename.startswith("test_image"):
-                os.remove(os.path.join(settings.MEDIA_ROOT, filename))
+    def test_get_user_images_paginated_by_cursor(self):
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("user-images-list")
+        response = self.client.get(url, {"page_size": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.uploaded_image1.id)
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual(response.data["results"][0]["id"], self.uploaded_image2.id)
+        self.assertIsNone(response.data["next"])
+
+    def test_get_user_images_only_own(self):
+        other_user = User.objects.create_user(username="other", password="password")
+        ClientAccount.objects.create(user=other_user, account_type=self.account_tier)
+
+        self.client.force_authenticate(user=other_user)
+        url = reverse("user-images-list")
+        response = self.client.get(url)
+
+        self.assertEqual(response.data["results"], [])
+
+    def test_get_user_images_metadata_without_disk_access(self):
+        UploadedImage.objects.update(width=100, height=100, format="JPEG", byte_size=5)
+        self.client.force_authenticate(user=self.user)
+
+        with mock.patch(
+            "api_image.storage.ShardedFileSystemStorage.open"
+        ) as storage_open, mock.patch(
+            "api_image.storage.ShardedFileSystemStorage.size"
+        ) as storage_size:
+            response = self.client.get(reverse("user-images-list"))
+
+        storage_open.assert_not_called()
+        storage_size.assert_not_called()
+        result = response.data["results"][0]
+        self.assertEqual(
+            [result[key] for key in ["width", "height", "format", "byte_size"]],
+            [100, 100, "JPEG", 5],
+        )
+
+    def test_get_user_images_etag_changes_after_backfill(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("user-images-list")
+        etag = self.client.get(url)["ETag"]
+
+        UploadedImage.objects.update(byte_size=5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_user_images_query_count(self):
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("user-images-list")
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    def test_get_user_images_not_modified(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("user-images-list")
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_get_user_images_etag_changes_with_content(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("user-images-list")
+        etag = self.client.get(url)["ETag"]
+
+        ImageDerivative.objects.create(
+            original=self.uploaded_image1,
+            size=self.thumbnail_dimensions,
+            format="JPEG",
+            image="test_image_thumbnail.jpg",
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotEqual(self.client.get(url, {"page_size": 1})["ETag"], etag)
+
+    def test_get_user_images_invalid_cursor(self):
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("user-images-list")
+        response = self.client.get(url, {"cursor": "invalid"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
 class AddRetriveExpiringLinksTests(APITestCase):
     def setUp(self):
+        use_temporary_media_root(self)
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username="testuser", password="testpassword"
@@ -344,13 +1137,57 @@ class AddRetriveExpiringLinksTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_410_GONE)
         self.assertEqual(response.json()["link_status"], "link already expired")
 
-    def tearDown(self):
-        for filename in os.listdir(settings.MEDIA_ROOT):
-            if filename.startswith("test_image"):
-                file_path = os.path.join(settings.MEDIA_ROOT, filename)
+    def test_get_expiring_link_served_from_cache(self):
+        ExpiringLinks.objects.create(
+            image_id=self.uploaded_image, time_to_expire=3600, expiring_link="hot"
+        )
+        url = reverse("time-expiring", args=["hot"])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        response.close()
+        self.assertIn("private", response["Cache-Control"])
+        self.assertLessEqual(int(response["Cache-Control"].split("max-age=")[1]), 3600)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        response.close()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(EXPIRING_LINK_CACHE=None)
+    def test_get_expiring_link_without_cache(self):
+        ExpiringLinks.objects.create(
+            image_id=self.uploaded_image, time_to_expire=3600, expiring_link="cold"
+        )
+        url = reverse("time-expiring", args=["cold"])
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            response.close()
+
+    def test_get_expiring_link_deleted_drops_cache(self):
+        link_object = ExpiringLinks.objects.create(
+            image_id=self.uploaded_image, time_to_expire=3600, expiring_link="gone"
+        )
+        url = reverse("time-expiring", args=["gone"])
+        self.client.get(url).close()
+
+        link_object.delete()
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_expiring_link_unknown(self):
+        url = reverse("time-expiring", args=["unknown"])
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_create_expiring_link_basic_account(self):
         self.user.client.account_type.time_limited_link_acces = False
+        self.user.client.account_type.save()
         self.client.force_authenticate(user=self.user)
 
         url = reverse("time-expiring")
@@ -367,6 +1204,195 @@ class AddRetriveExpiringLinksTests(APITestCase):
             {"account_type": "Your account lacks sufficient permissions"},
         )
 
+    def test_create_expiring_links_bulk(self):
+        second_image = UploadedImage.objects.create(
+            title="Second Image",
+            author=self.user.client,
+            upload_image=self.create_test_image(),
+        )
+        self.client.force_authenticate(user=self.user)
+        get_client_tier(self.user)
+        data = {
+            "links": [
+                {"image_id": self.uploaded_image.id, "time_to_expire": 300},
+                {"image_id": second_image.id, "time_to_expire": 3600},
+                {"image_id": self.uploaded_image.id, "time_to_expire": 600},
+            ]
+        }
+
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                reverse("time-expiring-bulk"), data, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        links = response.json()["links"]
+        self.assertEqual(
+            [(link["image_id"], link["secound_to_expire"]) for link in links],
+            [
+                (self.uploaded_image.id, 300),
+                (second_image.id, 3600),
+                (self.uploaded_image.id, 600),
+            ],
+        )
+        tokens = [link["url"].split("/")[-1] for link in links]
+        self.assertEqual(len(set(tokens)), 3)
+        for token, link in zip(tokens, links):
+            expiring_link = ExpiringLinks.objects.get(expiring_link=token)
+            self.assertEqual(expiring_link.image_id_id, link["image_id"])
+            self.assertAlmostEqual(
+                expiring_link.expires_at,
+                expiring_link.add_time
+                + timezone.timedelta(seconds=link["secound_to_expire"]),
+                delta=timezone.timedelta(seconds=1),
+            )
+
+        response = self.client.get(links[1]["url"])
+        response.close()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create_expiring_links_bulk_foreign_image(self):
+        other_user = User.objects.create_user(username="other", password="other")
+        other_client = ClientAccount.objects.create(
+            user=other_user, account_type=self.user.client.account_type
+        )
+        foreign_image = UploadedImage.objects.create(
+            title="Foreign Image",
+            author=other_client,
+            upload_image=self.create_test_image(),
+        )
+        self.client.force_authenticate(user=self.user)
+        data = {
+            "links": [
+                {"image_id": self.uploaded_image.id, "time_to_expire": 300},
+                {"image_id": foreign_image.id, "time_to_expire": 300},
+                {"image_id": 999999, "time_to_expire": 300},
+            ]
+        }
+
+        response = self.client.post(reverse("time-expiring-bulk"), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(),
+            {"links": [f"Images do not exist: {foreign_image.id}, 999999."]},
+        )
+        self.assertFalse(ExpiringLinks.objects.exists())
+
+    def test_create_expiring_links_bulk_invalid_items(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("time-expiring-bulk")
+
+        response = self.client.post(url, {"links": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data = {"links": [{"image_id": self.uploaded_image.id, "time_to_expire": 5}]}
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("time_to_expire", response.json()["links"][0])
+        self.assertFalse(ExpiringLinks.objects.exists())
+
+    def test_create_expiring_links_bulk_basic_account(self):
+        self.user.client.account_type.time_limited_link_acces = False
+        self.user.client.account_type.save()
+        self.client.force_authenticate(user=self.user)
+        data = {"links": [{"image_id": self.uploaded_image.id, "time_to_expire": 300}]}
+
+        response = self.client.post(reverse("time-expiring-bulk"), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_signed_expiring_link(self):
+        self.client.force_authenticate(user=self.user)
+        data = {
+            "image_id": self.uploaded_image.id,
+            "time_to_expire": 3600,
+            "mode": "signed",
+        }
+
+        response = self.client.post(reverse("time-expiring"), data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(ExpiringLinks.objects.exists())
+        url = response.json()["url"]
+        self.assertTrue(url.startswith("/time-expiring/signed/"))
+
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        response.close()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(int(response["Cache-Control"].split("max-age=")[1]), 3600)
+
+    def test_create_expiring_link_for_another_users_image(self):
+        other_user = User.objects.create_user(username="otheruser", password="pw")
+        other_image = UploadedImage.objects.create(
+            title="Other Image",
+            author=ClientAccount.objects.create(
+                user=other_user, account_type=self.uploaded_image.author.account_type
+            ),
+            upload_image=self.create_test_image(),
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for mode in ["signed", "revocable"]:
+            with self.subTest(mode=mode):
+                data = {
+                    "image_id": other_image.id,
+                    "time_to_expire": 3600,
+                    "mode": mode,
+                }
+                response = self.client.post(
+                    reverse("time-expiring"), data, format="json"
+                )
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("image_id", response.json())
+        self.assertFalse(ExpiringLinks.objects.exists())
+
+    def test_create_signed_expiring_links_bulk(self):
+        self.client.force_authenticate(user=self.user)
+        get_client_tier(self.user)
+        data = {
+            "links": [{"image_id": self.uploaded_image.id, "time_to_expire": 300}] * 2,
+            "mode": "signed",
+        }
+
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse("time-expiring-bulk"), data, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(ExpiringLinks.objects.exists())
+        for link in response.json()["links"]:
+            response = self.client.get(link["url"])
+            response.close()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_signed_expiring_link_expired(self):
+        token = sign_expiring_link(
+            self.uploaded_image.id, self.uploaded_image.upload_image.name, -1
+        )
+
+        response = self.client.get(reverse("signed-link", args=[token]))
+
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_get_signed_expiring_link_tampered(self):
+        token = sign_expiring_link(
+            self.uploaded_image.id, self.uploaded_image.upload_image.name, 3600
+        )
+        payload, signature = token.rsplit(":", 1)
+        forged = sign_expiring_link(self.uploaded_image.id, "../settings.py", 3600)
+
+        for bad_token in [
+            payload + ":" + signature[::-1],
+            forged.split(":")[0] + ":" + signature,
+        ]:
+            response = self.client.get(reverse("signed-link", args=[bad_token]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class MediaConfigTestCase(TestCase):
     def test_media_root_exists(self):
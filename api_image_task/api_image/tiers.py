@@ -0,0 +1,99 @@
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .image_formats import parse_formats
+from .models import AccountTier, ClientAccount, ThumbnailDimensions
+
+TierCapabilities = namedtuple(
+    "TierCapabilities",
+    [
+        "id",
+        "name",
+        "orginal_image_acces",
+        "time_limited_link_acces",
+        "image_sizes",
+        "thumbnail_formats",
+        "keep_source_format",
+    ],
+)
+ClientTier = namedtuple("ClientTier", ["client_id", "tier"])
+
+TIERS_CACHE_KEY = "account-tiers"
+
+
+def get_tier_cache():
+    if settings.TIER_CACHE is None:
+        return None
+    return caches[settings.TIER_CACHE]
+
+
+def client_tier_cache_key(user_id):
+    return f"client-tier:{user_id}"
+
+
+def load_tiers():
+    return {
+        tier.id: TierCapabilities(
+            id=tier.id,
+            name=tier.name,
+            orginal_image_acces=tier.orginal_image_acces,
+            time_limited_link_acces=tier.time_limited_link_acces,
+            image_sizes=tuple(tier.image_sizes.all()),
+            thumbnail_formats=tuple(parse_formats(tier.thumbnail_formats)),
+            keep_source_format=tier.keep_source_format,
+        )
+        for tier in AccountTier.objects.prefetch_related("image_sizes")
+    }
+
+
+def get_tiers(refresh=False):
+    cache = get_tier_cache()
+    tiers = None
+    if cache is not None and not refresh:
+        tiers = cache.get(TIERS_CACHE_KEY)
+    if tiers is None:
+        tiers = load_tiers()
+        if cache is not None:
+            cache.set(TIERS_CACHE_KEY, tiers, timeout=settings.TIER_CACHE_TTL)
+    return tiers
+
+
+def get_tier(tier_id):
+    return get_tiers().get(tier_id) or get_tiers(refresh=True)[tier_id]
+
+
+def get_client_tier(user):
+    cache = get_tier_cache()
+    key = client_tier_cache_key(user.pk)
+    cached = cache.get(key) if cache is not None else None
+    if cached is None:
+        cached = ClientAccount.objects.values_list("id", "account_type_id").get(
+            user=user
+        )
+        if cache is not None:
+            cache.set(key, cached, timeout=settings.TIER_CACHE_TTL)
+
+    client_id, tier_id = cached
+    return ClientTier(client_id, get_tier(tier_id))
+
+
+@receiver(post_save, sender=AccountTier)
+@receiver(post_delete, sender=AccountTier)
+@receiver(post_save, sender=ThumbnailDimensions)
+@receiver(post_delete, sender=ThumbnailDimensions)
+@receiver(m2m_changed, sender=AccountTier.image_sizes.through)
+def forget_tiers(sender, **kwargs):
+    cache = get_tier_cache()
+    if cache is not None:
+        cache.delete(TIERS_CACHE_KEY)
+
+
+@receiver(post_save, sender=ClientAccount)
+@receiver(post_delete, sender=ClientAccount)
+def forget_client_tier(sender, instance, **kwargs):
+    cache = get_tier_cache()
+    if cache is not None:
+        cache.delete(client_tier_cache_key(instance.user_id))
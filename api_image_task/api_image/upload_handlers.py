@@ -0,0 +1,65 @@
+import hashlib
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    def request_limit(self):
+        resolver_match = getattr(self.request, "resolver_match", None)
+        if resolver_match is not None and resolver_match.url_name == "add-images":
+            return settings.IMAGE_BATCH_MAX_BYTES
+        return settings.IMAGE_UPLOAD_MAX_BYTES
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        if content_length and content_length > self.request_limit():
+            raise RequestDataTooBig("Upload exceeds the allowed request size.")
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        if field_name == "archive":
+            self.file_limit = settings.IMAGE_BATCH_MAX_BYTES
+        else:
+            self.file_limit = settings.IMAGE_UPLOAD_MAX_BYTES
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.file_limit:
+            raise RequestDataTooBig("Upload exceeds the allowed file size.")
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class ContentHashMixin:
+    def new_file(self, *args, **kwargs):
+        self.content_hash = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        remaining = super().receive_data_chunk(raw_data, start)
+        if remaining is None:
+            self.content_hash.update(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.content_hash.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(ContentHashMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(ContentHashMixin, TemporaryFileUploadHandler):
+    pass
@@ -1,21 +1,38 @@
 from django.urls import path
 from django.conf.urls.static import static
 from django.conf import settings
+from .http_caching import serve_media
 from .views import (
     AddImageView,
+    AddImagesView,
     AddRetriveExpiringLinks,
+    BulkExpiringLinks,
+    SignedExpiringLinkView,
+    ThumbnailView,
     UserImageView,
     UserImagesListView,
 )
 
 urlpatterns = [
     path("add-image/", AddImageView.as_view(), name="add-image"),
+    path("add-images/", AddImagesView.as_view(), name="add-images"),
     path("image/<int:pk>/", UserImageView.as_view(), name="user-image-detail"),
+    path("thumbnail/<str:token>/", ThumbnailView.as_view(), name="thumbnail"),
     path("images/", UserImagesListView.as_view(), name="user-images-list"),
     path("time-expiring/", AddRetriveExpiringLinks.as_view(), name="time-expiring"),
+    path(
+        "time-expiring/bulk/",
+        BulkExpiringLinks.as_view(),
+        name="time-expiring-bulk",
+    ),
+    path(
+        "time-expiring/signed/<str:token>",
+        SignedExpiringLinkView.as_view(),
+        name="signed-link",
+    ),
     path(
         "time-expiring/<str:link_name>",
         AddRetriveExpiringLinks.as_view(),
         name="time-expiring",
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+] + static(settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT)
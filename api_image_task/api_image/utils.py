@@ -1,14 +1,66 @@
+import hashlib
+import os
 import string
 import secrets
-from PIL import Image as pilimage
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image as pilimage, ImageColor
+from django.conf import settings
+from django.core import signing
 from django.utils import timezone
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-def change_image_size(pillow_image, height=None, width=None):
-    original_width, original_height = pillow_image.size
+EXIF_ORIENTATION_TAG = 0x0112
+IMAGE_DECODE_ERRORS = (
+    OSError,
+    ValueError,
+    SyntaxError,
+    pilimage.DecompressionBombError,
+)
+ENTROPY_SAMPLE_SIZE = 128
+
+THUMBNAIL_SIGNING_SALT = "api_image.thumbnail"
+
+ParsedImage = namedtuple(
+    "ParsedImage", ["image", "format", "size", "mode", "orientation"]
+)
+
+_resize_pool = None
+_resize_pool_lock = threading.Lock()
+
+
+def parse_image_header(image_file):
+    pillow_image = pilimage.open(image_file)
+    exif = pilimage.Exif()
+    if "exif" in pillow_image.info:
+        exif.load(pillow_image.info["exif"])
+
+    return ParsedImage(
+        image=pillow_image,
+        format=pillow_image.format,
+        size=pillow_image.size,
+        mode=pillow_image.mode,
+        orientation=exif.get(EXIF_ORIENTATION_TAG, 1),
+    )
+
+
+def calculate_expected_size(original_size, height=None, width=None, fit=None):
+    original_width, original_height = original_size
     expected_size = (original_width, original_height)
 
-    if width and height:
+    if width and height and fit == "contain":
+        scale = min(width / original_width, height / original_height)
+        expected_size = (
+            max(1, int(original_width * scale)),
+            max(1, int(original_height * scale)),
+        )
+    elif width and height:
         expected_size = (width, height)
     elif width:
         new_height = int(original_height * (width / original_width))
@@ -17,10 +69,387 @@ def change_image_size(pillow_image, height=None, width=None):
         new_width = int(original_width * (height / original_height))
         expected_size = (new_width, height)
 
-    resized_img = pillow_image.resize(expected_size, pilimage.LANCZOS)
+    return expected_size
+
+
+def resize_image(pillow_image, expected_size, reducing_gap=None):
+    return pillow_image.resize(
+        expected_size, pilimage.LANCZOS, reducing_gap=reducing_gap
+    )
+
+
+def window_entropies(sample, window, horizontal):
+    length = sample.width if horizontal else sample.height
+    if numpy is None:
+        return [
+            sample.crop(
+                (offset, 0, offset + window, sample.height)
+                if horizontal
+                else (0, offset, sample.width, offset + window)
+            ).entropy()
+            for offset in range(length - window + 1)
+        ]
+
+    lines = numpy.asarray(sample, dtype=numpy.int64)
+    if horizontal:
+        lines = lines.T
+    bins = lines + numpy.arange(length)[:, None] * 256
+    histograms = numpy.bincount(bins.ravel(), minlength=length * 256).reshape(
+        length, 256
+    )
+    cumulative = numpy.concatenate(
+        [numpy.zeros((1, 256), dtype=numpy.int64), histograms.cumsum(axis=0)]
+    )
+    windows = cumulative[window:] - cumulative[:-window]
+    probabilities = windows / windows.sum(axis=1, keepdims=True)
+    logarithms = numpy.log2(
+        probabilities, out=numpy.zeros_like(probabilities), where=probabilities > 0
+    )
+    return (-(probabilities * logarithms).sum(axis=1)).tolist()
+
+
+def entropy_offset(pillow_image, crop_size):
+    width, height = pillow_image.size
+    horizontal = crop_size[0] < width
+    scale = min(1.0, ENTROPY_SAMPLE_SIZE / max(width, height))
+    sample_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    sample = pillow_image.resize(
+        sample_size, pilimage.BILINEAR, reducing_gap=2.0
+    ).convert("L")
+
+    length = sample.width if horizontal else sample.height
+    crop_length = crop_size[0] if horizontal else crop_size[1]
+    source_length = width if horizontal else height
+    window = min(length, max(1, round(crop_length * length / source_length)))
+    entropies = window_entropies(sample, window, horizontal)
+
+    best = max(entropies)
+    center = (length - window) / 2
+    offset = min(
+        (index for index, entropy in enumerate(entropies) if best - entropy < 1e-9),
+        key=lambda index: abs(index - center),
+    )
+    offset = min(offset * source_length / length, source_length - crop_length)
+    return (offset, 0) if horizontal else (0, offset)
+
+
+def cover_box(pillow_image, expected_size, crop="center"):
+    width, height = pillow_image.size
+    scale = max(expected_size[0] / width, expected_size[1] / height)
+    crop_size = (expected_size[0] / scale, expected_size[1] / scale)
+    if crop == "entropy" and (crop_size[0] < width or crop_size[1] < height):
+        left, top = entropy_offset(pillow_image, crop_size)
+    else:
+        left, top = (width - crop_size[0]) / 2, (height - crop_size[1]) / 2
+    return (left, top, left + crop_size[0], top + crop_size[1])
+
+
+def pad_image(pillow_image, expected_size, color):
+    if pillow_image.mode not in ("RGB", "RGBA", "L", "LA"):
+        pillow_image = pillow_image.convert(
+            "RGBA" if has_alpha(pillow_image) else "RGB"
+        )
+    canvas = pilimage.new(
+        pillow_image.mode,
+        expected_size,
+        ImageColor.getcolor(color, pillow_image.mode),
+    )
+    canvas.paste(
+        pillow_image,
+        (
+            (expected_size[0] - pillow_image.width) // 2,
+            (expected_size[1] - pillow_image.height) // 2,
+        ),
+    )
+    return canvas
+
+
+def keeps_frame(size):
+    return (
+        size is None
+        or not (size.height and size.width)
+        or size.fit not in ("cover", "pad")
+    )
+
+
+def fit_image(pillow_image, expected_size, size=None, reducing_gap=None):
+    if keeps_frame(size):
+        return resize_image(pillow_image, expected_size, reducing_gap)
+
+    if size.fit == "cover":
+        return pillow_image.resize(
+            expected_size,
+            pilimage.LANCZOS,
+            box=cover_box(pillow_image, expected_size, size.crop),
+            reducing_gap=reducing_gap,
+        )
+
+    contained_size = calculate_expected_size(
+        pillow_image.size, expected_size[1], expected_size[0], fit="contain"
+    )
+    resized = resize_image(pillow_image, contained_size, reducing_gap)
+    return pad_image(resized, expected_size, size.pad_color)
+
+
+def change_image_size(pillow_image, height=None, width=None):
+    expected_size = calculate_expected_size(pillow_image.size, height, width)
+    resized_img = resize_image(
+        pillow_image, expected_size, settings.THUMBNAIL_REDUCING_GAP
+    )
     return resized_img
 
 
+def has_alpha(pillow_image):
+    return "A" in pillow_image.getbands() or "transparency" in pillow_image.info
+
+
+def convert_for_format(pillow_image, format_name):
+    if format_name == "JPEG" and pillow_image.mode not in ("RGB", "L", "CMYK"):
+        if not has_alpha(pillow_image):
+            return pillow_image.convert("RGB")
+        rgba_image = pillow_image.convert("RGBA")
+        flattened = pilimage.new("RGB", rgba_image.size, (255, 255, 255))
+        flattened.paste(rgba_image, mask=rgba_image.getchannel("A"))
+        return flattened
+    if format_name in ("WEBP", "AVIF") and pillow_image.mode not in ("RGB", "RGBA"):
+        return pillow_image.convert("RGBA" if has_alpha(pillow_image) else "RGB")
+    return pillow_image
+
+
+def encoder_options(size, format_name):
+    options = dict(settings.THUMBNAIL_ENCODER_OPTIONS.get(format_name, {}))
+    if size is None:
+        return options
+
+    if size.quality is not None and format_name in ("JPEG", "WEBP", "AVIF"):
+        options["quality"] = size.quality
+    if size.subsampling and format_name in ("JPEG", "AVIF"):
+        options["subsampling"] = size.subsampling
+    if size.progressive is not None and format_name == "JPEG":
+        options["progressive"] = size.progressive
+    if size.optimize is not None:
+        if format_name in ("JPEG", "PNG"):
+            options["optimize"] = size.optimize
+        elif format_name == "WEBP":
+            options["method"] = 6 if size.optimize else 4
+    if size.png_compress_level is not None and format_name == "PNG":
+        options["compress_level"] = size.png_compress_level
+    return options
+
+
+def render_signature(size, format_name):
+    options = sorted(encoder_options(size, format_name).items())
+    return (
+        f"{size.fit}:{size.crop}:{size.pad_color}:"
+        f"{options}:{size.png_colors}:{size.strip_metadata}"
+    )
+
+
+def encode_image(pillow_image, format_name, size=None):
+    buffer = BytesIO()
+    pillow_image = convert_for_format(pillow_image, format_name)
+    options = encoder_options(size, format_name)
+
+    if format_name == "PNG" and size is not None and size.png_colors:
+        if pillow_image.mode not in ("RGB", "RGBA"):
+            pillow_image = pillow_image.convert(
+                "RGBA" if has_alpha(pillow_image) else "RGB"
+            )
+        pillow_image = pillow_image.quantize(colors=size.png_colors)
+
+    if size is None or size.strip_metadata:
+        options["icc_profile"] = None
+    else:
+        for key in ("exif", "icc_profile"):
+            if pillow_image.info.get(key):
+                options[key] = pillow_image.info[key]
+
+    pillow_image.save(buffer, format=format_name, **options)
+    buffer.seek(0)
+    return buffer
+
+
+def encode_formats(pillow_image, format_names, size=None):
+    return [
+        encode_image(pillow_image, format_name, size) for format_name in format_names
+    ]
+
+
+def render_thumbnail(pillow_image, size, format_name):
+    return render_thumbnails(pillow_image, [size], format_name)[0]
+
+
+def apply_jpeg_draft(pillow_image, target_sizes):
+    if not settings.THUMBNAIL_JPEG_DRAFT or pillow_image.format != "JPEG":
+        return
+    if not target_sizes:
+        return
+
+    original_width, original_height = pillow_image.size
+    requested_size = (
+        max(width for width, _ in target_sizes),
+        max(height for _, height in target_sizes),
+    )
+    if (
+        requested_size[0] * 2 > original_width
+        or requested_size[1] * 2 > original_height
+    ):
+        return
+
+    pillow_image.draft(pillow_image.mode, requested_size)
+
+
+def _resize_and_encode(pillow_image, expected_size, format_names, reducing_gap, size):
+    resized_pillow_img = fit_image(pillow_image, expected_size, size, reducing_gap)
+    return encode_formats(resized_pillow_img, format_names, size)
+
+
+def plan_cascade(target_sizes, min_scale=1.0):
+    by_area = sorted(
+        range(len(target_sizes)),
+        key=lambda index: target_sizes[index][0] * target_sizes[index][1],
+        reverse=True,
+    )
+    plan = []
+    rendered = []
+
+    for index in by_area:
+        target_width, target_height = target_sizes[index]
+        source = None
+        for candidate in rendered:
+            candidate_width, candidate_height = target_sizes[candidate]
+            if (
+                candidate_width >= target_width * min_scale
+                and candidate_height >= target_height * min_scale
+            ):
+                source = candidate
+        plan.append((index, source))
+        rendered.append(index)
+
+    return plan
+
+
+def cascade_resize(pillow_image, target_sizes, min_scale=1.0, reducing_gap=None):
+    resized_images = [None] * len(target_sizes)
+
+    for index, source in plan_cascade(target_sizes, min_scale):
+        source_image = pillow_image if source is None else resized_images[source]
+        resized_images[index] = resize_image(
+            source_image, target_sizes[index], reducing_gap
+        )
+
+    return resized_images
+
+
+def resize_workers():
+    return settings.THUMBNAIL_RESIZE_WORKERS or os.cpu_count()
+
+
+def get_resize_pool():
+    global _resize_pool
+
+    with _resize_pool_lock:
+        if _resize_pool is None:
+            if settings.THUMBNAIL_RESIZE_EXECUTOR == "process":
+                _resize_pool = ProcessPoolExecutor(max_workers=resize_workers())
+            else:
+                _resize_pool = ThreadPoolExecutor(max_workers=resize_workers())
+        return _resize_pool
+
+
+def shutdown_resize_pool():
+    global _resize_pool
+
+    with _resize_pool_lock:
+        pool, _resize_pool = _resize_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def split_calls(calls, parts):
+    chunk_size = -(-len(calls) // parts)
+    return [
+        calls[start : start + chunk_size] for start in range(0, len(calls), chunk_size)
+    ]
+
+
+def _run_inline(function, calls):
+    return [function(*arguments) for arguments in calls]
+
+
+def _run_in_pool(function, calls):
+    if len(calls) < 2 or settings.THUMBNAIL_RESIZE_WORKERS == 1:
+        return _run_inline(function, calls)
+
+    pool = get_resize_pool()
+    if settings.THUMBNAIL_RESIZE_EXECUTOR != "process":
+        futures = [pool.submit(function, *arguments) for arguments in calls]
+        return [future.result() for future in futures]
+
+    # One task per worker: pickling memoizes the source image shared by the
+    # calls of a chunk, so each worker receives it once instead of per size.
+    futures = [
+        pool.submit(_run_inline, function, chunk)
+        for chunk in split_calls(calls, resize_workers())
+    ]
+    return [result for future in futures for result in future.result()]
+
+
+def render_thumbnails(pillow_image, sizes, format_name, run=_run_in_pool):
+    return render_thumbnail_formats(pillow_image, sizes, [format_name], run=run)[
+        format_name
+    ]
+
+
+def render_thumbnail_formats(pillow_image, sizes, format_names, run=_run_in_pool):
+    reducing_gap = settings.THUMBNAIL_REDUCING_GAP
+    target_sizes = [
+        calculate_expected_size(pillow_image.size, size.height, size.width, size.fit)
+        for size in sizes
+    ]
+    apply_jpeg_draft(pillow_image, target_sizes)
+    pillow_image.load()
+
+    sources = [pillow_image] * len(sizes)
+    framed = [index for index, size in enumerate(sizes) if keeps_frame(size)]
+    if settings.THUMBNAIL_CASCADE and len(framed) > 1:
+        resized_images = cascade_resize(
+            pillow_image,
+            [target_sizes[index] for index in framed],
+            min_scale=settings.THUMBNAIL_CASCADE_MIN_SCALE,
+            reducing_gap=reducing_gap,
+        )
+        for index, resized_image in zip(framed, resized_images):
+            sources[index] = resized_image
+
+    encoded = run(
+        _resize_and_encode,
+        [
+            (source, expected_size, format_names, reducing_gap, size)
+            for source, expected_size, size in zip(sources, target_sizes, sizes)
+        ],
+    )
+
+    return {
+        format_name: [size_encoded[index] for size_encoded in encoded]
+        for index, format_name in enumerate(format_names)
+    }
+
+
+def _render_batch_item(image_file, sizes, format_names, run=_run_inline):
+    try:
+        pillow_image = pilimage.open(image_file)
+        return render_thumbnail_formats(pillow_image, sizes, format_names, run=run)
+    except IMAGE_DECODE_ERRORS as error:
+        return error
+
+
+def render_thumbnail_batch(items):
+    if settings.THUMBNAIL_RESIZE_EXECUTOR == "process":
+        return [_render_batch_item(*item, run=_run_in_pool) for item in items]
+    return _run_in_pool(_render_batch_item, items)
+
+
 def create_random_name(size=None, title=None, format_name=None):
     name = ""
     file_format = ""
@@ -52,3 +481,23 @@ def calculate_seconds_left(add_time, time_to_expire):
     seconds_left = time_to_expire - seconds_difference
 
     return max(seconds_left, 0)
+
+
+def thumbnail_version(size, format_names):
+    signatures = [render_signature(size, format_name) for format_name in format_names]
+    raw_version = repr((size.width, size.height, signatures))
+    return hashlib.sha1(raw_version.encode()).hexdigest()[:8]
+
+
+def sign_thumbnail(image_id, size, format_names):
+    # The version changes whenever the rendered bytes would, so the
+    # thumbnail route can be cached as immutable.
+    signer = signing.Signer(salt=THUMBNAIL_SIGNING_SALT)
+    version = thumbnail_version(size, format_names)
+    return signer.sign(f"{image_id}.{size.id}.{version}")
+
+
+def unsign_thumbnail(token):
+    signer = signing.Signer(salt=THUMBNAIL_SIGNING_SALT)
+    image_id, size_id, version = signer.unsign(token).split(".")
+    return int(image_id), int(size_id), version
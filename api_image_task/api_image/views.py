@@ -1,22 +1,217 @@
+import time
+import zipfile
 import shortuuid
 from PIL import Image as pilimage
-from io import BytesIO
-from django.http import JsonResponse, FileResponse
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core import signing
+from django.conf import settings
+from django.http import FileResponse, JsonResponse, Http404
 from django.urls import reverse
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.generics import RetrieveAPIView, ListAPIView
 from rest_framework import status
 
-from .models import UploadedImage, ExpiringLinks
+from .batch_uploads import BatchTooLarge, batch_uploads, validate_batch
+from .deduplication import (
+    StoredCopyReleased,
+    discard_files,
+    find_stored_copies,
+    hash_upload,
+    lock_stored_copies,
+    no_stored_copies,
+    rendered_derivatives,
+    reused_thumbnails,
+    store_file,
+)
+from .jobs import enqueue_thumbnails
+from .derivative_cache import get_derivative_cache
+from .expiring_links import (
+    resolve_expiring_link,
+    resolve_signed_link,
+    sign_expiring_link,
+)
+from .file_serving import serve_file
+from .http_caching import cache_immutable, image_detail_etag, page_etag_response
+from .image_formats import (
+    MEDIA_TYPES,
+    derivative_formats,
+    negotiate_format,
+    source_format,
+)
+from .image_metadata import image_metadata
+from .pagination import KeysetPagination
+from .placeholders import make_placeholder, placeholder_from_thumbnails
+from .tiers import get_client_tier, get_tier
+from .models import (
+    ExpiringLinks,
+    UploadedImage,
+    ImageDerivative,
+    ThumbnailDimensions,
+    ThumbnailJob,
+)
 from .serializers import (
     UploadedImageSerializer,
     AddRetriveExpiringLinksSerializer,
+    BulkExpiringLinksSerializer,
     RetriveListImageSerializer,
 )
-from .utils import calculate_seconds_left, change_image_size, create_random_name
+from .utils import (
+    IMAGE_DECODE_ERRORS,
+    calculate_expected_size,
+    create_random_name,
+    render_signature,
+    render_thumbnail,
+    render_thumbnail_batch,
+    render_thumbnail_formats,
+    sign_thumbnail,
+    thumbnail_version,
+    unsign_thumbnail,
+)
+
+
+class FileContentNegotiation(BaseContentNegotiation):
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def images_with_derivatives():
+    derivatives = ImageDerivative.objects.select_related("size", "thumbnail_job")
+    return UploadedImage.objects.select_related(
+        "author__account_type"
+    ).prefetch_related(Prefetch("derivatives", queryset=derivatives))
+
+
+def original_links(original, tier):
+    if not tier.orginal_image_acces:
+        return []
+    return [{"id": original.id, "original url": original.upload_image.url}]
+
+
+def thumbnail_links(original, image_sizes, formats):
+    return [
+        {
+            "id": original.id,
+            "url": reverse(
+                "thumbnail", args=[sign_thumbnail(original.id, size, formats)]
+            ),
+        }
+        for size in image_sizes
+    ]
+
+
+def missing_derivatives(image_sizes, formats, stored):
+    missing = {}
+    for format_name in formats:
+        sizes = [size for size in image_sizes if (size.id, format_name) not in stored]
+        if sizes:
+            missing[format_name] = sizes
+    return missing
+
+
+def sizes_to_render(image_sizes, missing):
+    return [
+        size for size in image_sizes if any(size in sizes for sizes in missing.values())
+    ]
+
+
+def store_thumbnails(title, image_sizes, parsed_image, thumbnails, missing):
+    stored = {}
+    for format_name, contents in thumbnails.items():
+        for size, content in zip(image_sizes, contents):
+            if size not in missing[format_name]:
+                continue
+            width, height = calculate_expected_size(
+                parsed_image.size, size.height, size.width, size.fit
+            )
+            random_name = create_random_name(
+                size=size, title=title, format_name=format_name
+            )
+            stored[(size.id, format_name)] = {
+                "image": store_file(ImageDerivative, "image", random_name, content),
+                "byte_size": content.getbuffer().nbytes,
+                "width": width,
+                "height": height,
+            }
+    return stored
+
+
+def build_derivatives(original, image_sizes, formats, stored):
+    return [
+        ImageDerivative(
+            original=original,
+            size=size,
+            format=format_name,
+            **stored[(size.id, format_name)],
+        )
+        for size in image_sizes
+        for format_name in formats
+        if (size.id, format_name) in stored
+    ]
+
+
+def derivative_links(derivatives):
+    return [
+        {"id": derivative.id, "format": derivative.format, "url": derivative.image.url}
+        for derivative in derivatives
+    ]
+
+
+def done_derivative_links(derivatives):
+    return [
+        dict(link, status=ThumbnailJob.DONE) for link in derivative_links(derivatives)
+    ]
+
+
+class UndecodableImage(Exception):
+    pass
+
+
+def decode_upload(function, *arguments):
+    try:
+        return function(*arguments)
+    except IMAGE_DECODE_ERRORS as error:
+        raise UndecodableImage(str(error)) from error
+
+
+def image_placeholder(parsed_image, stored_thumbnails, decoded=False):
+    if not decoded:
+        return placeholder_from_thumbnails(stored_thumbnails)
+    try:
+        return make_placeholder(parsed_image.image)
+    except IMAGE_DECODE_ERRORS:
+        return ""
+
+
+def signed_link_url(image_id, file_name, time_to_expire, derivative_id=None):
+    token = sign_expiring_link(
+        image_id, file_name, time_to_expire, derivative_id=derivative_id
+    )
+    return reverse("signed-link", args=[token])
+
+
+def expiring_link_response(request, link):
+    if link is None:
+        raise Http404
+
+    if not link.is_active:
+        return JsonResponse(
+            {"link_status": "link already expired"}, status=status.HTTP_410_GONE
+        )
+
+    response = serve_file(request, link.path)
+    time_left = int(link.expires_at - time.time())
+    patch_cache_control(response, private=True, max_age=max(time_left, 0))
+    return response
 
 
 class AddImageView(APIView):
@@ -27,108 +222,584 @@ class AddImageView(APIView):
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        file_links = []
-        author = request.user.client
-        serializer.validated_data["author"] = author
-        uploaded_image = serializer.validated_data.get("upload_image")
-        title = serializer.validated_data.get("title")
-        pillow_image = pilimage.open(uploaded_image)
-        format = pillow_image.format
-        image_sizes = author.account_type.image_sizes.all()
+        client_tier = get_client_tier(request.user)
+        upload = serializer.validated_data
+        content_hash = hash_upload(upload["upload_image"])
+        stored = find_stored_copies([content_hash], client_tier.client_id)
+        try:
+            try:
+                data, status_code = self.store_upload(
+                    upload, client_tier, content_hash, stored
+                )
+            except StoredCopyReleased:
+                data, status_code = self.store_upload(
+                    upload, client_tier, content_hash, no_stored_copies()
+                )
+        except UndecodableImage:
+            return JsonResponse(
+                {"upload_image": ["Image could not be decoded"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return JsonResponse(data, status=status_code)
+
+    def store_upload(self, upload, client_tier, content_hash, stored):
+        tier = client_tier.tier
+        title = upload["title"]
+        parsed_image = upload["parsed_image"]
+        image_sizes = list(tier.image_sizes)
+        formats = derivative_formats(tier, parsed_image.format)
+        stored_thumbnails = dict(stored.derivatives[content_hash])
+        original_name = stored.originals.get(content_hash)
+        reused_originals = [original_name] if original_name else []
+        reused_derivatives = []
+        new_files = []
 
-        if author.account_type.orginal_image_acces:
-            random_name = create_random_name(title=title, format_name=format)
-            uploaded_image.name = random_name
+        # Decoding, rendering and writing files happen before the transaction,
+        # so the database is only locked for the inserts.
+        try:
+            if original_name is None:
+                original_name = store_file(
+                    UploadedImage,
+                    "upload_image",
+                    create_random_name(title=title, format_name=parsed_image.format),
+                    upload["upload_image"],
+                )
+                new_files.append((UploadedImage, "upload_image", original_name))
 
-            serializer.save()
-            file_links.append(
-                {
-                    "id": serializer.instance.id,
-                    "original url": serializer.instance.upload_image.url,
+            missing = {}
+            if settings.THUMBNAIL_LAZY:
+                placeholder = decode_upload(make_placeholder, parsed_image.image)
+            else:
+                reused_derivatives = reused_thumbnails(
+                    stored_thumbnails, image_sizes, formats
+                )
+                missing = missing_derivatives(image_sizes, formats, stored_thumbnails)
+                rendered = {}
+                if missing and not settings.THUMBNAIL_ASYNC:
+                    render_sizes = sizes_to_render(image_sizes, missing)
+                    thumbnails = decode_upload(
+                        render_thumbnail_formats,
+                        parsed_image.image,
+                        render_sizes,
+                        list(missing),
+                    )
+                    rendered = store_thumbnails(
+                        title, render_sizes, parsed_image, thumbnails, missing
+                    )
+                    new_files += [
+                        (ImageDerivative, "image", fields["image"])
+                        for fields in rendered.values()
+                    ]
+                    stored_thumbnails.update(rendered)
+                placeholder = image_placeholder(
+                    parsed_image, stored_thumbnails, decoded=bool(rendered)
+                )
+
+            with transaction.atomic():
+                lock_stored_copies(
+                    reused_originals, reused_derivatives, client_tier.client_id
+                )
+                original = UploadedImage.objects.create(
+                    title=title,
+                    author_id=client_tier.client_id,
+                    upload_image=original_name,
+                    is_original=True,
+                    content_hash=content_hash,
+                    placeholder=placeholder,
+                    **image_metadata(parsed_image, upload["upload_image"].size),
+                )
+                file_links = original_links(original, tier)
+                if settings.THUMBNAIL_LAZY:
+                    file_links += thumbnail_links(original, image_sizes, formats)
+                    return {"title": title, "urls": file_links}, status.HTTP_201_CREATED
+
+                derivatives = ImageDerivative.objects.bulk_create(
+                    build_derivatives(original, image_sizes, formats, stored_thumbnails)
+                )
+                if settings.THUMBNAIL_ASYNC:
+                    file_links += done_derivative_links(derivatives)
+                    for format_name, missing_sizes in missing.items():
+                        file_links += enqueue_thumbnails(
+                            original=original,
+                            image_sizes=missing_sizes,
+                            format_name=format_name,
+                        )
+                else:
+                    file_links += derivative_links(derivatives)
+                if len(formats) > 1:
+                    file_links += thumbnail_links(original, image_sizes, formats)
+        except Exception:
+            discard_files(new_files)
+            raise
+
+        if settings.THUMBNAIL_ASYNC:
+            data = {"title": title, "status": ThumbnailJob.PENDING, "urls": file_links}
+            return data, status.HTTP_202_ACCEPTED
+        return {"title": title, "urls": file_links}, status.HTTP_201_CREATED
+
+
+class AddImagesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            uploads = batch_uploads(request)
+        except zipfile.BadZipFile:
+            return JsonResponse(
+                {"archive": "Archive is not a valid zip file"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except BatchTooLarge:
+            return JsonResponse(
+                {"upload_images": "Too many files in one batch"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not uploads:
+            return JsonResponse(
+                {"upload_images": "No files were submitted"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        client_tier = get_client_tier(request.user)
+        results = {}
+        accepted = []
+        for index, filename, validated_data, errors in validate_batch(
+            uploads, request.data.getlist("titles")
+        ):
+            if errors is None:
+                accepted.append((index, filename, validated_data))
+            else:
+                results[index] = {
+                    "index": index,
+                    "filename": filename,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                    "errors": errors,
                 }
+
+        content_hashes = {
+            index: hash_upload(data["upload_image"]) for index, _, data in accepted
+        }
+        stored = find_stored_copies(set(content_hashes.values()), client_tier.client_id)
+        try:
+            item_status, created = self.store_batch(
+                accepted, results, client_tier, content_hashes, stored
+            )
+        except StoredCopyReleased:
+            item_status, created = self.store_batch(
+                accepted, results, client_tier, content_hashes, no_stored_copies()
             )
 
-        for size in image_sizes:
-            resized_pillow_img = change_image_size(
-                pillow_image=pillow_image, height=size.height, width=size.width
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif created < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = item_status
+        data = {"results": [results[index] for index in sorted(results)]}
+        return JsonResponse(data, status=response_status)
+
+    def store_batch(self, accepted, results, client_tier, content_hashes, stored):
+        image_sizes = list(client_tier.tier.image_sizes)
+        formats = {}
+        missing = {}
+        reused_originals = set()
+        reused_derivatives = set()
+        for index, _, data in accepted:
+            content_hash = content_hashes[index]
+            formats[index] = derivative_formats(
+                client_tier.tier, data["parsed_image"].format
             )
-            buffer = BytesIO()
-            resized_pillow_img.save(buffer, format=format)
-            random_name = create_random_name(size=size, title=title, format_name=format)
-            new_image_instance = UploadedImage(
-                upload_image=SimpleUploadedFile(random_name, buffer.getvalue()),
-                author=author,
-                title=title,
+            missing[index] = missing_derivatives(
+                image_sizes, formats[index], stored.derivatives[content_hash]
             )
-            new_image_instance.save()
-            file_links.append(
-                {
-                    "id": new_image_instance.id,
-                    "url": new_image_instance.upload_image.url,
-                }
+            if content_hash in stored.originals:
+                reused_originals.add(stored.originals[content_hash])
+            if not settings.THUMBNAIL_LAZY:
+                reused_derivatives.update(
+                    reused_thumbnails(
+                        stored.derivatives[content_hash], image_sizes, formats[index]
+                    )
+                )
+
+        new_files = []
+        failed_hashes = set()
+        placeholders = {}
+        try:
+            if settings.THUMBNAIL_LAZY:
+                for index, _, data in accepted:
+                    content_hash = content_hashes[index]
+                    if content_hash in placeholders or content_hash in failed_hashes:
+                        continue
+                    try:
+                        placeholders[content_hash] = decode_upload(
+                            make_placeholder, data["parsed_image"].image
+                        )
+                    except UndecodableImage:
+                        failed_hashes.add(content_hash)
+            elif not settings.THUMBNAIL_ASYNC:
+                to_render = {}
+                for index, _, data in accepted:
+                    content_hash = content_hashes[index]
+                    if missing[index] and content_hash not in to_render:
+                        render_sizes = sizes_to_render(image_sizes, missing[index])
+                        to_render[content_hash] = (data, render_sizes, missing[index])
+                thumbnails = render_thumbnail_batch(
+                    [
+                        (data["upload_image"], render_sizes, list(item_missing))
+                        for data, render_sizes, item_missing in to_render.values()
+                    ]
+                )
+                for (content_hash, (data, render_sizes, item_missing)), content in zip(
+                    to_render.items(), thumbnails
+                ):
+                    if isinstance(content, Exception):
+                        failed_hashes.add(content_hash)
+                        continue
+                    rendered = store_thumbnails(
+                        data["title"],
+                        render_sizes,
+                        data["parsed_image"],
+                        content,
+                        item_missing,
+                    )
+                    new_files += [
+                        (ImageDerivative, "image", fields["image"])
+                        for fields in rendered.values()
+                    ]
+                    stored.derivatives[content_hash].update(rendered)
+
+            decoded_items = []
+            for index, filename, data in accepted:
+                if content_hashes[index] in failed_hashes:
+                    results[index] = {
+                        "index": index,
+                        "filename": filename,
+                        "status": status.HTTP_400_BAD_REQUEST,
+                        "errors": {"upload_image": ["Image could not be decoded"]},
+                    }
+                else:
+                    decoded_items.append((index, filename, data))
+            accepted = decoded_items
+
+            originals = []
+            for index, _, data in accepted:
+                content_hash = content_hashes[index]
+                if content_hash not in placeholders:
+                    placeholders[content_hash] = image_placeholder(
+                        data["parsed_image"], stored.derivatives[content_hash]
+                    )
+                if content_hash not in stored.originals:
+                    random_name = create_random_name(
+                        title=data["title"], format_name=data["parsed_image"].format
+                    )
+                    stored.originals[content_hash] = store_file(
+                        UploadedImage, "upload_image", random_name, data["upload_image"]
+                    )
+                    new_files.append(
+                        (UploadedImage, "upload_image", stored.originals[content_hash])
+                    )
+                originals.append(
+                    UploadedImage(
+                        title=data["title"],
+                        author_id=client_tier.client_id,
+                        upload_image=stored.originals[content_hash],
+                        is_original=True,
+                        content_hash=content_hash,
+                        placeholder=placeholders[content_hash],
+                        **image_metadata(
+                            data["parsed_image"], data["upload_image"].size
+                        ),
+                    )
+                )
+
+            with transaction.atomic():
+                lock_stored_copies(
+                    reused_originals, reused_derivatives, client_tier.client_id
+                )
+                UploadedImage.objects.bulk_create(originals)
+                derivatives = {}
+                if not settings.THUMBNAIL_LAZY:
+                    for (index, _, data), original in zip(accepted, originals):
+                        derivatives[index] = build_derivatives(
+                            original,
+                            image_sizes,
+                            formats[index],
+                            stored.derivatives[content_hashes[index]],
+                        )
+                    ImageDerivative.objects.bulk_create(
+                        derivative
+                        for index_derivatives in derivatives.values()
+                        for derivative in index_derivatives
+                    )
+
+                item_status = status.HTTP_201_CREATED
+                for (index, filename, data), original in zip(accepted, originals):
+                    file_links = original_links(original, client_tier.tier)
+                    if settings.THUMBNAIL_LAZY:
+                        file_links += thumbnail_links(
+                            original, image_sizes, formats[index]
+                        )
+                    elif settings.THUMBNAIL_ASYNC:
+                        item_status = status.HTTP_202_ACCEPTED
+                        file_links += done_derivative_links(derivatives[index])
+                        for format_name, missing_sizes in missing[index].items():
+                            file_links += enqueue_thumbnails(
+                                original=original,
+                                image_sizes=missing_sizes,
+                                format_name=format_name,
+                            )
+                    else:
+                        file_links += derivative_links(derivatives[index])
+                    if not settings.THUMBNAIL_LAZY and len(formats[index]) > 1:
+                        file_links += thumbnail_links(
+                            original, image_sizes, formats[index]
+                        )
+                    results[index] = {
+                        "index": index,
+                        "filename": filename,
+                        "status": item_status,
+                        "id": original.id,
+                        "title": original.title,
+                        "urls": file_links,
+                    }
+        except Exception:
+            discard_files(new_files)
+            raise
+
+        return item_status, len(originals)
+
+
+class ThumbnailView(APIView):
+    content_negotiation_class = FileContentNegotiation
+
+    def get(self, request, token):
+        try:
+            image_id, size_id, version = unsign_thumbnail(token)
+        except (signing.BadSignature, ValueError):
+            return JsonResponse(
+                {"thumbnail": "Invalid thumbnail link"},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
-        data = {"title": title, "urls": file_links}
-        return JsonResponse(data, status=status.HTTP_201_CREATED)
+        image = get_object_or_404(
+            UploadedImage.objects.select_related("author"), id=image_id
+        )
+        size = get_object_or_404(ThumbnailDimensions, id=size_id)
+        formats = derivative_formats(
+            get_tier(image.author.account_type_id), source_format(image)
+        )
+        if version != thumbnail_version(size, formats):
+            # Rendering settings changed since the link was issued; the old
+            # URL may still be cached with the old bytes.
+            return redirect("thumbnail", token=sign_thumbnail(image.id, size, formats))
+        format_name = negotiate_format(request.headers.get("Accept", ""), formats)
+
+        derivative = (
+            rendered_derivatives()
+            .filter(original=image, size=size, format=format_name)
+            .only("image")
+            .first()
+        )
+        if derivative is not None:
+            response = serve_file(request, derivative.image.path)
+        else:
+            try:
+                response = self.serve_cached(request, image, size, format_name)
+            except IMAGE_DECODE_ERRORS:
+                return JsonResponse(
+                    {"thumbnail": "Thumbnail could not be rendered"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+        response = cache_immutable(response)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def serve_cached(self, request, image, size, format_name):
+        cache = get_derivative_cache()
+        key = cache.make_key(
+            image.upload_image.name,
+            size.width,
+            size.height,
+            format_name,
+            render_signature(size, format_name),
+        )
+        path = cache.get(key)
+        if path is not None:
+            try:
+                return serve_file(request, path)
+            except (Http404, FileNotFoundError):
+                pass  # evicted by another worker after the lookup
+
+        with image.upload_image.open("rb") as source:
+            pillow_image = pilimage.open(source)
+            content = render_thumbnail(pillow_image, size, format_name)
+        path = cache.put(key, content)
+        try:
+            return serve_file(request, path)
+        except (Http404, FileNotFoundError):
+            content.seek(0)
+            return FileResponse(content, content_type=MEDIA_TYPES[format_name])
 
 
 class UserImageView(RetrieveAPIView):
     serializer_class = RetriveListImageSerializer
 
+    @method_decorator(condition(etag_func=image_detail_etag))
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     def get_queryset(self):
         image_id = self.kwargs["pk"]
-        return UploadedImage.objects.filter(id=image_id)
+        return images_with_derivatives().filter(id=image_id)
 
 
 class UserImagesListView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = RetriveListImageSerializer
+    pagination_class = KeysetPagination
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        return page_etag_response(request, response)
 
     def get_queryset(self):
-        user = self.request.user
-        return UploadedImage.objects.filter(author=user.id)
+        client_id = get_client_tier(self.request.user).client_id
+        return (
+            images_with_derivatives()
+            .filter(author_id=client_id)
+            .only(
+                "id",
+                "add_time",
+                "title",
+                "upload_image",
+                "is_original",
+                "width",
+                "height",
+                "format",
+                "byte_size",
+                "placeholder",
+                "author__account_type__orginal_image_acces",
+            )
+        )
 
 
 class AddRetriveExpiringLinks(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def post(self, request):
-        time_link_acces = request.user.client.account_type.time_limited_link_acces
-        if not time_link_acces:
+        client_tier = get_client_tier(request.user)
+        tier = client_tier.tier
+        if not tier.time_limited_link_acces:
             return JsonResponse(
                 {"account_type": "Your account lacks sufficient permissions"},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        serializer = AddRetriveExpiringLinksSerializer(data=request.data)
+        serializer = AddRetriveExpiringLinksSerializer(
+            data=request.data, context={"client_id": client_tier.client_id}
+        )
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        uuid_str = str(shortuuid.uuid())
-        url = reverse("time-expiring", args=[uuid_str])
-        serializer.validated_data["expiring_link"] = uuid_str
+        derivative = serializer.validated_data.get("derivative")
+        if derivative is None and not tier.orginal_image_acces:
+            return JsonResponse(
+                {"derivative": "Your account can only share thumbnails"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
         secound_to_expire = serializer.validated_data["time_to_expire"]
-        serializer.save()
+        if serializer.validated_data.pop("mode") == "signed":
+            image = serializer.validated_data["image_id"]
+            file = derivative.image if derivative else image.upload_image
+            url = signed_link_url(
+                image.id,
+                file.name,
+                secound_to_expire,
+                derivative_id=derivative and derivative.id,
+            )
+        else:
+            uuid_str = str(shortuuid.uuid())
+            url = reverse("time-expiring", args=[uuid_str])
+            serializer.validated_data["expiring_link"] = uuid_str
+            serializer.save()
 
         data = {"url": url, "secound_to_expire": secound_to_expire}
 
         return JsonResponse(data, status=status.HTTP_201_CREATED)
 
     def get(self, request, link_name):
-        link_object = get_object_or_404(ExpiringLinks, expiring_link=link_name)
-        time_left = calculate_seconds_left(
-            add_time=link_object.add_time, time_to_expire=link_object.time_to_expire
-        )
-
-        if time_left != 0:
-            image_id = link_object.image_id.id
+        return expiring_link_response(request, resolve_expiring_link(link_name))
 
-            image_object = get_object_or_404(UploadedImage, id=image_id)
 
-            image_file = image_object.upload_image.path
-            return FileResponse(open(image_file, "rb"))
+class BulkExpiringLinks(APIView):
+    permission_classes = [IsAuthenticated]
 
-        else:
+    def post(self, request):
+        client_tier = get_client_tier(request.user)
+        if not client_tier.tier.time_limited_link_acces:
             return JsonResponse(
-                {"link_status": "link already expired"}, status=status.HTTP_410_GONE
+                {"account_type": "Your account lacks sufficient permissions"},
+                status=status.HTTP_403_FORBIDDEN,
             )
+        if not client_tier.tier.orginal_image_acces:
+            return JsonResponse(
+                {"derivative": "Your account can only share thumbnails"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = BulkExpiringLinksSerializer(
+            data=request.data, context={"client_id": client_tier.client_id}
+        )
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        items = serializer.validated_data["links"]
+        if serializer.validated_data["mode"] == "signed":
+            urls = [
+                signed_link_url(
+                    item["image_id"], item["file_name"], item["time_to_expire"]
+                )
+                for item in items
+            ]
+        else:
+            links = []
+            for item in items:
+                link = ExpiringLinks(
+                    image_id_id=item["image_id"],
+                    time_to_expire=item["time_to_expire"],
+                    expiring_link=str(shortuuid.uuid()),
+                )
+                link.set_expires_at()
+                links.append(link)
+            ExpiringLinks.objects.bulk_create(links)
+            urls = [
+                reverse("time-expiring", args=[link.expiring_link]) for link in links
+            ]
+
+        data = {
+            "links": [
+                {
+                    "image_id": item["image_id"],
+                    "url": url,
+                    "secound_to_expire": item["time_to_expire"],
+                }
+                for item, url in zip(items, urls)
+            ]
+        }
+        return JsonResponse(data, status=status.HTTP_201_CREATED)
+
+
+class SignedExpiringLinkView(APIView):
+    authentication_classes = []
+
+    def get(self, request, token):
+        return expiring_link_response(request, resolve_signed_link(token))
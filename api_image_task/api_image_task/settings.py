@@ -119,10 +119,109 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Media
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = ""
+# Files are stored under hashed prefix directories (ab/cd/name) so no single
+# directory grows to millions of entries; depth 0 keeps the flat layout
+STORAGES = {
+    "default": {"BACKEND": "api_image.storage.ShardedFileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+MEDIA_SHARD_DEPTH = 2
+MEDIA_SHARD_WIDTH = 2
+
+# Uploads: spool files above 1 MB to disk and reject oversized files before decoding;
+# the spooling handlers hash the content on the way for deduplication
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    "api_image.upload_handlers.MaxSizeUploadHandler",
+    "api_image.upload_handlers.HashingMemoryFileUploadHandler",
+    "api_image.upload_handlers.HashingTemporaryFileUploadHandler",
+]
+IMAGE_UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 60_000_000
+# Batch uploads (add-images/): files per request and total request/archive size
+IMAGE_BATCH_MAX_FILES = 100
+IMAGE_BATCH_MAX_BYTES = 500 * 1024 * 1024
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        "api_image.authentication.ApiKeyAuthentication",
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ]
 }
+
+# Thumbnails
+THUMBNAIL_ASYNC = False
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_POLL_INTERVAL = 1.0
+THUMBNAIL_JOB_MAX_ATTEMPTS = 3
+# A processing job not finished within this many seconds is claimed again
+THUMBNAIL_JOB_LEASE_SECONDS = 300
+# "thread" or "process"; None workers means one per CPU core
+THUMBNAIL_RESIZE_EXECUTOR = "thread"
+THUMBNAIL_RESIZE_WORKERS = None
+# Derive smaller thumbnails from larger ones at least MIN_SCALE times their size
+THUMBNAIL_CASCADE = True
+THUMBNAIL_CASCADE_MIN_SCALE = 1.5
+# Pillow reducing_gap: box-reduce before LANCZOS, None disables it
+THUMBNAIL_REDUCING_GAP = None
+# Let libjpeg decode JPEGs at 1/2-1/8 scale when every size is at most half the source
+THUMBNAIL_JPEG_DRAFT = True
+# Pillow save() options per thumbnail format; account tiers pick extra formats
+# (thumbnail_formats), AVIF is skipped unless the Pillow build can encode it.
+# Encoder fields set on a thumbnail size (quality, optimize, ...) override these
+THUMBNAIL_ENCODER_OPTIONS = {
+    "JPEG": {"progressive": True},
+    "WEBP": {"quality": 80, "method": 4},
+    "AVIF": {"quality": 60},
+}
+# Inline placeholder (data URI of a tiny WebP/JPEG) stored with every image,
+# PLACEHOLDER_SIZE pixels on the longer side
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+# Render thumbnails on first request into a size-bounded LRU disk cache
+THUMBNAIL_LAZY = False
+THUMBNAIL_CACHE_DIR = os.path.join(BASE_DIR, "thumbnail_cache")
+THUMBNAIL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Between rescans the cache size is estimated from this worker's own writes.
+THUMBNAIL_CACHE_RESCAN_SECONDS = 60
+
+# Expiring links
+# Cache alias for token -> file lookups, kept for the remaining link lifetime;
+# point it at a shared backend (e.g. RedisCache) when running several processes
+EXPIRING_LINK_CACHE = "default"
+# Most links created by one time-expiring/bulk/ request
+EXPIRING_LINK_BULK_MAX = 500
+
+# Garbage collection (manage.py collect_garbage): expired links deleted per query
+# and how old an unreferenced media file must be before it is removed, so files
+# of uploads whose transaction has not committed yet are left alone
+GC_LINK_BATCH_SIZE = 1000
+# Media files checked against the database per query
+GC_FILE_BATCH_SIZE = 500
+GC_ORPHAN_MIN_AGE = 60 * 60
+
+# File serving for expiring links and lazy thumbnails: "python" streams from
+# Django (os.sendfile through wsgi.file_wrapper), "x-accel-redirect" (nginx) and
+# "x-sendfile" (Apache, lighttpd) hand the file to the front proxy instead
+FILE_SERVE_BACKEND = "python"
+# Internal proxy locations for X-Accel-Redirect, keyed by directory on disk
+FILE_SERVE_ACCEL_LOCATIONS = {
+    MEDIA_ROOT: "/protected/media/",
+    THUMBNAIL_CACHE_DIR: "/protected/thumbnails/",
+}
+
+# Stored images never change (every upload gets a random name), so clients and
+# CDNs may cache media and rendered thumbnails for a year without revalidating
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# API keys ("Authorization: Api-Key <prefix>.<secret>"); verified keys are cached
+# for API_KEY_CACHE_TTL seconds, so a revoke reaches other processes within that
+# time unless the cache alias is shared
+API_KEY_CACHE = "default"
+API_KEY_CACHE_TTL = 60
+
+# Account tier flags and sizes, cached per tier and per user; model signals clear
+# the cache on change, the TTL bounds staleness for processes that do not share it
+TIER_CACHE = "default"
+TIER_CACHE_TTL = 300
@@ -0,0 +1,64 @@
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_image_task.settings")
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import setup_test_environment
+from rest_framework.authentication import BasicAuthentication
+from api_image.authentication import ApiKeyAuthentication, issue_api_key
+from api_image.models import AccountTier, ClientAccount
+
+REQUESTS = 50
+
+
+def measure(authentication, request):
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        authentication.authenticate(request)
+    return (time.perf_counter() - start) / REQUESTS
+
+
+def main():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create_user(username="benchmark", password="benchmark")
+        client_account = ClientAccount.objects.create(
+            user=user, account_type=AccountTier.objects.create(name="Benchmark")
+        )
+        _, key = issue_api_key(client_account)
+        factory = RequestFactory()
+        credentials = base64.b64encode(b"benchmark:benchmark").decode()
+
+        basic = measure(
+            BasicAuthentication(),
+            factory.get("/", HTTP_AUTHORIZATION=f"Basic {credentials}"),
+        )
+        api_key_request = factory.get("/", HTTP_AUTHORIZATION=f"Api-Key {key}")
+        with override_settings(API_KEY_CACHE=None):
+            uncached = measure(ApiKeyAuthentication(), api_key_request)
+        cache.clear()
+        cached = measure(ApiKeyAuthentication(), api_key_request)
+
+        print(f"Per-request authentication, mean of {REQUESTS} (ms)")
+        print(f"{'basic (PBKDF2)':<24}{basic * 1000:>10.3f}")
+        print(f"{'api key, no cache':<24}{uncached * 1000:>10.3f}")
+        print(f"{'api key, cached':<24}{cached * 1000:>10.3f}")
+    finally:
+        cache.clear()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_image_task.settings")
+
+import django
+
+django.setup()
+
+from PIL import Image as pilimage
+from api_image.image_formats import can_encode
+from api_image.models import ThumbnailDimensions
+from api_image.utils import change_image_size, encode_image
+
+ROUNDS = 5
+IMAGE_SIZE = (1600, 1200)
+THUMBNAIL_HEIGHT = 400
+PRESETS = [
+    ("JPEG", "default", {}),
+    ("JPEG", "q60 4:2:0", {"quality": 60, "subsampling": "4:2:0"}),
+    ("JPEG", "q85 4:4:4", {"quality": 85, "subsampling": "4:4:4"}),
+    ("JPEG", "q75 optimize", {"quality": 75, "optimize": True}),
+    ("JPEG", "baseline", {"progressive": False}),
+    ("PNG", "default", {}),
+    ("PNG", "level 9 optimize", {"png_compress_level": 9, "optimize": True}),
+    ("PNG", "level 1", {"png_compress_level": 1}),
+    ("PNG", "256 colors", {"png_colors": 256}),
+    ("PNG", "64 colors", {"png_colors": 64}),
+    ("WEBP", "default", {}),
+    ("WEBP", "q60", {"quality": 60}),
+    ("WEBP", "q80 optimize", {"quality": 80, "optimize": True}),
+    ("AVIF", "default", {}),
+    ("AVIF", "q40", {"quality": 40}),
+]
+
+
+def create_image(path=None):
+    if path:
+        return pilimage.open(path).convert("RGB")
+    image = pilimage.effect_mandelbrot(IMAGE_SIZE, (-2, -1.5, 1, 1.5), 100)
+    noise = pilimage.effect_noise(IMAGE_SIZE, 40)
+    return pilimage.merge("RGB", [image, noise, image.rotate(180)])
+
+
+def measure(function):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        result = function()
+        timings.append(time.process_time() - start)
+    return min(timings), result
+
+
+def main():
+    source = create_image(sys.argv[1] if len(sys.argv) > 1 else None)
+    thumbnail = change_image_size(source, height=THUMBNAIL_HEIGHT)
+    print(
+        f"Thumbnail {thumbnail.size[0]}x{thumbnail.size[1]}, "
+        f"best of {ROUNDS} (CPU milliseconds per encode)"
+    )
+    print(f"{'format':<8}{'preset':<20}{'ms':>10}{'bytes':>12}")
+
+    for format_name, label, options in PRESETS:
+        if not can_encode(format_name):
+            print(f"{format_name:<8}{label:<20}{'not supported by this Pillow':>22}")
+            continue
+        size = ThumbnailDimensions(height=THUMBNAIL_HEIGHT, **options)
+        seconds, content = measure(lambda: encode_image(thumbnail, format_name, size))
+        print(
+            f"{format_name:<8}{label:<20}{seconds * 1000:>10.1f}"
+            f"{content.getbuffer().nbytes:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
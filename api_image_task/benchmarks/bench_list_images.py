@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_image_task.settings")
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from api_image.models import AccountTier, ClientAccount, UploadedImage
+from api_image.pagination import KeysetPagination
+
+ROUNDS = 5
+IMAGE_COUNT = 100_000
+PAGE_SIZE = 50
+DEPTHS = [0, 1_000, 10_000, 50_000, 99_000]
+
+
+def create_images():
+    tier = AccountTier.objects.create(name="Benchmark", orginal_image_acces=True)
+    user = User.objects.create_user(username="benchmark", password="benchmark")
+    client_account = ClientAccount.objects.create(user=user, account_type=tier)
+    UploadedImage.objects.bulk_create(
+        (
+            UploadedImage(
+                title=f"Image {index}",
+                author=client_account,
+                upload_image=f"image-{index}.jpeg",
+                is_original=True,
+            )
+            for index in range(IMAGE_COUNT)
+        ),
+        batch_size=5_000,
+    )
+    return user
+
+
+def measure(function):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = create_images()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse("user-images-list")
+        images = UploadedImage.objects.filter(author=user.client).order_by(
+            "add_time", "id"
+        )
+        pagination = KeysetPagination()
+        factory = APIRequestFactory()
+
+        print(f"{IMAGE_COUNT} images, page size {PAGE_SIZE}, best of {ROUNDS} (ms)")
+        print(f"{'depth':<10}{'offset query':>15}{'keyset query':>15}{'request':>10}")
+        for depth in DEPTHS:
+            offset = measure(lambda: list(images[depth : depth + PAGE_SIZE]))
+            params = {"page_size": PAGE_SIZE}
+            if depth:
+                params["cursor"] = pagination.encode_cursor(images[depth - 1])
+            request = Request(factory.get(url, params))
+            keyset = measure(lambda: pagination.paginate_queryset(images, request))
+            response = measure(lambda: client.get(url, params))
+            print(
+                f"{depth:<10}{offset * 1000:>15.2f}{keyset * 1000:>15.2f}"
+                f"{response * 1000:>10.2f}"
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_image_task.settings")
+
+import django
+
+django.setup()
+
+from PIL import Image as pilimage
+from api_image.utils import calculate_expected_size, cascade_resize, resize_image
+
+ROUNDS = 5
+IMAGE_SIZE = (5472, 3648)
+TIER_HEIGHTS = [(200, 400), (100, 200, 400, 800), (64, 128, 256, 512, 1024)]
+
+
+def create_image():
+    image = pilimage.effect_mandelbrot(IMAGE_SIZE, (-2, -1.5, 1, 1.5), 100)
+    return image.convert("RGB")
+
+
+def measure(function):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        function()
+        timings.append(time.process_time() - start)
+    return min(timings)
+
+
+def main():
+    pillow_image = create_image()
+    print(f"Source {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}, best of {ROUNDS} (CPU seconds)")
+    print(f"{'heights':<28}{'direct':>10}{'cascade':>10}{'saving':>10}")
+
+    for heights in TIER_HEIGHTS:
+        target_sizes = [
+            calculate_expected_size(pillow_image.size, height=height)
+            for height in heights
+        ]
+        direct = measure(
+            lambda: [resize_image(pillow_image, size) for size in target_sizes]
+        )
+        cascade = measure(
+            lambda: cascade_resize(pillow_image, target_sizes, min_scale=1.5)
+        )
+        saving = 1 - cascade / direct
+        label = ", ".join(str(height) for height in heights)
+        print(f"{label:<28}{direct:>10.3f}{cascade:>10.3f}{saving:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
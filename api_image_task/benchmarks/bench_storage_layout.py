@@ -0,0 +1,78 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_image_task.settings")
+
+import django
+
+django.setup()
+
+from api_image.storage import ShardedFileSystemStorage
+from api_image.utils import create_random_name
+
+ROUNDS = 5
+FILE_COUNTS = [10_000, 100_000]
+SAMPLES = 20_000
+
+
+def create_files(directory, names):
+    for name in names:
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(b"x")
+
+
+def measure(function, paths):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for path in paths:
+            function(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(paths) * 1_000_000
+
+
+def open_and_read(path):
+    with open(path, "rb") as file:
+        file.read()
+
+
+def main():
+    storage = ShardedFileSystemStorage()
+    print(f"Warm cache, best of {ROUNDS} (microseconds per call)")
+    print(f"{'files':>10}{'layout':>10}{'stat':>10}{'open':>10}{'listdir':>12}")
+
+    for count in FILE_COUNTS:
+        names = [
+            create_random_name(title="image", format_name="jpeg") for _ in range(count)
+        ]
+        sample = random.sample(names, min(SAMPLES, count))
+        for layout, shard in [("flat", False), ("sharded", True)]:
+            directory = tempfile.mkdtemp()
+            try:
+                stored = [storage.shard_name(name) if shard else name for name in names]
+                create_files(directory, stored)
+                paths = [
+                    os.path.join(directory, storage.shard_name(name) if shard else name)
+                    for name in sample
+                ]
+                stat = measure(os.stat, paths)
+                opened = measure(open_and_read, paths)
+                start = time.perf_counter()
+                os.listdir(os.path.dirname(paths[0]))
+                listdir = (time.perf_counter() - start) * 1_000_000
+                print(
+                    f"{count:>10}{layout:>10}{stat:>10.2f}{opened:>10.2f}{listdir:>12.0f}"
+                )
+            finally:
+                shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()